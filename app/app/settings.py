@@ -80,17 +80,112 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Set DB_POOL=true to draw connections from a pool in each process, and
+# DB_CONN_MAX_AGE to keep connections open for that many seconds between
+# requests. Reused connections are checked before their first query in a
+# request unless DB_CONN_HEALTH_CHECKS=false.
+
+DB_POOL = os.environ.get('DB_POOL', 'false').lower() == 'true'
+
+# Threads running the queries of async views, per process.
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 10))
+
+# Each thread of a process may hold a connection for as long as
+# CONN_MAX_AGE: the async view threads, plus the request threads of
+# gunicorn, or the thread running sync views under ASGI. The pool fits
+# them all by default. Threads asking for a connection beyond the pool
+# size wait up to DB_POOL_TIMEOUT seconds for one to be returned.
+DB_POOL_MAX_SIZE = int(os.environ.get(
+    'DB_POOL_MAX_SIZE',
+    ASYNC_DB_THREADS + int(os.environ.get('GUNICORN_THREADS', 1)),
+))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.backends.postgresql_pool' if DB_POOL
+            else 'core.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': (
+            os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true'
+        ),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Rendered mindmaps, keyed by mindmap id and version. Local memory
+    # caches evict the least recently used entries first.
+    'mindmaps': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mindmaps',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('MINDMAP_CACHE_ENTRIES', 1000)),
+        },
+    },
+}
+
+# Broker relaying mindmap change events to the event streams. The in
+# memory broker only reaches streams served by the same process, so ASGI
+# servers, which run several workers serving streams, relay them through
+# Postgres by default.
+SERVER_INTERFACE = os.environ.get('SERVER_INTERFACE', 'wsgi')
+MINDMAP_BROKER = {
+    'BACKEND': os.environ.get(
+        'MINDMAP_BROKER_BACKEND',
+        'mindmap.broker.PostgresBroker' if SERVER_INTERFACE == 'asgi'
+        else 'mindmap.broker.InMemoryBroker',
+    ),
+    'OPTIONS': {
+        'queue_size': int(os.environ.get('MINDMAP_BROKER_QUEUE_SIZE', 100)),
+    },
+}
+
+# Tickets to open event streams with, which are passed in their URL, are
+# only valid for a short while.
+STREAM_TICKET_MAX_AGE = int(os.environ.get('STREAM_TICKET_MAX_AGE', 60))
+
+# Pre-rendering of mindmaps by the render_worker command. Renders wait for
+# writes to pause for the debounce delay, but no longer than the maximum
+# delay, and jobs claimed by a worker that died are retried after the
+# lease.
+RENDER_DEBOUNCE_SECONDS = float(os.environ.get('RENDER_DEBOUNCE_SECONDS', 2))
+RENDER_MAX_DELAY_SECONDS = float(
+    os.environ.get('RENDER_MAX_DELAY_SECONDS', 30)
+)
+RENDER_LEASE_SECONDS = float(os.environ.get('RENDER_LEASE_SECONDS', 300))
+
+# Authenticated API tokens are cached locally for LOCAL_TTL seconds, and in
+# the ALIAS cache, shared between processes, for TTL seconds.
+TOKEN_CACHE = {
+    'ALIAS': 'default',
+    'TTL': int(os.environ.get('TOKEN_CACHE_TTL', 300)),
+    'LOCAL_TTL': int(os.environ.get('TOKEN_CACHE_LOCAL_TTL', 10)),
+    'LOCAL_MAXSIZE': 1024,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,44 @@
+"""
+Production settings for the app project.
+
+Extends the development settings with DEBUG turned off, so queries are no
+longer recorded in memory, and with secrets and hosts read from the
+environment. Select it with DJANGO_SETTINGS_MODULE=app.settings_production.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from app.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY in production.')
+
+# Keep connections open between requests.
+DATABASES['default']['CONN_MAX_AGE'] = int(  # noqa: F405
+    os.environ.get('DB_CONN_MAX_AGE', 60)
+)
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING'),
+    },
+}
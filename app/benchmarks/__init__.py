@@ -0,0 +1,60 @@
+"""
+Benchmarks for the Mind Map App.
+
+Run them from the app directory, e.g. ``python -m benchmarks.tree_build``.
+Benchmarks that need the database run against a throwaway test database
+created with the regular DB_* settings.
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def synthetic_paths(count, fanout=8, max_depth=6, seed=0):
+    """Return count random leaf paths shaped like a real mind map."""
+    rng = random.Random(seed)
+    words = [f'node{i}' for i in range(fanout)]
+    return [
+        '/'.join(
+            rng.choice(words) for _ in range(rng.randint(1, max_depth))
+        )
+        for _ in range(count)
+    ]
+
+
+def best_of(func, repeat=3):
+    """Return the fastest of repeat runs of func, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def setup_django():
+    """Configure Django for a benchmark script."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment(debug=False)
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,174 @@
+"""
+Compare sync views under WSGI with async views under ASGI.
+
+    python -m benchmarks.async_concurrency --clients 500 --duration 10
+
+Starts gunicorn on a throwaway database, once with sync workers serving
+the regular endpoints and once with uvicorn workers serving the async
+ones, and keeps --clients concurrent clients requesting each endpoint.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(application, interface, port, workers, database):
+    """Start gunicorn serving application and wait until it accepts."""
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'app.settings_production',
+        'DJANGO_SECRET_KEY': os.environ.get('DJANGO_SECRET_KEY', 'bench'),
+        'DJANGO_ALLOWED_HOSTS': '127.0.0.1',
+        'DB_NAME': database,
+        'SERVER_INTERFACE': interface,
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_ACCESS_LOG': '/dev/null',
+        'GUNICORN_MAX_REQUESTS': '0',
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         application],
+        cwd=APP_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('The server did not start.')
+
+
+async def fetch(port, request):
+    """Send a request on a new connection and return the status code."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def load(port, path, token, clients, duration):
+    """Return latencies of successful requests and the number of errors."""
+    request = (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: 127.0.0.1\r\n'
+        f'Authorization: Token {token}\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode()
+    timings = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, request)
+            except (OSError, ValueError, IndexError):
+                status = None
+            if status == 200:
+                timings.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return sorted(timings), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--leafs', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    from core.models import Leaf, MindMap
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        token = Token.objects.create(user=user).key
+        mindmap = MindMap.objects.create(user=user, title='Bench')
+        leafs = [
+            Leaf(user=user, mindmap=mindmap, path=path, text='text')
+            for path in synthetic_paths(args.leafs)
+        ]
+        for leaf in leafs:
+            leaf.normalize()
+        Leaf.objects.bulk_create(leafs)
+        database = connection.settings_dict['NAME']
+        connection.close()
+
+        setups = {
+            'sync wsgi': ('app.wsgi:application', 'wsgi', ''),
+            'async asgi': ('app.asgi:application', 'asgi', 'async/'),
+        }
+        endpoints = {
+            'retrieve tree': 'mindmaps/{id}/',
+            'list leafs': 'leafs/?nested=compact',
+        }
+        results = []
+        for setup, (application, interface, prefix) in setups.items():
+            port = free_port()
+            server = start_server(application, interface, port,
+                                  args.workers, database)
+            try:
+                for name, path in endpoints.items():
+                    path = '/api/mindmap/' + prefix + path.format(
+                        id=mindmap.id
+                    )
+                    timings, errors = asyncio.run(load(
+                        port, path, token, args.clients, args.duration,
+                    ))
+                    results.append((setup, name, timings, errors))
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(f'{"server":<11} {"endpoint":<14} {"req/s":>8} {"p50 ms":>8} '
+          f'{"p99 ms":>8} {"errors":>7}')
+    for setup, name, timings, errors in results:
+        if not timings:
+            print(f'{setup:<11} {name:<14} {"-":>8} {"-":>8} {"-":>8} '
+                  f'{errors:>7}')
+            continue
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f'{setup:<11} {name:<14} {len(timings) / args.duration:>8.0f} '
+              f'{p50 * 1000:>8.1f} {p99 * 1000:>8.1f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
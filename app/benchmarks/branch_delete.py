@@ -0,0 +1,74 @@
+"""
+Compare deleting a large branch in one request with deleting each leaf.
+
+    python -m benchmarks.branch_delete --descendants 100000 --each 100
+"""
+import argparse
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--descendants', type=int, default=100000,
+                        help='leafs in the deleted branch')
+    parser.add_argument('--others', type=int, default=10000,
+                        help='leafs outside of the deleted branch')
+    parser.add_argument('--each', type=int, default=100,
+                        help='leafs deleted one request at a time')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.models import Leaf, MindMap
+    from mindmap import snapshots
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        mindmap = MindMap.objects.create(user=user, title='Bench')
+
+        leafs = [
+            Leaf(user=user, mindmap=mindmap, path='big/' + path, text='text')
+            for path in synthetic_paths(args.descendants, seed=1)
+        ] + [
+            Leaf(user=user, mindmap=mindmap, path=path, text='text')
+            for path in synthetic_paths(args.others, seed=2)
+        ]
+        for leaf in leafs:
+            leaf.normalize()
+        Leaf.objects.bulk_create(leafs, batch_size=1000)
+        # Start from a rendered snapshot, as the render worker leaves it.
+        snapshots.render(mindmap.id)
+
+        # Time deletes of leafs outside of the branch, leaving it intact.
+        deleted = Leaf.objects.filter(mindmap=mindmap).exclude(
+            path__startswith='big/'
+        )
+        start = time.perf_counter()
+        for leaf in deleted[:args.each]:
+            client.delete(reverse('mindmap:leaf-detail', args=[leaf.id]))
+        per_leaf = (time.perf_counter() - start) / args.each
+
+        url = reverse('mindmap:mindmap-branch', args=[mindmap.id])
+        start = time.perf_counter()
+        res = client.delete(f'{url}?path=big')
+        branch = time.perf_counter() - start
+        count = res.data['deleted']
+
+    print(f'{"method":<23} {"leafs":>8} {"seconds":>10}')
+    print(f'{"delete each leaf (est)":<23} {count:>8} '
+          f'{per_leaf * count:>10.2f}')
+    print(f'{"single branch delete":<23} {count:>8} {branch:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare moving a large branch in one request with patching each leaf.
+
+    python -m benchmarks.branch_move --descendants 10000 --patch 100
+"""
+import argparse
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--descendants', type=int, default=10000,
+                        help='leafs in the moved branch')
+    parser.add_argument('--others', type=int, default=10000,
+                        help='leafs outside of the moved branch')
+    parser.add_argument('--patch', type=int, default=100,
+                        help='leafs patched one request at a time')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.models import Leaf, MindMap
+    from mindmap import snapshots
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        mindmap = MindMap.objects.create(user=user, title='Bench')
+
+        leafs = [
+            Leaf(user=user, mindmap=mindmap, path='big/' + path, text='text')
+            for path in synthetic_paths(args.descendants, seed=1)
+        ] + [
+            Leaf(user=user, mindmap=mindmap, path=path, text='text')
+            for path in synthetic_paths(args.others, seed=2)
+        ]
+        for leaf in leafs:
+            leaf.normalize()
+        Leaf.objects.bulk_create(leafs, batch_size=1000)
+        # Start from a rendered snapshot, as the render worker leaves it.
+        snapshots.render(mindmap.id)
+
+        # Time patches of leafs outside of the branch, leaving it intact.
+        patched = Leaf.objects.filter(mindmap=mindmap).exclude(
+            path__startswith='big/'
+        )
+        start = time.perf_counter()
+        for leaf in patched[:args.patch]:
+            client.patch(
+                reverse('mindmap:leaf-detail', args=[leaf.id]),
+                {'path': 'patched/' + leaf.path},
+                format='json',
+            )
+        per_leaf = (time.perf_counter() - start) / args.patch
+
+        start = time.perf_counter()
+        res = client.post(
+            reverse('mindmap:mindmap-move', args=[mindmap.id]),
+            {'source': 'big', 'destination': 'moved/here'},
+            format='json',
+        )
+        move = time.perf_counter() - start
+        moved = res.data['moved']
+
+    print(f'{"method":<22} {"leafs":>8} {"seconds":>10}')
+    print(f'{"patch each leaf (est)":<22} {moved:>8} '
+          f'{per_leaf * moved:>10.2f}')
+    print(f'{"single move":<22} {moved:>8} {move:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
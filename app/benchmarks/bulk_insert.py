@@ -0,0 +1,68 @@
+"""
+Compare leafs/sec of the bulk leaf API with one request per leaf.
+
+    python -m benchmarks.bulk_insert --single 2000 --bulk 50000
+"""
+import argparse
+import json
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--single', type=int, default=2000,
+                        help='leafs created one request at a time')
+    parser.add_argument('--bulk', type=int, default=50000,
+                        help='leafs created in a single bulk request')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from core.models import MindMap
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        mindmap = MindMap.objects.create(user=user, title='Bench')
+        bulk_url = reverse('mindmap:mindmap-bulk-leafs', args=[mindmap.id])
+
+        items = [
+            {'path': path, 'text': 'text'}
+            for path in synthetic_paths(max(args.single, args.bulk))
+        ]
+
+        start = time.perf_counter()
+        for item in items[:args.single]:
+            client.post(reverse('mindmap:leaf-list'),
+                        {'mindmap': mindmap.id, **item}, format='json')
+        single = args.single / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        res = client.post(bulk_url, items[:args.bulk], format='json')
+        bulk_json = res.data['created'] / (time.perf_counter() - start)
+
+        body = '\n'.join(json.dumps(item) for item in items[:args.bulk])
+        start = time.perf_counter()
+        res = client.post(bulk_url, body,
+                          content_type='application/x-ndjson')
+        bulk_ndjson = res.data['created'] / (time.perf_counter() - start)
+
+    print(f'{"path":<18} {"leafs/sec":>12}')
+    print(f'{"single create":<18} {single:>12.0f}')
+    print(f'{"bulk json":<18} {bulk_json:>12.0f}')
+    print(f'{"bulk ndjson":<18} {bulk_ndjson:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare request latency with new, persistent and pooled connections.
+
+    DB_HOST=localhost python -m benchmarks.db_connections --requests 500
+
+Run it against the docker-compose Postgres, or any server reached over the
+network, where opening a connection costs the most.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup_django, test_database
+
+MODES = {
+    'new connection': ('core.backends.postgresql', {'CONN_MAX_AGE': 0}),
+    'persistent': ('core.backends.postgresql', {'CONN_MAX_AGE': 60}),
+    'pooled': ('core.backends.postgresql_pool', {'CONN_MAX_AGE': 0}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import close_old_connections, connections
+    from django.db.utils import load_backend
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.backends.postgresql_pool.base import close_pools
+    from core.models import MindMap
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        MindMap.objects.create(user=user, title='Bench')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse('mindmap:mindmap-list') + '?fields=id,title'
+        default = connections['default']
+
+        results = {}
+        for name, (engine, settings) in MODES.items():
+            settings_dict = {
+                **default.settings_dict,
+                'ENGINE': engine,
+                'CONN_HEALTH_CHECKS': True,
+                **settings,
+            }
+            connections['default'] = load_backend(engine).DatabaseWrapper(
+                settings_dict, 'default',
+            )
+            try:
+                client.get(url)
+                timings = []
+                for _ in range(args.requests):
+                    # The test client does not close connections at the
+                    # start and end of requests like the WSGI handler.
+                    start = time.perf_counter()
+                    close_old_connections()
+                    client.get(url)
+                    close_old_connections()
+                    timings.append(time.perf_counter() - start)
+                results[name] = timings
+            finally:
+                connections['default'].close()
+                connections['default'] = default
+                close_pools()
+
+    print(f'{"connections":<16} {"mean ms":>9} {"p50 ms":>9} {"p99 ms":>9}')
+    for name, timings in results.items():
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f'{name:<16} {statistics.mean(timings) * 1000:>9.2f} '
+              f'{statistics.median(timings) * 1000:>9.2f} '
+              f'{p99 * 1000:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
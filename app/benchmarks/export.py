@@ -0,0 +1,83 @@
+"""
+Measure the peak memory and speed of exports as accounts grow.
+
+    python -m benchmarks.export --sizes 10000 100000 1000000 --mindmaps 100
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10000, 100000, 1000000],
+                        help='leafs in the account')
+    parser.add_argument('--mindmaps', type=int, default=100,
+                        help='mindmaps the leafs are spread over')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+
+    from core.models import Leaf, MindMap
+    from mindmap import export
+
+    setups = [
+        ('ndjson', export.FORMAT_NDJSON, None),
+        ('ndjson gzip', export.FORMAT_NDJSON, export.COMPRESSION_GZIP),
+        ('outline', export.FORMAT_OUTLINE, None),
+    ]
+    results = []
+    with test_database():
+        for size in args.sizes:
+            user = get_user_model().objects.create_user(
+                email=f'bench{size}@example.com',
+                password='benchpass123',
+            )
+            mindmaps = [
+                MindMap.objects.create(user=user, title=f'Map {index}')
+                for index in range(args.mindmaps)
+            ]
+            paths = synthetic_paths(size)
+            for start in range(0, size, 10000):
+                leafs = [
+                    Leaf(user=user, mindmap=mindmaps[index % len(mindmaps)],
+                         path=path, text='text')
+                    for index, path in enumerate(
+                        paths[start:start + 10000], start,
+                    )
+                ]
+                for leaf in leafs:
+                    leaf.normalize()
+                Leaf.objects.bulk_create(leafs)
+            del paths
+
+            def run(fmt, compression):
+                return sum(len(chunk) for chunk in export.export(
+                    MindMap.objects.filter(user=user), fmt, compression,
+                ))
+
+            for name, fmt, compression in setups:
+                start = time.perf_counter()
+                total = run(fmt, compression)
+                seconds = time.perf_counter() - start
+                # Tracing allocations slows the export down, so the peak
+                # memory is measured in a second run.
+                tracemalloc.start()
+                run(fmt, compression)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results.append((size, name, total, seconds, peak))
+
+    print(f'{"leafs":>8} {"export":<12} {"MB out":>8} {"seconds":>8} '
+          f'{"peak MB":>8}')
+    for size, name, total, seconds, peak in results:
+        print(f'{size:>8} {name:<12} {total / 1e6:>8.1f} {seconds:>8.2f} '
+              f'{peak / 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
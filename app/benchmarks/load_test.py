@@ -0,0 +1,157 @@
+"""
+Load test the mindmap endpoints of a running server.
+
+    python -m benchmarks.load_test --url http://localhost:8000 \
+        --email test1@example.com --password testpassword123
+
+Creates a user if needed and a mindmap with --leafs leafs, then keeps
+--concurrency clients requesting each endpoint for --duration seconds over
+keep-alive connections, and reports requests per second and latency
+percentiles. Only the standard library is used, so it runs anywhere.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks import synthetic_paths
+
+
+class Client:
+    """Keep-alive HTTP client for one load testing thread."""
+
+    def __init__(self, url, token=None):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(
+            parts.hostname, parts.port or 80, timeout=60,
+        )
+        self.headers = {'Accept': '*/*'}
+        if token:
+            self.headers['Authorization'] = f'Token {token}'
+
+    def request(self, method, path, body=None):
+        """Send a request and return its status and parsed body."""
+        headers = dict(self.headers)
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.getheader('Content-Type', '').startswith(
+                'application/json'):
+            data = json.loads(data)
+        return response.status, data
+
+
+def percentile(timings, fraction):
+    """Return the fraction percentile of sorted timings."""
+    index = min(len(timings) - 1, int(len(timings) * fraction))
+    return timings[index]
+
+
+def set_up(url, email, password, leafs):
+    """Return a token and the id of a mindmap holding leafs leafs."""
+    client = Client(url)
+    client.request('POST', '/api/user/create/', {
+        'email': email,
+        'password': password,
+        'name': 'Load Test',
+    })
+    status, data = client.request('POST', '/api/user/token/', {
+        'email': email,
+        'password': password,
+    })
+    if status != 200:
+        raise SystemExit(f'Could not authenticate: {data}')
+    token = data['token']
+
+    client = Client(url, token)
+    status, data = client.request('POST', '/api/mindmap/mindmaps/', {
+        'title': 'Load Test',
+    })
+    mindmap_id = data['id']
+    client.request(
+        'POST',
+        f'/api/mindmap/mindmaps/{mindmap_id}/leafs/bulk/',
+        [{'path': path, 'text': 'text'} for path in synthetic_paths(leafs)],
+    )
+    return token, mindmap_id
+
+
+def run(url, token, path, concurrency, duration):
+    """Request path from concurrency threads for duration seconds.
+
+    Returns the sorted latencies of successful requests and the number of
+    failed ones.
+    """
+    timings = []
+    errors = []
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        client = Client(url, token)
+        local_timings = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status, _ = client.request('GET', path)
+            except (OSError, http.client.HTTPException):
+                client = Client(url, token)
+                status = None
+            if status == 200:
+                local_timings.append(time.perf_counter() - start)
+            else:
+                local_errors += 1
+        timings.extend(local_timings)
+        errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(timings), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', default='loadtest@example.com')
+    parser.add_argument('--password', default='loadtestpass123')
+    parser.add_argument('--leafs', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    token, mindmap_id = set_up(args.url, args.email, args.password,
+                               args.leafs)
+    endpoints = {
+        'list mindmaps': '/api/mindmap/mindmaps/?fields=id,title',
+        'retrieve tree': f'/api/mindmap/mindmaps/{mindmap_id}/',
+        'subtree': f'/api/mindmap/mindmaps/{mindmap_id}/subtree/'
+                   '?path=node0&depth=2',
+        'list leafs': '/api/mindmap/leafs/?nested=compact',
+    }
+
+    print(f'{"endpoint":<15} {"req/s":>9} {"p50 ms":>8} {"p90 ms":>8} '
+          f'{"p99 ms":>8} {"errors":>7}')
+    for name, path in endpoints.items():
+        timings, errors = run(args.url, token, path, args.concurrency,
+                              args.duration)
+        if not timings:
+            print(f'{name:<15} {"-":>9} {"-":>8} {"-":>8} {"-":>8} '
+                  f'{errors:>7}')
+            continue
+        print(f'{name:<15} {len(timings) / args.duration:>9.0f} '
+              f'{percentile(timings, 0.50) * 1000:>8.1f} '
+              f'{percentile(timings, 0.90) * 1000:>8.1f} '
+              f'{percentile(timings, 0.99) * 1000:>8.1f} '
+              f'{errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
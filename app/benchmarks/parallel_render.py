@@ -0,0 +1,67 @@
+"""
+Measure how rendering many mindmaps scales with worker processes.
+
+    python -m benchmarks.parallel_render --mindmaps 10000 --leafs 200
+
+Leafs are packed in memory, so only the transfer to the workers and the
+rendering are measured, not the database.
+"""
+import argparse
+import pickle
+import timeit
+
+from benchmarks import best_of, synthetic_paths
+from mindmap import parallel
+
+
+def transfer_time(obj, number=1000):
+    """Return the seconds to pickle and unpickle obj, as sent to a worker."""
+    return timeit.timeit(
+        lambda: pickle.loads(pickle.dumps(obj)), number=number,
+    ) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mindmaps', type=int, default=10000)
+    parser.add_argument('--leafs', type=int, default=200,
+                        help='leafs per mindmap')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help='pool sizes, 1 to the number of cores by '
+                             'default')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cores = parallel.default_workers()
+    workers = args.workers or sorted(
+        {1, *(2 ** power for power in range(1, cores.bit_length())), cores}
+    )
+    packs = []
+    for index in range(args.mindmaps):
+        paths = synthetic_paths(args.leafs, seed=index)
+        packs.append(parallel.pack(f'Map {index}', [
+            (path, f'text {number}') for number, path in enumerate(paths)
+        ]))
+
+    leafs = list(parallel.unpack(packs[0])[1])
+    packed = transfer_time(packs[0])
+    tuples = transfer_time(('Map 0', leafs))
+    print(f'{cores} cores. Sending a mindmap to a worker takes '
+          f'{packed * 1e6:.1f} us packed, {tuples * 1e6:.1f} us as tuples.')
+
+    print(f'{"workers":>8} {"seconds":>8} {"speedup":>8} {"efficiency":>11}')
+    baseline = None
+    for count in workers:
+        seconds = best_of(
+            lambda: sum(1 for _ in parallel.render_packs(packs,
+                                                         workers=count)),
+            args.repeat,
+        )
+        baseline = baseline or seconds
+        speedup = baseline / seconds
+        print(f'{count:>8} {seconds:>8.2f} {speedup:>7.2f}x '
+              f'{speedup / count:>10.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare an editing session sent as one patch with one request per edit.
+
+    python -m benchmarks.patch_session --edits 200 --leafs 10000
+"""
+import argparse
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--edits', type=int, default=200,
+                        help='leafs added, then edited, in the session')
+    parser.add_argument('--leafs', type=int, default=10000,
+                        help='leafs already in the mindmap')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.models import Leaf, MindMap
+    from mindmap import snapshots
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def create_mindmap(title):
+            mindmap = MindMap.objects.create(user=user, title=title)
+            leafs = [
+                Leaf(user=user, mindmap=mindmap, path=path, text='text')
+                for path in synthetic_paths(args.leafs)
+            ]
+            for leaf in leafs:
+                leaf.normalize()
+            Leaf.objects.bulk_create(leafs, batch_size=1000)
+            # Start from a rendered snapshot, as the render worker leaves it.
+            snapshots.render(mindmap.id)
+            return mindmap
+
+        paths = [f'session/{index}' for index in range(args.edits)]
+
+        mindmap = create_mindmap('Requests')
+        start = time.perf_counter()
+        for path in paths:
+            res = client.post(reverse('mindmap:leaf-list'), {
+                'mindmap': mindmap.id,
+                'path': path,
+                'text': 'draft',
+            }, format='json')
+            client.patch(
+                reverse('mindmap:leaf-detail', args=[res.data['id']]),
+                {'text': 'final'},
+                format='json',
+            )
+        per_request = time.perf_counter() - start
+
+        mindmap = create_mindmap('Patch')
+        operations = [
+            {'op': 'add', 'path': path, 'text': 'draft'} for path in paths
+        ] + [
+            {'op': 'edit', 'path': path, 'text': 'final'} for path in paths
+        ]
+        start = time.perf_counter()
+        client.post(reverse('mindmap:mindmap-patch', args=[mindmap.id]), {
+            'base_version': mindmap.version,
+            'operations': operations,
+        }, format='json')
+        patch = time.perf_counter() - start
+
+    print(f'{"method":<20} {"requests":>9} {"seconds":>9}')
+    print(f'{"request per edit":<20} {args.edits * 2:>9} '
+          f'{per_request:>9.2f}')
+    print(f'{"single patch":<20} {1:>9} {patch:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Time leaf searches on a large account.
+
+    python -m benchmarks.search --leafs 1000000 --repeat 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import setup_django, synthetic_paths, test_database
+
+QUERIES = {
+    'rare word': 'word4321',
+    'common word': 'word7',
+    'two words': 'word12 word345',
+    'path prefix': 'node3 word99',
+}
+
+
+def synthetic_texts(count, vocabulary=10000, words=4, seed=0):
+    """Return count texts of words drawn from a Zipf-like vocabulary."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return [
+        ' '.join(
+            f'word{index}'
+            for index in rng.choices(range(vocabulary), weights, k=words)
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--leafs', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.models import Leaf, MindMap
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='benchpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        mindmap = MindMap.objects.create(user=user, title='Bench')
+
+        paths = synthetic_paths(args.leafs)
+        texts = synthetic_texts(args.leafs)
+        for start in range(0, args.leafs, 10000):
+            leafs = [
+                Leaf(user=user, mindmap=mindmap, path=path, text=text)
+                for path, text in zip(paths[start:start + 10000],
+                                      texts[start:start + 10000])
+            ]
+            for leaf in leafs:
+                leaf.normalize()
+            Leaf.objects.bulk_create(leafs)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_leaf')
+
+        url = reverse('mindmap:leaf-search')
+        results = []
+        for name, query in QUERIES.items():
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                res = client.get(url, {'q': query})
+                timings.append(time.perf_counter() - start)
+            matches = Leaf.objects.filter(user=user).search(query).count()
+            results.append((name, matches, timings, len(res.data['results'])))
+
+    print(f'{"query":<12} {"matches":>8} {"page":>5} {"p50 ms":>8} '
+          f'{"max ms":>8}')
+    for name, matches, timings, page in results:
+        print(f'{name:<12} {matches:>8} {page:>5} '
+              f'{statistics.median(timings) * 1000:>8.1f} '
+              f'{max(timings) * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare the trie builder against the original nested-loop builder.
+
+    python -m benchmarks.tree_build --sizes 1000 10000 100000
+"""
+import argparse
+
+from benchmarks import best_of, synthetic_paths
+from mindmap.tree import Tree
+
+
+class LegacyNode(object):
+    """Node as it was defined in mindmap/views.py before the trie."""
+
+    def __init__(self, data):
+        self.data = data
+        self.children = []
+
+    def add_child(self, obj):
+        self.children.append(obj)
+
+
+def legacy_build(title, paths):
+    """Tree creation loop formerly used by MindMapViewSet.retrieve."""
+    root = LegacyNode(data=title)
+    node = root
+    for path in paths:
+        subpaths = path.split(sep='/')
+        for index, value, in enumerate(subpaths):
+            for i in range(index):
+                for j in node.children:
+                    if j.data == subpaths[i]:
+                        node = j
+
+            exists_flag = False
+            for child_node in node.children:
+                if child_node.data == value:
+                    exists_flag = True
+                    break
+            if exists_flag:
+                if index == len(subpaths) - 1:
+                    node = root
+            else:
+                node.add_child(LegacyNode(data=value))
+                node = root
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"leafs":>8} {"legacy (s)":>12} {"trie (s)":>12} {"speedup":>9}')
+    for size in args.sizes:
+        paths = synthetic_paths(size, fanout=args.fanout)
+        legacy = best_of(lambda: legacy_build('Map', paths), args.repeat)
+        trie = best_of(lambda: Tree.from_paths('Map', paths), args.repeat)
+        print(f'{size:>8} {legacy:>12.4f} {trie:>12.4f} '
+              f'{legacy / trie:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
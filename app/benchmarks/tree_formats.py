@@ -0,0 +1,38 @@
+"""
+Compare the time and payload size of each tree rendering format.
+
+    python -m benchmarks.tree_formats --sizes 1000 10000 100000
+"""
+import argparse
+
+from benchmarks import best_of, synthetic_paths
+from mindmap import render
+from mindmap.tree import Tree
+
+FORMATS = {
+    'text': render.pretty_print,
+    'nested': lambda root: render.to_json(root, render.FORMAT_NESTED),
+    'flat': lambda root: render.to_json(root, render.FORMAT_FLAT),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"leafs":>8} {"format":>8} {"render (s)":>12} {"bytes":>12}')
+    for size in args.sizes:
+        paths = synthetic_paths(size, fanout=args.fanout)
+        tree = Tree.from_leafs('Map', ((path, 'text') for path in paths))
+        for name, func in FORMATS.items():
+            seconds = best_of(lambda: func(tree.root), args.repeat)
+            payload = len(func(tree.root).encode())
+            print(f'{size:>8} {name:>8} {seconds:>12.4f} {payload:>12}')
+
+
+if __name__ == '__main__':
+    main()
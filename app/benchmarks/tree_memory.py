@@ -0,0 +1,94 @@
+"""
+Compare the memory held by the node graphs and the compact tree.
+
+    python -m benchmarks.tree_memory --sizes 100000 1000000
+
+Leafs get distinct texts like real ones. The legacy graph is converted
+from the trie, building it directly is quadratic.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks import synthetic_paths
+from benchmarks.tree_build import LegacyNode
+from mindmap.compact import CompactTree
+from mindmap.render import pretty_print
+from mindmap.tree import Tree
+
+
+def legacy_from_trie(tree):
+    """Return the legacy Node graph of the same tree as a trie."""
+    root = LegacyNode(data=tree.root.segment)
+    stack = [(tree.root, root)]
+    while stack:
+        node, legacy = stack.pop()
+        for child in node.sorted_children():
+            legacy_child = LegacyNode(data=child.segment)
+            legacy_child.text = child.text
+            legacy.add_child(legacy_child)
+            stack.append((child, legacy_child))
+    return root
+
+
+def legacy_build(leafs):
+    """Build the legacy Node graph of leafs."""
+    return legacy_from_trie(Tree.from_leafs('Map', leafs))
+
+
+def retained(build, leafs):
+    """Return the bytes held by the result of build, and the result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(leafs)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 1000000])
+    parser.add_argument('--fanout', type=int, default=32)
+    parser.add_argument('--max-depth', type=int, default=6)
+    args = parser.parse_args()
+
+    print(f'{"leafs":>8} {"nodes":>8} {"tree":<8} {"MB":>8} '
+          f'{"B/node":>7} {"build (s)":>10} {"print (s)":>10}')
+    for size in args.sizes:
+        leafs = [
+            (path, f'text {index}') for index, path in enumerate(
+                synthetic_paths(size, fanout=args.fanout,
+                                max_depth=args.max_depth),
+            )
+        ]
+        setups = [
+            ('legacy', legacy_build, None),
+            ('trie', lambda leafs: Tree.from_leafs('Map', leafs),
+             lambda tree: pretty_print(tree.root)),
+            ('compact', lambda leafs: CompactTree.from_leafs('Map', leafs),
+             CompactTree.pretty_print),
+        ]
+        nodes = len(CompactTree.from_leafs('Map', leafs))
+        for name, build, render in setups:
+            size_bytes, tree = retained(build, leafs)
+            del tree
+            gc.collect()
+            start = time.perf_counter()
+            tree = build(leafs)
+            built = time.perf_counter() - start
+            printed = ''
+            if render is not None:
+                start = time.perf_counter()
+                render(tree)
+                printed = f'{time.perf_counter() - start:>10.2f}'
+            del tree
+            print(f'{size:>8} {nodes:>8} {name:<8} {size_bytes / 1e6:>8.1f} '
+                  f'{size_bytes / nodes:>7.0f} {built:>10.2f} {printed:>10}')
+
+
+if __name__ == '__main__':
+    main()
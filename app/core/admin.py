@@ -43,6 +43,20 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class LeafAdmin(admin.ModelAdmin):
+    """Define the admin pages for leafs."""
+
+    def delete_queryset(self, request, queryset):
+        """Delete the selected leafs one by one.
+
+        Deleting a queryset sends no leaf_deleted signal, which bumps the
+        versions of their mindmaps.
+        """
+        for leaf in queryset:
+            leaf.delete()
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.MindMap)
-admin.site.register(models.Leaf)
+admin.site.register(models.Leaf, LeafAdmin)
+admin.site.register(models.RenderJob)
@@ -0,0 +1,46 @@
+"""
+PostgreSQL backend with health checks of persistent connections.
+
+Backport of the CONN_HEALTH_CHECKS database setting of Django 4.1. With
+CONN_MAX_AGE, a connection reused by a new request may have been closed by
+the server in between. When health checks are enabled, the first query of
+each request on a reused connection is preceded by a check, and a dead
+connection is replaced instead of failing the request.
+"""
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper checking reused connections."""
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        self.health_check_enabled = settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_health_check_failed(self):
+        """Close the connection if it is reused and no longer works."""
+        if (self.connection is None
+                or not self.health_check_enabled
+                or self.health_check_done):
+            return
+
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Called at the start and end of each request.
+        if self.connection is not None:
+            self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,159 @@
+"""
+PostgreSQL backend drawing connections from a pool.
+
+Closing a connection returns it to a psycopg2 connection pool of its
+process instead of closing it, so requests skip connection setup even with
+CONN_MAX_AGE = 0. The POOL database setting configures the pool:
+
+    'POOL': {
+        # Connections opened by each process when its pool is created.
+        'MIN_SIZE': 1,
+        # Connections a process may have open at once, and keep open.
+        'MAX_SIZE': 10,
+        # Seconds to wait for a connection when all of them are in use.
+        'TIMEOUT': 10,
+    }
+
+Pools are created lazily and per process, so workers forked from a
+preloaded master never share connections. Once MAX_SIZE connections are
+checked out, threads asking for another one wait for a connection to be
+returned, and fail with PoolError after TIMEOUT seconds. Connections
+returned to the pool stay open, up to MAX_SIZE of them.
+"""
+import functools
+import os
+import threading
+
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as BaseDatabaseCreation,
+)
+from psycopg2.pool import (
+    PoolError,
+    ThreadedConnectionPool,
+)
+
+from core.backends.postgresql import base
+
+DEFAULT_POOL = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """Thread safe pool of connections opened by a connect function."""
+
+    def __init__(self, minconn, maxconn, connect, timeout=None):
+        self._connect_new = connect
+        self.timeout = timeout
+        # Counts the connections left to check out. psycopg2 raises as soon
+        # as the pool is exhausted, this makes getconn() wait instead.
+        self._available = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn)
+
+    def getconn(self, key=None):
+        """Check out a connection, waiting up to timeout for a free one."""
+        if not self._available.acquire(timeout=self.timeout):
+            raise PoolError(
+                f'No connection was returned to the pool within '
+                f'{self.timeout} seconds.'
+            )
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._available.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        """Return a connection to the pool."""
+        super().putconn(conn, key, close)
+        self._available.release()
+
+    def _putconn(self, conn, key=None, close=False):
+        # psycopg2 closes connections returned beyond minconn, so a busy
+        # process would reconnect for most requests. Keep them up to
+        # maxconn instead. Called with the lock of the pool held.
+        minconn, self.minconn = self.minconn, self.maxconn
+        try:
+            super()._putconn(conn, key, close)
+        finally:
+            self.minconn = minconn
+
+    def _connect(self, key=None):
+        connection = self._connect_new()
+        if key is not None:
+            self._used[key] = connection
+            self._rused[id(connection)] = key
+        else:
+            self._pool.append(connection)
+        return connection
+
+
+def get_pool(conn_params, options, connect):
+    """Return the pool of this process for the connection parameters."""
+    key = (os.getpid(), repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            options = {**DEFAULT_POOL, **options}
+            pool = _pools[key] = ConnectionPool(
+                options['MIN_SIZE'], options['MAX_SIZE'], connect,
+                options['TIMEOUT'],
+            )
+        return pool
+
+
+def close_pools():
+    """Close every connection pooled by this process."""
+    pid = os.getpid()
+    with _pools_lock:
+        for key in [key for key in _pools if key[0] == pid]:
+            pool = _pools.pop(key)
+            if not pool.closed:
+                pool.closeall()
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    """Database creation closing pooled connections before dropping."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper using pooled connections."""
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def connect(self):
+        super().connect()
+        # Connections from the pool may have died while they were idle.
+        self.health_check_done = False
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            conn_params,
+            self.settings_dict.get('POOL', {}),
+            functools.partial(super().get_new_connection, conn_params),
+        )
+        connection = self.pool.getconn()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                if self.pool.closed:
+                    self.connection.close()
+                else:
+                    self.pool.putconn(self.connection)
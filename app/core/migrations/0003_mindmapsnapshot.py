@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_auto_20220520_1445'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MindMapSnapshot',
+            fields=[
+                ('mindmap', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='core.mindmap')),
+                ('tree', models.JSONField()),
+                ('text', models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the leafs table for writes.
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_mindmapsnapshot'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='leaf',
+            index=models.Index(fields=['user', '-path', '-id'], name='leaf_user_path_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leaf',
+            index=models.Index(fields=['mindmap', 'path'], name='leaf_mindmap_path_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leaf',
+            index=models.Index(fields=['mindmap', 'path'], name='leaf_mindmap_path_like_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
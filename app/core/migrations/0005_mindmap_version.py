@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_leaf_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mindmap',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_mindmap_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaf',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='leaf',
+            index=models.Index(fields=['mindmap', 'depth'], name='leaf_mindmap_depth_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def populate_depth(apps, schema_editor):
+    """Normalize the paths of existing leafs and store their depth."""
+    Leaf = apps.get_model('core', 'Leaf')
+    batch = []
+    leafs = Leaf.objects.only('id', 'path').order_by('id')
+    for leaf in leafs.iterator(chunk_size=BATCH_SIZE):
+        segments = [segment for segment in leaf.path.split('/') if segment]
+        leaf.path = '/'.join(segments)
+        leaf.depth = len(segments)
+        batch.append(leaf)
+        if len(batch) >= BATCH_SIZE:
+            Leaf.objects.bulk_update(batch, ['path', 'depth'])
+            batch = []
+    Leaf.objects.bulk_update(batch, ['path', 'depth'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_leaf_depth'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_depth, migrations.RunPython.noop),
+    ]
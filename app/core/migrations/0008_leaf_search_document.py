@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:16
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Path segments are weighted above the text, and words are only lowercased
+# since mindmaps are written in any language. Matches core.models.
+CREATE_TRIGGER = """
+CREATE FUNCTION core_leaf_search_document() RETURNS trigger AS $$
+BEGIN
+    NEW.search_document :=
+        setweight(to_tsvector('simple', replace(NEW.path, '/', ' ')), 'A')
+        || setweight(to_tsvector('simple', NEW.text), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_leaf_search_document
+    BEFORE INSERT OR UPDATE OF path, text ON core_leaf
+    FOR EACH ROW EXECUTE FUNCTION core_leaf_search_document();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER core_leaf_search_document ON core_leaf;
+DROP FUNCTION core_leaf_search_document();
+"""
+
+# Fires the trigger for the existing leafs.
+POPULATE = 'UPDATE core_leaf SET path = path'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_populate_leaf_depth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaf',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(POPULATE, migrations.RunSQL.noop),
+    ]
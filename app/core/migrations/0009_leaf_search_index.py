@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:16
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking the leafs table for writes.
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_leaf_search_document'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='leaf',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='leaf_search_idx'),
+        ),
+    ]
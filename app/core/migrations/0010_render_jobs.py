@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_leaf_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('mindmap', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='render_job', serialize=False, to='core.mindmap')),
+                ('version', models.PositiveBigIntegerField()),
+                ('requested_at', models.DateTimeField()),
+                ('run_after', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mindmapsnapshot',
+            name='flat',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='mindmapsnapshot',
+            name='nested',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='mindmapsnapshot',
+            name='rendered_version',
+            field=models.PositiveBigIntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='renderjob',
+            index=models.Index(fields=['run_after'], name='render_job_run_after_idx'),
+        ),
+    ]
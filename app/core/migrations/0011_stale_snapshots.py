@@ -0,0 +1,64 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def drop_stale_snapshots(apps, schema_editor):
+    """Drop snapshots not rendered from the current version of their mindmap.
+
+    Their text was patched by writes, but is no longer served once the
+    snapshot is stale. Every mindmap without a current snapshot is queued
+    for the render worker instead.
+    """
+    MindMap = apps.get_model('core', 'MindMap')
+    MindMapSnapshot = apps.get_model('core', 'MindMapSnapshot')
+    RenderJob = apps.get_model('core', 'RenderJob')
+    MindMapSnapshot.objects.exclude(
+        rendered_version=F('mindmap__version'),
+    ).delete()
+    now = timezone.now()
+    RenderJob.objects.bulk_create(
+        (
+            RenderJob(
+                mindmap_id=mindmap_id,
+                version=version,
+                requested_at=now,
+                run_after=now,
+            )
+            for mindmap_id, version in MindMap.objects.filter(
+                snapshot__isnull=True,
+                render_job__isnull=True,
+            ).values_list('id', 'version').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_render_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_stale_snapshots, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='mindmapsnapshot',
+            name='tree',
+        ),
+        migrations.AlterField(
+            model_name='mindmapsnapshot',
+            name='flat',
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name='mindmapsnapshot',
+            name='nested',
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name='mindmapsnapshot',
+            name='rendered_version',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
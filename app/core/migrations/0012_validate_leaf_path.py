@@ -0,0 +1,20 @@
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_stale_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leaf',
+            name='path',
+            field=models.CharField(
+                max_length=255,
+                validators=[core.models.validate_path],
+            ),
+        ),
+    ]
@@ -1,8 +1,18 @@
 """
 Database Models
 """
+import re
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
 from django.db import models
+from django.dispatch import Signal
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -10,6 +20,53 @@ from django.contrib.auth.models import (
 )
 
 
+PATH_SEPARATOR = '/'
+# Text search configuration of leafs, as used by the trigger writing their
+# search document. Mindmaps are written in any language, so words are only
+# lowercased, without stemming or stop words.
+SEARCH_CONFIG = 'simple'
+
+# Sent by Leaf.delete() once a leaf is deleted, with the instance and its
+# former leaf_id. Deletes of querysets, e.g. of branches, and of the leafs
+# of deleted mindmaps do not send it.
+leaf_deleted = Signal()
+
+
+def normalize_path(path):
+    """Return a leaf path without empty segments."""
+    return PATH_SEPARATOR.join(
+        segment for segment in path.split(PATH_SEPARATOR) if segment
+    )
+
+
+def validate_path(path):
+    """Reject leaf paths without a segment, such as '///'."""
+    if not normalize_path(path):
+        raise ValidationError(
+            'Paths must have at least one segment.',
+            code='empty_path',
+        )
+
+
+def path_depth(path):
+    """Return the number of segments of a normalized leaf path."""
+    return path.count(PATH_SEPARATOR) + 1 if path else 0
+
+
+def path_ancestors(path):
+    """Return the proper prefixes of a normalized leaf path."""
+    segments = path.split(PATH_SEPARATOR)
+    return [
+        PATH_SEPARATOR.join(segments[:index])
+        for index in range(1, len(segments))
+    ]
+
+
+def search_terms(query):
+    """Return the lowercased words of a search query."""
+    return re.findall(r'\w+', query.lower())
+
+
 class UserManager(BaseUserManager):
     """Manager for users."""
 
@@ -52,13 +109,86 @@ class MindMap(models.Model):
         on_delete=models.CASCADE,
     )
     title = models.CharField(max_length=255)
+    # Incremented whenever the rendered tree of the mindmap changes.
+    version = models.PositiveBigIntegerField(default=1, editable=False)
+
+    def save(self, *args, **kwargs):
+        """Save the mindmap, leaving its version to the leaf writers."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'version'
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 
+class LeafQuerySet(models.QuerySet):
+    """Tree queries over the materialized paths of leafs."""
+
+    def subtree(self, path):
+        """Return the leafs at or below a normalized path."""
+        if not path:
+            return self.all()
+        return self.filter(
+            models.Q(path=path)
+            | models.Q(path__startswith=path + PATH_SEPARATOR)
+        )
+
+    def descendants(self, path):
+        """Return the leafs strictly below a normalized path."""
+        if not path:
+            return self.filter(depth__gt=0)
+        return self.filter(path__startswith=path + PATH_SEPARATOR)
+
+    def ancestors(self, path):
+        """Return the leafs whose path is a proper prefix of path."""
+        return self.filter(path__in=path_ancestors(path))
+
+    def at_depth(self, depth):
+        """Return the leafs whose path has depth segments."""
+        return self.filter(depth=depth)
+
+    def search(self, query):
+        """Return the leafs matching every word of query, best first.
+
+        Words match the start of path segments and of words of the text,
+        using the search index, and matches in the path rank higher.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return self.none()
+
+        # Words are alphanumeric, so they are safe to use as raw prefix
+        # queries.
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIG,
+            search_type='raw',
+        )
+        return self.filter(
+            search_document=search_query,
+        ).annotate(
+            rank=SearchRank(models.F('search_document'), search_query),
+        ).order_by('-rank', 'id')
+
+
+class LeafManager(models.Manager):
+    """Manager leaving out the search document unless it is asked for."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_document')
+
+
 class Leaf(models.Model):
-    """Leaf Object"""
+    """Leaf Object
+
+    Paths are stored normalized, as a materialized path of the leaf in its
+    mindmap, along with their depth. A subtree is a prefix range of the
+    (mindmap, path) index, so it can be read or moved with a single query.
+    """
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -69,8 +199,136 @@ class Leaf(models.Model):
         on_delete=models.CASCADE,
         null=True,
     )
-    path = models.CharField(max_length=255)
+    path = models.CharField(max_length=255, validators=[validate_path])
     text = models.CharField(max_length=255)
+    # Number of segments of path, kept in sync by normalize().
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Words of the path segments and text, written by a database trigger
+    # whenever the path or text change, including in bulk updates.
+    search_document = SearchVectorField(null=True, editable=False)
+
+    objects = LeafManager.from_queryset(LeafQuerySet)()
+
+    # (mindmap id, path) of the leaf as stored, while it is loaded with
+    # both, so that changes to them can be told apart when it is saved.
+    saved_location = None
+
+    class Meta:
+        indexes = [
+            # Leafs of a user, listed by descending path.
+            models.Index(
+                fields=['user', '-path', '-id'],
+                name='leaf_user_path_idx',
+            ),
+            # Leafs of a mindmap in path order, for building trees.
+            models.Index(
+                fields=['mindmap', 'path'],
+                name='leaf_mindmap_path_idx',
+            ),
+            # Prefix (LIKE 'a/b/%') lookups of the subtrees of a mindmap,
+            # which the index above cannot serve outside the C collation.
+            models.Index(
+                fields=['mindmap', 'path'],
+                name='leaf_mindmap_path_like_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+            # Leafs of a mindmap at a given depth.
+            models.Index(
+                fields=['mindmap', 'depth'],
+                name='leaf_mindmap_depth_idx',
+            ),
+            # Full-text search over path segments and text.
+            GinIndex(fields=['search_document'], name='leaf_search_idx'),
+        ]
+
+    def normalize(self):
+        """Normalize the path of the leaf and update its depth.
+
+        Called by save(), and needed before bulk_create().
+        """
+        self.path = normalize_path(self.path)
+        self.depth = path_depth(self.path)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        leaf = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if 'mindmap_id' in loaded and 'path' in loaded:
+            leaf.saved_location = (loaded['mindmap_id'], loaded['path'])
+        return leaf
+
+    def save(self, *args, **kwargs):
+        """Save the leaf with a normalized path."""
+        self.normalize()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'path' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'depth'}
+        super().save(*args, **kwargs)
+        self.saved_location = (self.mindmap_id, self.path)
+
+    def delete(self, *args, **kwargs):
+        """Delete the leaf and send leaf_deleted.
+
+        No delete signal receivers are connected for leafs, so that the
+        leafs of branches and mindmaps are deleted with a single query.
+        """
+        leaf_id = self.pk
+        deleted = super().delete(*args, **kwargs)
+        leaf_deleted.send(sender=Leaf, instance=self, leaf_id=leaf_id)
+        return deleted
 
     def __str__(self):
         return self.path
+
+
+class MindMapSnapshot(models.Model):
+    """Rendered tree of a MindMap.
+
+    The renderings are written by the render worker, along with the
+    version of the mindmap they were rendered from, and are only valid
+    while the mindmap is still at that version.
+    """
+    mindmap = models.OneToOneField(
+        settings.MINDMAP_MODEL,
+        related_name='snapshot',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    text = models.TextField()
+    nested = models.TextField()
+    flat = models.TextField()
+    rendered_version = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return str(self.mindmap)
+
+
+class RenderJob(models.Model):
+    """Request to pre-render a MindMap, consumed by the render worker.
+
+    A mindmap has at most one job. Writes while it is queued push it back
+    to run_after, so bursts of writes are rendered once, but no further
+    than a maximum delay after requested_at.
+    """
+    mindmap = models.OneToOneField(
+        settings.MINDMAP_MODEL,
+        related_name='render_job',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    # Latest version of the mindmap to render.
+    version = models.PositiveBigIntegerField()
+    requested_at = models.DateTimeField()
+    run_after = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Jobs due to run, oldest first.
+            models.Index(
+                fields=['run_after'],
+                name='render_job_run_after_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.mindmap_id} v{self.version}'
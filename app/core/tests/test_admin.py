@@ -6,6 +6,11 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django admin."""
@@ -45,3 +50,46 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_edit_leaf_bumps_version(self):
+        """Test that leafs edited in the admin change the mindmap version."""
+        mindmap = MindMap.objects.create(user=self.user, title='Map')
+        leaf = Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                   path='i/like', text='turtles')
+        mindmap.refresh_from_db()
+        url = reverse('admin:core_leaf_change', args=[leaf.id])
+
+        res = self.client.post(url, {
+            'user': self.user.id,
+            'mindmap': mindmap.id,
+            'path': 'i/love',
+            'text': 'turtles',
+        })
+
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(
+            MindMap.objects.get(id=mindmap.id).version,
+            mindmap.version + 1,
+        )
+
+    def test_delete_selected_leafs_bumps_version(self):
+        """Test that the delete action changes the mindmap version."""
+        mindmap = MindMap.objects.create(user=self.user, title='Map')
+        leafs = [
+            Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                path=path, text='text')
+            for path in ['i', 'you']
+        ]
+        mindmap.refresh_from_db()
+
+        self.client.post(reverse('admin:core_leaf_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [leaf.id for leaf in leafs],
+            'post': 'yes',
+        })
+
+        self.assertFalse(Leaf.objects.exists())
+        self.assertEqual(
+            MindMap.objects.get(id=mindmap.id).version,
+            mindmap.version + 2,
+        )
@@ -0,0 +1,184 @@
+"""
+Tests for the PostgreSQL backends.
+"""
+import threading
+from unittest.mock import patch
+
+from django.db import connections
+from django.db.utils import (
+    Error,
+    load_backend,
+)
+from django.test import TestCase
+
+
+def create_wrapper(engine, **settings):
+    """Return a new connection to the test database with a backend."""
+    settings_dict = {
+        **connections['default'].settings_dict,
+        'ENGINE': engine,
+        'CONN_MAX_AGE': None,
+        'CONN_HEALTH_CHECKS': True,
+        **settings,
+    }
+    return load_backend(engine).DatabaseWrapper(settings_dict, 'backend')
+
+
+def backend_pid(wrapper):
+    """Return the id of the server process of a connection."""
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+class HealthCheckTests(TestCase):
+    """Test health checks of persistent connections."""
+
+    def setUp(self):
+        self.wrapper = create_wrapper('core.backends.postgresql')
+        self.addCleanup(self.wrapper.close)
+
+    def test_unusable_connection_replaced(self):
+        """Test that a dead connection is replaced on the next request."""
+        backend_pid(self.wrapper)
+        old_connection = self.wrapper.connection
+        self.wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(self.wrapper, 'is_usable', return_value=False):
+            backend_pid(self.wrapper)
+
+        self.assertIsNot(self.wrapper.connection, old_connection)
+        self.assertTrue(old_connection.closed)
+
+    def test_checked_once_per_request(self):
+        """Test that only the first query of a request is checked."""
+        backend_pid(self.wrapper)
+        self.wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(self.wrapper, 'is_usable',
+                          return_value=True) as patched:
+            backend_pid(self.wrapper)
+            backend_pid(self.wrapper)
+
+        patched.assert_called_once_with()
+
+    def test_new_connections_not_checked(self):
+        """Test that fresh connections are used without a check."""
+        with patch.object(self.wrapper, 'is_usable') as patched:
+            backend_pid(self.wrapper)
+
+        patched.assert_not_called()
+
+
+class PooledBackendTests(TestCase):
+    """Test the pooled PostgreSQL backend."""
+
+    def setUp(self):
+        self.wrapper = create_wrapper(
+            'core.backends.postgresql_pool',
+            CONN_MAX_AGE=0,
+            # Keep the connections of the tests in a pool of their own.
+            OPTIONS={'application_name': 'pool-tests'},
+        )
+        backend_pid(self.wrapper)
+        self.addCleanup(self.wrapper.pool.closeall)
+        self.addCleanup(self.wrapper.close)
+
+    def test_closed_connections_are_reused(self):
+        """Test that closing returns the connection to the pool."""
+        pid = backend_pid(self.wrapper)
+        self.wrapper.close()
+
+        self.assertEqual(backend_pid(self.wrapper), pid)
+
+    def test_pool_shared_by_wrappers(self):
+        """Test that connections of a thread are reused by another."""
+        pid = backend_pid(self.wrapper)
+        self.wrapper.close()
+        other = create_wrapper(
+            'core.backends.postgresql_pool',
+            OPTIONS={'application_name': 'pool-tests'},
+        )
+        self.addCleanup(other.close)
+
+        self.assertEqual(backend_pid(other), pid)
+
+    def test_idle_connections_kept_up_to_max_size(self):
+        """Test that connections returned beyond MIN_SIZE stay open."""
+        other = create_wrapper(
+            'core.backends.postgresql_pool',
+            OPTIONS={'application_name': 'pool-tests'},
+        )
+        self.addCleanup(other.close)
+        pids = {backend_pid(self.wrapper), backend_pid(other)}
+        self.wrapper.close()
+        other.close()
+
+        self.assertEqual(len(self.wrapper.pool._pool), 2)
+        self.assertEqual(
+            {backend_pid(self.wrapper), backend_pid(other)},
+            pids,
+        )
+
+    def test_open_transaction_rolled_back(self):
+        """Test that connections are returned to the pool idle."""
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE pooled (id int)')
+        self.wrapper.close()
+
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_class WHERE relname = 'pooled'"
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+class PoolLimitTests(TestCase):
+    """Test checking out connections from an exhausted pool."""
+
+    def create_wrapper(self):
+        """Return a connection drawing from a pool of one connection."""
+        return create_wrapper(
+            'core.backends.postgresql_pool',
+            CONN_MAX_AGE=0,
+            OPTIONS={'application_name': 'pool-limit-tests'},
+            POOL={'MIN_SIZE': 1, 'MAX_SIZE': 1, 'TIMEOUT': 0.1},
+        )
+
+    def setUp(self):
+        self.wrapper = self.create_wrapper()
+        self.addCleanup(self.wrapper.close)
+        backend_pid(self.wrapper)
+        self.addCleanup(self.wrapper.pool.closeall)
+
+    def test_exhausted_pool_times_out(self):
+        """Test that checkouts fail once the timeout has passed."""
+        other = self.create_wrapper()
+        self.addCleanup(other.close)
+        with self.assertRaises(Error):
+            backend_pid(other)
+
+    def test_exhausted_pool_waits(self):
+        """Test that checkouts wait for a connection to be returned."""
+        pid = backend_pid(self.wrapper)
+        self.wrapper.pool.timeout = 5
+        pids = []
+
+        def check_out():
+            # Connections may only be used by the thread creating them.
+            other = self.create_wrapper()
+            try:
+                pids.append(backend_pid(other))
+            finally:
+                other.close()
+
+        thread = threading.Thread(target=check_out)
+        thread.start()
+
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        self.wrapper.close()
+        thread.join(5)
+
+        self.assertEqual(pids, [pid])
@@ -0,0 +1,86 @@
+"""
+Tests that the planner uses the leaf indexes.
+"""
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class LeafIndexTests(TestCase):
+    """Test the query plans of the common leaf queries."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        Leaf.objects.bulk_create(
+            Leaf(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=f'a/b{i % 10}/c{i}',
+                text='text',
+            )
+            for i in range(200)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_leaf')
+            # The test tables are too small for the planner to prefer an
+            # index on its own, so only plans using an index are allowed.
+            # Sorts are ruled out as well, since their cost against an
+            # ordered index scan depends on the dead rows that earlier tests
+            # leave in the table.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert that the plan of queryset scans index_name."""
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_user_leafs_by_path(self):
+        """Test listing the leafs of a user by descending path."""
+        queryset = Leaf.objects.filter(
+            user=self.user,
+        ).order_by('-path', '-id')[:100]
+
+        self.assertUsesIndex(queryset, 'leaf_user_path_idx')
+
+    def test_mindmap_leafs_by_path(self):
+        """Test reading the leafs of a mindmap in path order."""
+        queryset = Leaf.objects.filter(
+            mindmap=self.mindmap,
+        ).order_by('path').values_list('path', flat=True)
+
+        self.assertUsesIndex(queryset, 'leaf_mindmap_path_idx')
+
+    def test_subtree_prefix_lookup(self):
+        """Test that a subtree lookup is an index range scan."""
+        queryset = Leaf.objects.filter(
+            mindmap=self.mindmap,
+            path__startswith='a/b3/',
+        )
+
+        plan = queryset.explain()
+
+        # Under the C collation the plain index serves the range as well.
+        self.assertRegex(plan, r'leaf_mindmap_path(_like)?_idx')
+        self.assertRegex(
+            plan,
+            r"Index Cond: .*\(path\)::text (~>=~|>=) 'a/b3/'",
+        )
+
+    def test_search_uses_search_index(self):
+        """Test that searches match leafs with the search index."""
+        queryset = Leaf.objects.search('c12 text')
+
+        self.assertUsesIndex(queryset, 'leaf_search_idx')
@@ -2,6 +2,7 @@
 Tests for models.
 """
 
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -77,3 +78,87 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(leaf), leaf.path)
+
+    def test_leaf_path_without_segments_invalid(self):
+        """Test that paths empty once normalized fail validation."""
+        user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        leaf = models.Leaf(user=user, path='///', text='nothing')
+
+        with self.assertRaises(ValidationError) as cm:
+            leaf.full_clean()
+
+        self.assertIn('path', cm.exception.message_dict)
+
+
+class LeafTreeTests(TestCase):
+    """Test the materialized paths of leafs."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        self.mindmap = models.MindMap.objects.create(
+            user=self.user,
+            title='Map',
+        )
+        for path in ['i', 'i/like', 'i/like/turtles', 'i/likes', 'you']:
+            self.create_leaf(path)
+
+    def create_leaf(self, path):
+        """Create and return a leaf of the mindmap."""
+        return models.Leaf.objects.create(
+            user=self.user,
+            mindmap=self.mindmap,
+            path=path,
+            text='text',
+        )
+
+    def paths(self, queryset):
+        """Return the sorted paths of a queryset."""
+        return sorted(queryset.values_list('path', flat=True))
+
+    def test_path_normalized_with_depth(self):
+        """Test that empty segments are dropped and depth is stored."""
+        leaf = self.create_leaf('/they//like/')
+
+        leaf.refresh_from_db()
+        self.assertEqual(leaf.path, 'they/like')
+        self.assertEqual(leaf.depth, 2)
+
+    def test_depth_follows_path_updates(self):
+        """Test that saving a new path updates the depth."""
+        leaf = self.create_leaf('they')
+        leaf.path = 'they/like/turtles'
+        leaf.save(update_fields=['path'])
+
+        leaf.refresh_from_db()
+        self.assertEqual(leaf.depth, 3)
+
+    def test_subtree(self):
+        """Test that a subtree holds the path and its descendants only."""
+        leafs = models.Leaf.objects.subtree('i/like')
+
+        self.assertEqual(self.paths(leafs), ['i/like', 'i/like/turtles'])
+
+    def test_descendants(self):
+        """Test that descendants exclude the path itself."""
+        leafs = models.Leaf.objects.descendants('i')
+
+        self.assertEqual(self.paths(leafs),
+                         ['i/like', 'i/like/turtles', 'i/likes'])
+
+    def test_ancestors(self):
+        """Test that ancestors are the leafs on the path to the root."""
+        leafs = models.Leaf.objects.ancestors('i/like/turtles')
+
+        self.assertEqual(self.paths(leafs), ['i', 'i/like'])
+
+    def test_at_depth(self):
+        """Test filtering leafs by depth."""
+        leafs = models.Leaf.objects.at_depth(1)
+
+        self.assertEqual(self.paths(leafs), ['i', 'you'])
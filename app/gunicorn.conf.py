@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for serving the app in production.
+
+    gunicorn -c gunicorn.conf.py app.wsgi
+
+Serve app.asgi instead with SERVER_INTERFACE=asgi, which runs uvicorn
+workers. Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Two workers per core, plus one, keep every core busy while some workers
+# wait on the database.
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    multiprocessing.cpu_count() * 2 + 1,
+))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+asgi = os.environ.get('SERVER_INTERFACE', 'wsgi') == 'asgi'
+if asgi:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+
+# Recycle workers after a number of requests, with jitter so that they do
+# not all restart at once, to bound the memory any one of them can leak.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Import the app once in the master, so that workers fork with Django
+# already set up and share its memory.
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    """Warn when mindmap events cannot reach the streams of every worker."""
+    if not asgi or server.cfg.workers <= 1:
+        return
+    # Without preload_app, the master has not set Django up.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    from django.conf import settings
+
+    if settings.MINDMAP_BROKER['BACKEND'] == 'mindmap.broker.InMemoryBroker':
+        server.log.warning(
+            'Mindmap events only reach the streams of the worker they are '
+            'published in with the in memory broker. Set '
+            'MINDMAP_BROKER_BACKEND=mindmap.broker.PostgresBroker when '
+            'running %s workers.',
+            server.cfg.workers,
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MindmapConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mindmap'
+
+    def ready(self):
+        # Connects the receivers keeping versions and events up to date.
+        from mindmap import signals  # noqa: F401
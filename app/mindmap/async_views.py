@@ -0,0 +1,80 @@
+"""
+Async variants of the mindmap read endpoints.
+
+Django 3.2 has no async ORM and DRF views are synchronous, so these views
+await the regular viewsets running in a bounded pool of database threads.
+Under ASGI, requests waiting for a thread hold no thread of their own, and
+the event loop is never blocked by queries or by building and rendering
+trees. Responses are identical to the synchronous endpoints.
+"""
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from mindmap.views import (
+    LeafViewSet,
+    MindMapViewSet,
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the database thread pool, created on first use.
+
+    The pool is created lazily so that workers forked from a preloaded
+    master each start their own threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_DB_THREADS,
+                thread_name_prefix='db',
+            )
+        return _executor
+
+
+def database_sync_to_async(func):
+    """Return an awaitable running func in the database thread pool.
+
+    Threads keep a connection of their own, which is closed or kept like
+    the connections of a synchronous request, according to CONN_MAX_AGE.
+    """
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(
+        inner,
+        thread_sensitive=False,
+        executor=get_executor(),
+    )
+
+
+def async_view(view):
+    """Return an async view awaiting a synchronous DRF view."""
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def wrapper(request, *args, **kwargs):
+        return await database_sync_to_async(render)(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return functools.wraps(view)(wrapper)
+
+
+mindmap_tree = async_view(MindMapViewSet.as_view({'get': 'retrieve'}))
+leaf_list = async_view(LeafViewSet.as_view({'get': 'list'}))
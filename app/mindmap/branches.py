@@ -0,0 +1,137 @@
+"""
+Operations on the branches of a mindmap.
+
+A branch is a path of the mindmap together with every leaf below it. Leafs
+store materialized paths, so a whole branch is rewritten by a single
+set-based UPDATE of its path prefix, in the same transaction as the
+version bump readers see.
+"""
+from django.db import transaction
+from django.db.models import (
+    CharField,
+    F,
+    Max,
+    Value,
+)
+from django.db.models.functions import (
+    Concat,
+    Length,
+    Substr,
+)
+
+from core.models import (
+    Leaf,
+    MindMap,
+    PATH_SEPARATOR,
+    normalize_path,
+    path_depth,
+)
+from mindmap import (
+    events,
+    snapshots,
+)
+
+
+class BranchError(ValueError):
+    """Raised when a branch operation is not valid."""
+
+
+def _lock(mindmap):
+    """Lock the MindMap row until the end of the transaction.
+
+    Branch operations take the lock before touching leafs, so operations
+    on the same mindmap run one after another, each on the leafs the
+    previous one left.
+    """
+    MindMap.objects.select_for_update().values_list('id', flat=True).get(
+        id=mindmap.id,
+    )
+
+
+def move_leafs(mindmap, source, destination):
+    """Rename the paths of the leafs of the branch at source.
+
+    Only the leafs are updated, callers lock the MindMap row first and
+    invalidate the snapshot of the mindmap in the same transaction. Returns the
+    number of leafs moved.
+    """
+    source = normalize_path(source)
+    destination = normalize_path(destination)
+    if not source or not destination:
+        raise BranchError('Paths must have at least one segment.')
+    if (destination == source
+            or destination.startswith(source + PATH_SEPARATOR)):
+        raise BranchError('A branch cannot be moved into itself.')
+
+    with transaction.atomic():
+        leafs = Leaf.objects.filter(mindmap=mindmap).subtree(source)
+        longest = leafs.aggregate(longest=Max(Length('path')))['longest']
+        if longest is None:
+            return 0
+        max_length = Leaf._meta.get_field('path').max_length
+        if longest - len(source) + len(destination) > max_length:
+            raise BranchError(
+                f'Moved paths would be longer than {max_length} characters.'
+            )
+
+        return leafs.update(
+            path=Concat(
+                Value(destination),
+                Substr('path', len(source) + 1),
+                output_field=CharField(),
+            ),
+            depth=F('depth') + path_depth(destination) - path_depth(source),
+        )
+
+
+def delete_leafs(mindmap, path):
+    """Delete the leafs of the branch at path.
+
+    Only the leafs are deleted, callers lock the MindMap row first and
+    invalidate the snapshot of the mindmap in the same transaction. Returns the
+    number of leafs deleted.
+    """
+    path = normalize_path(path)
+    if not path:
+        raise BranchError('Paths must have at least one segment.')
+    leafs = Leaf.objects.filter(mindmap=mindmap).subtree(path)
+    # Nothing references leafs and no delete signals are connected for
+    # them, so the collector removes the rows with a single DELETE of the
+    # path range, without loading them.
+    deleted, _ = leafs.delete()
+    return deleted
+
+
+def delete_branch(mindmap, path):
+    """Delete the branch at path with every leaf below it.
+
+    Returns the number of leafs deleted.
+    """
+    path = normalize_path(path)
+    with transaction.atomic():
+        _lock(mindmap)
+        deleted = delete_leafs(mindmap, path)
+        if not deleted:
+            return 0
+        version = snapshots.invalidate(mindmap.id)
+        events.publish(mindmap.id, version, events.BRANCH_DELETED, path=path)
+    return deleted
+
+
+def move_branch(mindmap, source, destination):
+    """Move the branch at source to destination, renaming its paths.
+
+    Leafs already under destination are kept, so the branches are merged.
+    Returns the number of leafs moved.
+    """
+    with transaction.atomic():
+        _lock(mindmap)
+        moved = move_leafs(mindmap, source, destination)
+        if not moved:
+            return 0
+        source = normalize_path(source)
+        destination = normalize_path(destination)
+        version = snapshots.invalidate(mindmap.id)
+        events.publish(mindmap.id, version, events.BRANCH_MOVED,
+                       source=source, destination=destination)
+    return moved
@@ -0,0 +1,284 @@
+"""
+Publish/subscribe brokers for mindmap change events.
+
+Writers publish events to a channel from any thread, and the event streams
+of connected clients subscribe to channels from the event loop. The broker
+is chosen by the MINDMAP_BROKER setting:
+
+    MINDMAP_BROKER = {
+        'BACKEND': 'mindmap.broker.InMemoryBroker',
+        'OPTIONS': {'queue_size': 100},
+    }
+
+InMemoryBroker only reaches subscribers of its own process, so it only
+fits a server running a single process, such as runserver or tests.
+PostgresBroker relays events through Postgres LISTEN/NOTIFY, and reaches
+the subscribers of every process and node sharing the database. Other
+brokers, e.g. on Redis, only need the same subscribe() coroutine and
+publish() method.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+
+import psycopg2
+from psycopg2 import sql
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = {
+    'BACKEND': 'mindmap.broker.InMemoryBroker',
+    'OPTIONS': {},
+}
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the events a slow subscriber could not keep up with.
+OVERFLOW_EVENT = {'event': 'mindmap.reset'}
+
+
+class Subscription:
+    """Queue of the events of a channel for one subscriber."""
+
+    def __init__(self, broker, channel, queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def put(self, event):
+        """Queue an event, from the event loop of the subscriber.
+
+        When the queue is full, the queued events are replaced by a single
+        reset event telling the subscriber to reload the mindmap.
+        """
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {**OVERFLOW_EVENT, 'version': event.get('version')}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        """Wait for and return the next event."""
+        return await self.queue.get()
+
+    def close(self):
+        """Stop receiving events."""
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """Broker fanning events out to the subscribers of this process."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    async def subscribe(self, channel):
+        """Return a new subscription to a channel.
+
+        Must be awaited in the event loop the events are read in.
+        """
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription from its channel."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        """Send an event to every subscriber of a channel, from any thread.
+
+        Returns the number of subscribers.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, event,
+                )
+            except RuntimeError:
+                # The event loop of the subscriber was closed.
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+
+class PostgresBroker(InMemoryBroker):
+    """Broker relaying events between processes with LISTEN/NOTIFY.
+
+    Events of every channel are notified on a single Postgres channel,
+    along with their broker channel. Each process subscribing to events
+    listens on its own connection, in a thread started by the first
+    subscription, and fans the notifications out to its subscribers.
+    """
+
+    # Postgres rejects notification payloads of 8000 bytes or more.
+    MAX_PAYLOAD = 7999
+
+    def __init__(self, queue_size=100, using='default',
+                 pg_channel='mindmap_events', poll_interval=5,
+                 connect_timeout=5):
+        super().__init__(queue_size)
+        self.using = using
+        self.pg_channel = pg_channel
+        self.poll_interval = poll_interval
+        self.connect_timeout = connect_timeout
+        self._listener = None
+        self._listening = threading.Event()
+        self._stopping = threading.Event()
+
+    async def subscribe(self, channel):
+        """Return a new subscription to a channel.
+
+        The first subscription of a process waits for its listener to
+        connect, so that no event published afterwards is missed. The wait
+        blocks a thread of the default executor, not the event loop.
+        """
+        subscription = await super().subscribe(channel)
+        self._start_listener()
+        if not self._listening.is_set():
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._listening.wait, self.connect_timeout,
+            )
+        return subscription
+
+    def publish(self, channel, event):
+        """Notify every process of an event, from any thread.
+
+        Events too large for a notification are replaced by a reset event.
+        Returns None, as subscribers of other processes are not counted.
+        """
+        payload = self.encode(channel, event)
+        if len(payload.encode()) > self.MAX_PAYLOAD:
+            payload = self.encode(channel, {
+                **OVERFLOW_EVENT,
+                'mindmap': event.get('mindmap'),
+                'version': event.get('version'),
+            })
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [
+                self.pg_channel, payload,
+            ])
+
+    @staticmethod
+    def encode(channel, event):
+        """Return the notification payload of an event."""
+        return json.dumps(
+            {'channel': channel, 'event': event},
+            separators=(',', ':'),
+        )
+
+    def deliver(self, payload):
+        """Fan a notification out to the subscribers of this process."""
+        message = json.loads(payload)
+        InMemoryBroker.publish(self, message['channel'], message['event'])
+
+    def reset_subscribers(self):
+        """Tell every subscriber of this process to reload its mindmap."""
+        with self._lock:
+            channels = list(self._subscriptions)
+        for channel in channels:
+            InMemoryBroker.publish(self, channel, {
+                **OVERFLOW_EVENT,
+                'version': None,
+            })
+
+    def close(self):
+        """Stop listening, within poll_interval seconds."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None and listener[0] == os.getpid():
+            self._stopping.set()
+            listener[1].join()
+
+    def _start_listener(self):
+        with self._lock:
+            listener = self._listener
+            # Threads do not survive forks, so a forked worker starts its own.
+            if listener is None or listener[0] != os.getpid():
+                self._listening.clear()
+                self._stopping = threading.Event()
+                thread = threading.Thread(
+                    target=self._listen,
+                    args=(self._stopping,),
+                    name='mindmap-events',
+                    daemon=True,
+                )
+                self._listener = (os.getpid(), thread)
+                thread.start()
+
+    def _connect(self):
+        connection = psycopg2.connect(
+            **connections[self.using].get_connection_params(),
+        )
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(sql.SQL('LISTEN {}').format(
+                sql.Identifier(self.pg_channel),
+            ))
+        return connection
+
+    def _listen(self, stopping):
+        connected_before = False
+        while not stopping.is_set():
+            try:
+                connection = self._connect()
+            except psycopg2.Error:
+                logger.exception('Could not listen for mindmap events.')
+                stopping.wait(self.poll_interval)
+                continue
+            if connected_before:
+                # Events notified while disconnected are lost.
+                self.reset_subscribers()
+            connected_before = True
+            self._listening.set()
+            try:
+                self._receive(connection, stopping)
+            except psycopg2.Error:
+                logger.exception('Lost the connection for mindmap events.')
+            finally:
+                connection.close()
+
+    def _receive(self, connection, stopping):
+        while not stopping.is_set():
+            readable, _, _ = select.select(
+                [connection], [], [], self.poll_interval,
+            )
+            if not readable:
+                # Detects connections closed while idle.
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            connection.poll()
+            while connection.notifies:
+                self.deliver(connection.notifies.pop(0).payload)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the broker configured by the MINDMAP_BROKER setting."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            options = {
+                **DEFAULT_BROKER,
+                **getattr(settings, 'MINDMAP_BROKER', {}),
+            }
+            _broker = import_string(options['BACKEND'])(**options['OPTIONS'])
+        return _broker
@@ -0,0 +1,96 @@
+"""
+Bulk creation of leafs.
+
+Items are validated and inserted in a single pass over the input, so a
+lazily parsed body is never held in memory in full. Leafs are written with
+chunked bulk_create() calls inside one transaction, which is rolled back if
+any item is invalid.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.models import (
+    Leaf,
+    validate_path,
+)
+from mindmap import (
+    events,
+    snapshots,
+)
+from mindmap.parsers import InvalidLine
+
+BULK_CHUNK_SIZE = 1000
+LEAF_FIELDS = ('path', 'text')
+
+
+def validate_item(item):
+    """Return the cleaned path and text of an item, and its errors."""
+    if isinstance(item, InvalidLine):
+        return None, {'non_field_errors': [item.error]}
+    if not isinstance(item, dict):
+        return None, {
+            'non_field_errors': ['Expected an object with a path and text.']
+        }
+
+    cleaned = {}
+    errors = {}
+    for name in LEAF_FIELDS:
+        value = item.get(name)
+        max_length = Leaf._meta.get_field(name).max_length
+        if not isinstance(value, str):
+            errors[name] = ['This field is required and must be a string.']
+        elif not value.strip():
+            errors[name] = ['This field may not be blank.']
+        elif len(value.strip()) > max_length:
+            errors[name] = [
+                f'Ensure this field has no more than {max_length} characters.'
+            ]
+        else:
+            cleaned[name] = value.strip()
+    if 'path' in cleaned:
+        try:
+            validate_path(cleaned['path'])
+        except ValidationError as exc:
+            errors['path'] = exc.messages
+    if errors:
+        return None, errors
+    return cleaned, None
+
+
+def create_leafs(mindmap, items, chunk_size=BULK_CHUNK_SIZE):
+    """Create a leaf in mindmap for each {path, text} item.
+
+    Returns the number of leafs created and a list of per-item errors.
+    Nothing is created unless every item is valid.
+    """
+    created = 0
+    errors = []
+    batch = []
+    with transaction.atomic():
+        for index, item in enumerate(items):
+            cleaned, item_errors = validate_item(item)
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+            elif not errors:
+                leaf = Leaf(
+                    user_id=mindmap.user_id,
+                    mindmap=mindmap,
+                    **cleaned,
+                )
+                leaf.normalize()
+                batch.append(leaf)
+                if len(batch) >= chunk_size:
+                    Leaf.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+
+        if errors:
+            transaction.set_rollback(True)
+            return 0, errors
+
+        Leaf.objects.bulk_create(batch)
+        created += len(batch)
+        if created:
+            version = snapshots.invalidate(mindmap.id)
+            events.publish(mindmap.id, version, events.MINDMAP_RESET)
+    return created, errors
@@ -0,0 +1,44 @@
+"""
+Cache of rendered MindMaps.
+
+Rendered bodies are keyed by mindmap id and version, so a change to a
+mindmap never has to evict anything: its new version simply misses, and
+the stale entries age out of the least recently used cache.
+"""
+from django.core.cache import caches
+from django.utils.http import (
+    parse_etags,
+    quote_etag,
+)
+
+CACHE_ALIAS = 'mindmaps'
+
+
+def cache_key(mindmap_id, version, fmt):
+    """Return the cache key of a mindmap rendered in a format."""
+    return f'mindmap:{mindmap_id}:{version}:{fmt}'
+
+
+def get_body(mindmap_id, version, fmt):
+    """Return a cached rendering, or None."""
+    return caches[CACHE_ALIAS].get(cache_key(mindmap_id, version, fmt))
+
+
+def set_body(mindmap_id, version, fmt, body):
+    """Cache a rendering of a mindmap version."""
+    caches[CACHE_ALIAS].set(cache_key(mindmap_id, version, fmt), body)
+
+
+def etag(mindmap, fmt):
+    """Return the ETag of a mindmap version rendered in a format."""
+    return quote_etag(f'{mindmap.id}-{mindmap.version}-{fmt}')
+
+
+def not_modified(request, etag):
+    """Return whether the If-None-Match header of request matches etag."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    weak = 'W/' + etag
+    return '*' in etags or etag in etags or weak in etags
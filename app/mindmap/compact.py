@@ -0,0 +1,223 @@
+"""
+Compact, array backed trees for very large mindmaps.
+
+A Tree holds a TreeNode object per node, with a dict of its children,
+which costs a few hundred bytes per node. A CompactTree stores the same
+tree as parallel arrays indexed by node, the root being node 0:
+
+    parent        index of the parent node, -1 for the root
+    first_child   index of the first child, in segment order, or -1
+    next_sibling  index of the next child of the same parent, or -1
+    segment       index of the segment in the interned segments list
+    count         number of leafs whose path ends at the node
+
+plus a list of the text of each node. Segments repeat a lot across a
+mindmap, so each distinct one is stored once.
+
+Trees are built from the leafs in path order, which numbers the nodes in
+pretty print order. They are read only, and render like the trie.
+"""
+import json
+from array import array
+
+from mindmap.render import FORMAT_FLAT
+from mindmap.tree import split_path
+
+NO_NODE = -1
+SEPARATOR = '\0'
+# Signed 32-bit node indices.
+INDEX_TYPE = 'i'
+
+
+class CompactTree:
+    """Read only mind map tree held in arrays."""
+    __slots__ = (
+        'parent',
+        'first_child',
+        'next_sibling',
+        'segment',
+        'count',
+        'texts',
+        'segments',
+    )
+
+    def __init__(self, title):
+        self.parent = array(INDEX_TYPE, [NO_NODE])
+        self.first_child = array(INDEX_TYPE, [NO_NODE])
+        self.next_sibling = array(INDEX_TYPE, [NO_NODE])
+        self.segment = array(INDEX_TYPE, [0])
+        self.count = array('I', [0])
+        self.texts = [None]
+        self.segments = [title]
+
+    @classmethod
+    def from_paths(cls, title, paths):
+        """Create and return a tree holding every path."""
+        return cls.from_leafs(title, ((path, None) for path in paths))
+
+    @classmethod
+    def from_leafs(cls, title, leafs):
+        """Create and return a tree from (path, text) pairs.
+
+        Like for the trie, the last text given for a path is kept.
+        """
+        tree = cls(title)
+        # Joined by NUL, which sorts before any other character, segments
+        # sort like lists of segments, but much faster.
+        leafs = sorted(
+            leafs,
+            key=lambda leaf: SEPARATOR.join(split_path(leaf[0])),
+        )
+        interned = {}
+        parent = tree.parent
+        first_child = tree.first_child
+        next_sibling = tree.next_sibling
+        segment_ids = tree.segment
+        count = tree.count
+        texts = tree.texts
+        segments = tree.segments
+
+        # Nodes of the previous path, the root first. The paths are sorted,
+        # so a new node is always the last child of its parent, and the
+        # previous last child is on this stack.
+        stack = [0]
+        previous = []
+        for path, text in leafs:
+            path = split_path(path)
+            common = 0
+            for old, new in zip(previous, path):
+                if old != new:
+                    break
+                common += 1
+            sibling = stack[common + 1] if len(stack) > common + 1 else (
+                NO_NODE
+            )
+            del stack[common + 1:]
+            for segment in path[common:]:
+                node = len(parent)
+                segment_id = interned.get(segment)
+                if segment_id is None:
+                    segment_id = interned[segment] = len(segments)
+                    segments.append(segment)
+                above = stack[-1]
+                parent.append(above)
+                first_child.append(NO_NODE)
+                next_sibling.append(NO_NODE)
+                segment_ids.append(segment_id)
+                count.append(0)
+                texts.append(None)
+                if sibling == NO_NODE:
+                    first_child[above] = node
+                else:
+                    next_sibling[sibling] = node
+                sibling = NO_NODE
+                stack.append(node)
+            previous = path
+
+            node = stack[-1]
+            count[node] += 1
+            if text is not None:
+                texts[node] = text
+        return tree
+
+    def __len__(self):
+        return len(self.parent)
+
+    def segment_of(self, node):
+        """Return the segment of a node."""
+        return self.segments[self.segment[node]]
+
+    def children(self, node):
+        """Yield the children of a node in segment order."""
+        child = self.first_child[node]
+        next_sibling = self.next_sibling
+        while child != NO_NODE:
+            yield child
+            child = next_sibling[child]
+
+    def find(self, path):
+        """Return the node at path, or None if it is not in the tree."""
+        node = 0
+        for segment in split_path(path):
+            for child in self.children(node):
+                if self.segment_of(child) == segment:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def iter_preorder(self):
+        """Yield each node with its depth, in pretty print order."""
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        parent = self.parent
+        node = 0
+        depth = 0
+        while True:
+            yield node, depth
+            child = first_child[node]
+            if child != NO_NODE:
+                node = child
+                depth += 1
+                continue
+            while node and next_sibling[node] == NO_NODE:
+                node = parent[node]
+                depth -= 1
+            if not node:
+                return
+            node = next_sibling[node]
+
+    def iter_lines(self):
+        """Yield the pretty printed lines of the tree."""
+        first_child = self.first_child
+        segment_ids = self.segment
+        segments = self.segments
+        indents = ['']
+        for node, depth in self.iter_preorder():
+            if depth == len(indents):
+                indents.append(indents[-1] + '\t')
+            line = indents[depth] + segments[segment_ids[node]]
+            if first_child[node] != NO_NODE:
+                line += '/'
+            yield line
+
+    def pretty_print(self):
+        """Return the pretty printed tree."""
+        return '\n'.join(self.iter_lines())
+
+    def to_flat(self):
+        """Return the tree as parallel parent, segment and text arrays.
+
+        Nodes are already numbered in pretty print order, so the arrays
+        are read as they are stored.
+        """
+        segments = self.segments
+        return {
+            'parent': [None, *self.parent[1:]],
+            'segment': [segments[segment] for segment in self.segment],
+            'text': list(self.texts),
+        }
+
+    def to_nested(self):
+        """Return the tree as nested {id, segment, text, children} dicts."""
+        segments = self.segments
+        nodes = []
+        for node, (parent, segment, text) in enumerate(zip(
+            self.parent, self.segment, self.texts,
+        )):
+            data = {
+                'id': node,
+                'segment': segments[segment],
+                'text': text,
+                'children': [],
+            }
+            if parent != NO_NODE:
+                nodes[parent]['children'].append(data)
+            nodes.append(data)
+        return nodes[0]
+
+    def to_json(self, fmt):
+        """Return the tree as compact JSON in a format."""
+        data = self.to_flat() if fmt == FORMAT_FLAT else self.to_nested()
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
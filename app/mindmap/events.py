@@ -0,0 +1,59 @@
+"""
+Change events of mindmaps.
+
+Every change to a mindmap publishes a small delta to the channel of the
+mindmap, once the transaction making the change commits. Events carry the
+version of the mindmap they produced, so a client applying them to its
+copy of the tree can tell when it missed one and should reload instead.
+Events are sent after the change is committed, so an event the broker
+fails to send is logged and lost, and the write still succeeds: clients
+notice the version gap.
+"""
+import logging
+
+from django.db import transaction
+
+from mindmap.broker import get_broker
+
+logger = logging.getLogger(__name__)
+
+LEAF_ADDED = 'leaf.added'
+LEAF_UPDATED = 'leaf.updated'
+LEAF_REMOVED = 'leaf.removed'
+BRANCH_MOVED = 'branch.moved'
+BRANCH_DELETED = 'branch.deleted'
+MINDMAP_RENAMED = 'mindmap.renamed'
+# Operations of a patch, see mindmap.patches, in the order applied.
+MINDMAP_PATCHED = 'mindmap.patched'
+# Changes too large to describe, e.g. bulk inserts: reload the mindmap.
+MINDMAP_RESET = 'mindmap.reset'
+MINDMAP_DELETED = 'mindmap.deleted'
+
+
+def channel(mindmap_id):
+    """Return the broker channel of a mindmap."""
+    return f'mindmap:{mindmap_id}'
+
+
+def publish(mindmap_id, version, event, **data):
+    """Publish an event about a mindmap when the transaction commits."""
+    if mindmap_id is None:
+        return
+    payload = {
+        'event': event,
+        'mindmap': mindmap_id,
+        'version': version,
+        **data,
+    }
+    transaction.on_commit(lambda: send(mindmap_id, payload))
+
+
+def send(mindmap_id, payload):
+    """Send an event to the broker, logging failures."""
+    try:
+        get_broker().publish(channel(mindmap_id), payload)
+    except Exception:
+        logger.exception(
+            'Could not publish %s of mindmap %s.',
+            payload['event'], mindmap_id,
+        )
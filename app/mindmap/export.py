@@ -0,0 +1,197 @@
+"""
+Streaming export of mindmaps.
+
+Mindmaps are exported either as newline delimited JSON, a mindmap record
+followed by a record per leaf:
+
+    {"type":"mindmap","id":1,"title":"Map","version":3}
+    {"type":"leaf","mindmap":1,"path":"i/like","text":"turtles"}
+
+or as their pretty printed outlines, separated by blank lines, which
+import_mindmap reads back as one mindmap per outline. The output can be
+compressed with gzip, or with zstd when the zstandard package is
+installed.
+
+Mindmaps and leafs are read with server-side cursors and the output is
+produced in chunks as they are read, so exporting an account holds at
+most one mindmap in memory, whatever the size of the account. Outlines
+can instead be rendered from the leafs over a pool of worker processes,
+which holds a few batches of mindmaps per worker.
+"""
+import json
+import zlib
+
+from core.models import (
+    Leaf,
+    MindMapSnapshot,
+)
+from mindmap import parallel
+from mindmap.compact import CompactTree
+from mindmap.render import STREAM_CHUNK_SIZE
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_OUTLINE = 'outline'
+FORMATS = (FORMAT_NDJSON, FORMAT_OUTLINE)
+
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_ZSTD = 'zstd'
+COMPRESSIONS = (COMPRESSION_GZIP, COMPRESSION_ZSTD)
+
+CONTENT_TYPES = {
+    FORMAT_NDJSON: 'application/x-ndjson',
+    FORMAT_OUTLINE: 'text/plain; charset=utf-8',
+    COMPRESSION_GZIP: 'application/gzip',
+    COMPRESSION_ZSTD: 'application/zstd',
+}
+EXTENSIONS = {
+    FORMAT_NDJSON: '.ndjson',
+    FORMAT_OUTLINE: '.txt',
+    COMPRESSION_GZIP: '.gz',
+    COMPRESSION_ZSTD: '.zst',
+}
+
+# Rows fetched per round trip of the server-side cursors. Mindmaps are
+# fetched with their snapshot, so fewer of them at a time.
+LEAF_CHUNK_SIZE = 2000
+MINDMAP_CHUNK_SIZE = 100
+
+
+class ExportError(ValueError):
+    """Raised when an export cannot be produced."""
+
+
+# Shared by every record, json.dumps() would build an encoder per call.
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_ndjson(mindmaps):
+    """Yield the NDJSON lines of mindmaps and their leafs."""
+    mindmaps = mindmaps.only('id', 'title', 'version').order_by('id')
+    for mindmap in mindmaps.iterator(chunk_size=MINDMAP_CHUNK_SIZE):
+        yield _encoder.encode({
+            'type': 'mindmap',
+            'id': mindmap.id,
+            'title': mindmap.title,
+            'version': mindmap.version,
+        }) + '\n'
+        leafs = Leaf.objects.filter(mindmap=mindmap.id).order_by('path')
+        for path, text in leafs.values_list('path', 'text').iterator(
+            chunk_size=LEAF_CHUNK_SIZE,
+        ):
+            yield _encoder.encode({
+                'type': 'leaf',
+                'mindmap': mindmap.id,
+                'path': path,
+                'text': text,
+            }) + '\n'
+
+
+def iter_outlines(mindmaps, workers=None):
+    """Yield the pretty printed outlines of mindmaps.
+
+    Snapshots of the current version are used as they are. The trees of
+    other mindmaps are built from their leafs as compact trees, without
+    storing a snapshot. With a number of workers, every tree is built and
+    rendered in that many processes instead.
+    """
+    separator = ''
+    if workers is not None:
+        for _, text in parallel.render_mindmaps(mindmaps, workers=workers):
+            yield separator
+            separator = '\n\n'
+            yield text
+        if separator:
+            yield '\n'
+        return
+
+    mindmaps = mindmaps.select_related('snapshot').order_by('id')
+    for mindmap in mindmaps.iterator(chunk_size=MINDMAP_CHUNK_SIZE):
+        yield separator
+        separator = '\n\n'
+        try:
+            snapshot = mindmap.snapshot
+        except MindMapSnapshot.DoesNotExist:
+            snapshot = None
+        if snapshot is not None and (
+            snapshot.rendered_version == mindmap.version
+        ):
+            yield snapshot.text
+        else:
+            lines = CompactTree.from_leafs(
+                mindmap.title,
+                mindmap.leafs.values_list('path', 'text'),
+            ).iter_lines()
+            yield next(lines)
+            for line in lines:
+                yield '\n' + line
+    if separator:
+        yield '\n'
+
+
+def iter_bytes(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """Encode strings into UTF-8 chunks of about chunk_size bytes."""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def compressor(compression):
+    """Return a streaming compressor object for a compression."""
+    if compression == COMPRESSION_GZIP:
+        return zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ExportError('zstd compression requires the zstandard '
+                              'package.')
+        return zstandard.ZstdCompressor().compressobj()
+    raise ExportError(f'Unknown compression {compression}.')
+
+
+def iter_compressed(chunks, compressor):
+    """Compress chunks of bytes as they are produced."""
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export(mindmaps, fmt=FORMAT_NDJSON, compression=None, workers=None):
+    """Return an iterator over the bytes of an export of mindmaps.
+
+    Outlines are rendered by that many worker processes when workers is
+    given. Raises ExportError for unknown formats or unavailable
+    compressions, before anything is read.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f'Unknown format {fmt}.')
+    pieces = iter_ndjson(mindmaps) if fmt == FORMAT_NDJSON else (
+        iter_outlines(mindmaps, workers)
+    )
+    chunks = iter_bytes(pieces)
+    if compression is None:
+        return chunks
+    return iter_compressed(chunks, compressor(compression))
+
+
+def content_type(fmt, compression=None):
+    """Return the content type of an export."""
+    return CONTENT_TYPES[compression or fmt]
+
+
+def filename(name, fmt, compression=None):
+    """Return the file name of an export."""
+    return name + EXTENSIONS[fmt] + EXTENSIONS.get(compression, '')
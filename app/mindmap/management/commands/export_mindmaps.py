@@ -0,0 +1,66 @@
+"""
+Command to export the mindmaps of a user.
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import MindMap
+from mindmap import export
+from mindmap.export import ExportError
+
+
+class Command(BaseCommand):
+    """Django command to stream an export of the mindmaps of a user."""
+    help = 'Export the mindmaps of a user as NDJSON or text outlines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Output file, or - for stdout.')
+        parser.add_argument('--email', required=True,
+                            help='Email of the user owning the mindmaps.')
+        parser.add_argument('--mindmap', type=int, action='append',
+                            dest='mindmaps',
+                            help='Id of a mindmap to export, instead of '
+                                 'all of them. May be repeated.')
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default=export.FORMAT_NDJSON)
+        parser.add_argument('--compress', choices=export.COMPRESSIONS)
+        parser.add_argument('--workers', type=int,
+                            help='Render outlines from the leafs in this '
+                                 'many processes.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        mindmaps = MindMap.objects.filter(user=user)
+        if options['mindmaps']:
+            mindmaps = mindmaps.filter(id__in=options['mindmaps'])
+        try:
+            chunks = export.export(
+                mindmaps, options['format'], options['compress'],
+                options['workers'],
+            )
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        if options['file'] == '-':
+            size = self.write(sys.stdout.buffer, chunks)
+        else:
+            with open(options['file'], 'wb') as output:
+                size = self.write(output, chunks)
+            self.stdout.write(self.style.SUCCESS(
+                f'Exported {size} bytes to {options["file"]}.'
+            ))
+
+    def write(self, output, chunks):
+        """Write the chunks of an export and return their total size."""
+        size = 0
+        for chunk in chunks:
+            output.write(chunk)
+            size += len(chunk)
+        return size
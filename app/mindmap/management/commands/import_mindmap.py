@@ -0,0 +1,79 @@
+"""
+Command to import mindmaps from pretty printed text outlines.
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from mindmap.outline import (
+    OutlineError,
+    import_outline,
+    import_outlines,
+)
+
+
+class Command(BaseCommand):
+    """Django command to import mindmap outlines for a user."""
+    help = ('Import tab indented mindmap outlines, as printed or exported '
+            'by the API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Outline file, or - for stdin.')
+        parser.add_argument('--email', required=True,
+                            help='Email of the user owning the mindmap.')
+        parser.add_argument('--title',
+                            help='Title of the mindmap, instead of the '
+                                 'first line of the outline. Only for '
+                                 'outlines of a single mindmap.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        if options['file'] == '-':
+            mindmaps, created, errors = self.import_file(
+                user, sys.stdin, options['title'],
+            )
+        else:
+            with open(options['file'], encoding='utf-8') as outline:
+                mindmaps, created, errors = self.import_file(
+                    user, outline, options['title'],
+                )
+
+        if errors:
+            for error in errors:
+                for messages in error['errors'].values():
+                    for message in messages:
+                        self.stderr.write(message)
+            raise CommandError(f'{len(errors)} invalid lines, '
+                               'nothing was imported.')
+
+        if len(mindmaps) == 1:
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {created} leafs into mindmap {mindmaps[0].id} '
+                f'"{mindmaps[0].title}".'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {created} leafs into {len(mindmaps)} mindmaps.'
+            ))
+
+    def import_file(self, user, outline, title):
+        """Import the outlines of an open file.
+
+        Returns the mindmaps created, the number of leafs created and the
+        errors of the invalid lines.
+        """
+        try:
+            if title:
+                mindmap, created, errors = import_outline(
+                    user, outline, title=title,
+                )
+                return [mindmap], created, errors
+            return import_outlines(user, outline)
+        except OutlineError as exc:
+            raise CommandError(str(exc))
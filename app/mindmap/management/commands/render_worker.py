@@ -0,0 +1,103 @@
+"""
+Command to pre-render mindmaps queued by their writes.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.models import MindMap
+from mindmap import (
+    render_queue,
+    snapshots,
+)
+
+
+class Command(BaseCommand):
+    """Django command rendering queued mindmaps into their snapshots."""
+    help = 'Pre-render the trees of mindmaps after they are written.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Render the jobs due and exit.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Print the state of the queue and exit.')
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help='Seconds to wait when no job is due.')
+        parser.add_argument('--report-interval', type=float, default=60,
+                            help='Seconds between reports of the renders.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['stats']:
+            self.report_queue()
+            return
+
+        self.verbosity = options['verbosity']
+        self.timings = []
+        reported = time.monotonic()
+        try:
+            while True:
+                # Connections are recycled between jobs like between
+                # requests, according to CONN_MAX_AGE.
+                close_old_connections()
+                job = render_queue.claim()
+                if job is not None:
+                    self.render(job)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+
+                if time.monotonic() - reported >= options['report_interval']:
+                    self.report()
+                    reported = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        self.report()
+
+    def render(self, job):
+        """Render the mindmap of a job and complete it."""
+        start = time.perf_counter()
+        try:
+            version = snapshots.render(job.mindmap_id)
+        except MindMap.DoesNotExist:
+            return
+        except Exception as exc:
+            # The job is retried once its lease expires.
+            self.stderr.write(
+                f'Rendering mindmap {job.mindmap_id} failed: {exc!r}'
+            )
+            return
+        render_queue.complete(job, version)
+
+        seconds = time.perf_counter() - start
+        self.timings.append(seconds)
+        if self.verbosity >= 2:
+            self.stdout.write(
+                f'Rendered mindmap {job.mindmap_id} version {version} in '
+                f'{seconds * 1000:.1f} ms.'
+            )
+
+    def report(self):
+        """Write the render latencies since the last report."""
+        if self.timings:
+            timings = sorted(self.timings)
+            self.stdout.write(
+                f'Rendered {len(timings)} mindmaps: '
+                f'median {statistics.median(timings) * 1000:.1f} ms, '
+                f'max {timings[-1] * 1000:.1f} ms.'
+            )
+            self.timings = []
+        self.report_queue()
+
+    def report_queue(self):
+        """Write the depth of the queue."""
+        stats = render_queue.stats()
+        oldest = stats['oldest_seconds']
+        self.stdout.write(
+            f'{stats["queued"]} queued, {stats["due"]} due'
+            + (f', oldest requested {oldest:.1f} s ago.'
+               if oldest is not None else '.')
+        )
@@ -0,0 +1,170 @@
+"""
+Import of pretty printed mindmap outlines.
+
+An outline is the text rendering of a mindmap: the title on the first line,
+then one node per line indented with one tab per level, branches ending in
+a slash. Outlines are parsed one line at a time, so arbitrarily large files
+are imported in constant memory. Exports of several mindmaps hold their
+outlines separated by blank lines, and are read back with import_outlines.
+"""
+from django.db import transaction
+
+from core.models import MindMap
+from mindmap import bulk
+from mindmap.parsers import InvalidLine
+
+
+class OutlineError(ValueError):
+    """Raised when an outline cannot be imported at all."""
+
+
+class _OutlineLines:
+    """Numbered lines of one or more outlines, read once."""
+
+    def __init__(self, lines):
+        self.numbered = enumerate(lines, start=1)
+        # Title of the outline following the one being read, once reached.
+        self.next_title = None
+
+
+def _clean_title(line):
+    """Return the title of a mindmap on a line, without a trailing slash."""
+    title = line.rstrip('\r\n').strip()
+    return title[:-1] if title.endswith('/') else title
+
+
+def read_outlines(lines):
+    """Yield the title and an iterator over the leaf items of each outline.
+
+    Outlines exported together are separated by blank lines, so an
+    unindented line after a blank line is the title of the next outline.
+    Leaf items are {path, text} dicts, the text being the name of the leaf
+    since outlines do not include it. Badly indented lines are yielded as
+    InvalidLine. Items an outline left unread are skipped when the next
+    outline is read.
+    """
+    lines = _OutlineLines(lines)
+    title = ''
+    for _, line in lines.numbered:
+        title = _clean_title(line)
+        if title:
+            break
+    if not title:
+        raise OutlineError('The outline has no title.')
+
+    while title:
+        items = _iter_items(lines)
+        yield title, items
+        for _ in items:
+            pass
+        title, lines.next_title = lines.next_title, None
+
+
+def read_outline(lines):
+    """Return the title of the first outline and an iterator over its items.
+
+    The items end where the next outline, if any, starts.
+    """
+    return next(read_outlines(lines))
+
+
+def _iter_items(lines):
+    """Yield the leaf items of the lines below a title."""
+    branches = []
+    after_blank = False
+    for number, line in lines.numbered:
+        line = line.rstrip('\r\n')
+        segment = line.lstrip('\t')
+        if not segment.strip():
+            after_blank = True
+            continue
+
+        depth = len(line) - len(segment)
+        if depth == 0 and after_blank and _clean_title(segment):
+            lines.next_title = _clean_title(segment)
+            return
+        after_blank = False
+        if depth == 0:
+            yield InvalidLine(f'Line {number}: must be indented.')
+            continue
+        if depth > len(branches) + 1:
+            yield InvalidLine(
+                f'Line {number}: indented more than one level below its '
+                'parent.'
+            )
+            continue
+
+        del branches[depth - 1:]
+        segment = segment.strip()
+        if segment.endswith('/'):
+            branches.append(segment[:-1])
+        else:
+            yield {'path': '/'.join(branches + [segment]), 'text': segment}
+
+
+def _create_mindmap(user, title, items):
+    """Create a mindmap for user with the leaf items of an outline.
+
+    Returns the mindmap, or None, the number of leafs created and the
+    errors of the invalid items. Nothing is created if there are errors.
+    """
+    max_length = MindMap._meta.get_field('title').max_length
+    if len(title) > max_length:
+        raise OutlineError(
+            f'The title may not be longer than {max_length} characters.'
+        )
+
+    with transaction.atomic():
+        mindmap = MindMap.objects.create(user=user, title=title)
+        created, errors = bulk.create_leafs(mindmap, items)
+        if errors:
+            transaction.set_rollback(True)
+            return None, 0, errors
+    return mindmap, created, errors
+
+
+def import_outline(user, lines, title=None):
+    """Create a mindmap for user from the lines of an outline.
+
+    Returns the mindmap, the number of leafs created and the errors of
+    the invalid items. Nothing is created if there are errors, and lines
+    holding several outlines are rejected.
+    """
+    outlines = read_outlines(lines)
+    outline_title, items = next(outlines)
+    with transaction.atomic():
+        mindmap, created, errors = _create_mindmap(
+            user, title or outline_title, items,
+        )
+        if next(outlines, None) is not None:
+            raise OutlineError(
+                'The outline holds more than one mindmap, import them '
+                'one at a time.'
+            )
+    return mindmap, created, errors
+
+
+def import_outlines(user, lines):
+    """Create a mindmap for user from each outline of lines.
+
+    Reads back outline exports. Returns the mindmaps, the number of leafs
+    created and the errors of the invalid items, with the index of their
+    outline. Nothing is created if there are errors.
+    """
+    mindmaps = []
+    created = 0
+    errors = []
+    with transaction.atomic():
+        for index, (title, items) in enumerate(read_outlines(lines)):
+            mindmap, outline_created, outline_errors = _create_mindmap(
+                user, title, items,
+            )
+            mindmaps.append(mindmap)
+            created += outline_created
+            errors.extend(
+                {'outline': index, **error} for error in outline_errors
+            )
+        if errors:
+            transaction.set_rollback(True)
+            return [], 0, errors
+    return mindmaps, created, errors
@@ -0,0 +1,203 @@
+"""
+Pagination for MindMap APIs.
+
+Cursor pagination seeks to the position encoded in the cursor instead of
+counting rows with OFFSET, so every page costs the same as the first one.
+"""
+import json
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    _positive_int,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import (
+    remove_query_param,
+    replace_query_param,
+)
+
+
+class BaseCursorPagination(CursorPagination):
+    """Cursor pagination with a page size chosen by the client."""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class MindMapCursorPagination(BaseCursorPagination):
+    """Paginate mindmaps from the newest to the oldest."""
+    ordering = '-id'
+
+
+class CompositeCursorPagination(BaseCursorPagination):
+    """Cursor pagination seeking to the values of every ordering field.
+
+    DRF's cursors only hold the value of the first ordering field, and page
+    through rows sharing it with OFFSET. Cursors here hold the values of
+    every field, so when the last one is unique, pages always seek to a
+    distinct position and never use OFFSET.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(current_position, reverse),
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering,
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_position_filter(self, position, reverse):
+        """Return the filter of the rows after a position in the ordering.
+
+        For an ordering (a, b) that is a > x OR (a = x AND b > y), along
+        with a >= x, which lets the database seek the index on (a, b).
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookups = []
+        for order, value in zip(self.ordering, values):
+            descending = order.startswith('-') != reverse
+            lookups.append((order.lstrip('-'), descending, value))
+
+        after = Q()
+        for index, (field, descending, value) in enumerate(lookups):
+            equal = [Q(**{name: value}) for name, _, value in lookups[:index]]
+            lookup = 'lt' if descending else 'gt'
+            after |= reduce(
+                lambda left, right: left & right,
+                equal,
+                Q(**{f'{field}__{lookup}': value}),
+            )
+        field, descending, value = lookups[0]
+        lookup = 'lte' if descending else 'gte'
+        return Q(**{f'{field}__{lookup}': value}) & after
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field = order.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[field])
+            else:
+                values.append(getattr(instance, field))
+        return json.dumps(values, separators=(',', ':'))
+
+
+class LeafCursorPagination(CompositeCursorPagination):
+    """Paginate leafs by descending path, then id for leafs sharing it."""
+    ordering = ('-path', '-id')
+
+
+class LeafSearchPagination(BasePagination):
+    """Paginate ranked search results by page number.
+
+    Ranks are not a column that cursors could seek to, so pages are read
+    with OFFSET. Results are not counted: one more result than the page
+    size is read to tell whether there is a next page.
+    """
+    page_size = 20
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = _positive_int(
+                request.query_params.get(self.page_query_param, 1),
+                strict=True,
+            )
+            self.size = _positive_int(
+                request.query_params.get(
+                    self.page_size_query_param, self.page_size,
+                ),
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except ValueError:
+            raise NotFound('Invalid page.')
+
+        offset = (self.page - 1) * self.size
+        results = list(queryset[offset:offset + self.size + 1])
+        self.has_next = len(results) > self.size
+        return results[:self.size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
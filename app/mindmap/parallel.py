@@ -0,0 +1,156 @@
+"""
+Rendering of many mindmaps over a pool of processes.
+
+Rendering is plain Python and holds the GIL, so exports and audits of many
+mindmaps would use a single core if rendered one after another. The trees
+are built and rendered in worker processes instead, while the leafs are
+read from the database in the parent.
+
+Leafs are sent to the workers packed, as the title of the mindmap with its
+paths and texts joined by NUL characters, which Postgres cannot store in
+text columns. Three strings pickle much faster and smaller than one tuple
+per leaf. Small mindmaps are batched together so that each task carries
+about BATCH_LEAFS leafs, and only a few batches per worker are in flight at
+a time, so memory stays bounded however many mindmaps are rendered.
+Results are yielded in the order of the mindmaps.
+"""
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from mindmap.compact import CompactTree
+from mindmap.render import FORMAT_TEXT
+
+SEPARATOR = '\0'
+BATCH_LEAFS = 20000
+# Batches submitted per worker ahead of the one being yielded.
+BATCHES_IN_FLIGHT = 4
+LEAF_CHUNK_SIZE = 2000
+
+
+def pack(title, leafs):
+    """Pack the title and (path, text) pairs of a mindmap for a worker."""
+    paths = []
+    texts = []
+    for path, text in leafs:
+        paths.append(path)
+        texts.append(text)
+    return (
+        title,
+        len(paths),
+        SEPARATOR.join(paths),
+        SEPARATOR.join(texts),
+    )
+
+
+def unpack(packed):
+    """Return the title and (path, text) pairs of a packed mindmap."""
+    title, count, paths, texts = packed
+    if not count:
+        return title, ()
+    return title, zip(paths.split(SEPARATOR), texts.split(SEPARATOR))
+
+
+def render_packed(packed, fmt=FORMAT_TEXT):
+    """Return the tree of a packed mindmap rendered in a format."""
+    tree = CompactTree.from_leafs(*unpack(packed))
+    if fmt == FORMAT_TEXT:
+        return tree.pretty_print()
+    return tree.to_json(fmt)
+
+
+def _render_batch(fmt, batch):
+    """Render a batch of packed mindmaps in a worker."""
+    return [render_packed(packed, fmt) for packed in batch]
+
+
+def _batches(packs, batch_leafs):
+    """Group packed mindmaps into batches of about batch_leafs leafs."""
+    batch = []
+    size = 0
+    for packed in packs:
+        batch.append(packed)
+        size += packed[1] + 1
+        if size >= batch_leafs:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def default_workers():
+    """Return the number of cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def render_packs(packs, fmt=FORMAT_TEXT, workers=None,
+                 batch_leafs=BATCH_LEAFS):
+    """Yield the renderings of packed mindmaps, in order.
+
+    With a single worker, mindmaps are rendered in this process.
+    """
+    if workers is None:
+        workers = default_workers()
+    batches = _batches(packs, batch_leafs)
+    if workers <= 1:
+        for batch in batches:
+            yield from _render_batch(fmt, batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_render_batch, fmt, batch))
+            if len(pending) >= workers * BATCHES_IN_FLIGHT:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_packs(mindmaps):
+    """Yield the id and packed leafs of mindmaps, in id order.
+
+    The leafs of every mindmap are read with a single server-side cursor.
+    """
+    # Imported here, so that workers started with spawn instead of fork
+    # can import this module without setting up Django.
+    from core.models import Leaf
+
+    mindmaps = mindmaps.order_by('id').values_list('id', 'title')
+    leafs = Leaf.objects.filter(
+        mindmap__in=mindmaps.values('id'),
+    ).order_by('mindmap', 'id').values_list('mindmap', 'path', 'text')
+    groups = itertools.groupby(
+        leafs.iterator(chunk_size=LEAF_CHUNK_SIZE),
+        key=lambda leaf: leaf[0],
+    )
+    group_id, group = next(groups, (None, None))
+    for mindmap_id, title in mindmaps.iterator(chunk_size=LEAF_CHUNK_SIZE):
+        if group_id != mindmap_id:
+            yield mindmap_id, pack(title, ())
+            continue
+        yield mindmap_id, pack(title, (leaf[1:] for leaf in group))
+        group_id, group = next(groups, (None, None))
+
+
+def render_mindmaps(mindmaps, fmt=FORMAT_TEXT, workers=None):
+    """Yield the id and rendered tree of mindmaps, in id order.
+
+    Trees are built from the leafs, without reading or storing snapshots.
+    """
+    packs = iter_packs(mindmaps)
+    # The ids stay in the parent, which reads them as the packs are sent.
+    ids = deque()
+
+    def packed():
+        for mindmap_id, packed in packs:
+            ids.append(mindmap_id)
+            yield packed
+
+    for body in render_packs(packed(), fmt, workers):
+        yield ids.popleft(), body
@@ -0,0 +1,60 @@
+"""
+Parsers for MindMap APIs.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class InvalidLine:
+    """Line of a newline delimited JSON body that is not valid JSON."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def iter_ndjson(lines, encoding='utf-8'):
+    """Yield the item on each non-blank line, or an InvalidLine."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line.decode(encoding))
+        except (UnicodeDecodeError, ValueError) as exc:
+            yield InvalidLine(f'Invalid JSON: {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline delimited JSON lazily, one line at a time."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None:
+            return iter(())
+        return iter_ndjson(stream, encoding)
+
+
+def iter_text_lines(lines, encoding='utf-8'):
+    """Decode each line of a byte stream."""
+    for line in lines:
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'Invalid {encoding} text: {exc}')
+
+
+class PlainTextParser(BaseParser):
+    """Parse a text body lazily into lines."""
+    media_type = 'text/plain'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None:
+            return iter(())
+        return iter_text_lines(stream, encoding)
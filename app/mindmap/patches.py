@@ -0,0 +1,148 @@
+"""
+Batched edits of mindmaps.
+
+A patch is an ordered list of operations made against a base version of a
+mindmap:
+
+    {"op": "add", "path": "i/like", "text": "turtles"}
+    {"op": "edit", "path": "i/like", "text": "tortoises"}
+    {"op": "delete", "path": "i"}
+    {"op": "move", "source": "i", "destination": "you"}
+
+The whole patch is applied in one transaction, under the lock of the
+MindMap row, and is rejected if the mindmap has changed since the base
+version. Runs of adds are written with one bulk_create() and runs of edits
+with one UPDATE, every delete and move is a single statement, and the
+version is incremented once for the whole patch.
+"""
+from django.db import transaction
+from django.db.models import (
+    Case,
+    F,
+    Value,
+    When,
+)
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import (
+    branches,
+    events,
+    snapshots,
+)
+from mindmap.branches import BranchError
+
+OP_ADD = 'add'
+OP_EDIT = 'edit'
+OP_DELETE = 'delete'
+OP_MOVE = 'move'
+OPERATIONS = (OP_ADD, OP_EDIT, OP_DELETE, OP_MOVE)
+MAX_OPERATIONS = 1000
+
+
+class PatchConflict(Exception):
+    """Raised when a mindmap changed since the base version of a patch."""
+
+    def __init__(self, version):
+        super().__init__(f'The mindmap is at version {version}.')
+        self.version = version
+
+
+def _add(mindmap, operations):
+    """Create a leaf for each add operation."""
+    leafs = [
+        Leaf(
+            user_id=mindmap.user_id,
+            mindmap=mindmap,
+            path=operation['path'],
+            text=operation['text'],
+        )
+        for operation in operations
+    ]
+    for leaf in leafs:
+        leaf.normalize()
+    Leaf.objects.bulk_create(leafs)
+    return [1] * len(leafs)
+
+
+def _edit(mindmap, operations):
+    """Set the text of the leafs at the path of each edit operation."""
+    texts = {}
+    for operation in operations:
+        texts[operation['path']] = operation['text']
+    leafs = Leaf.objects.filter(mindmap=mindmap, path__in=texts)
+    counts = dict.fromkeys(texts, 0)
+    for path in leafs.values_list('path', flat=True):
+        counts[path] += 1
+    leafs.update(text=Case(
+        *(When(path=path, then=Value(text)) for path, text in texts.items()),
+        default=F('text'),
+    ))
+    return [counts[operation['path']] for operation in operations]
+
+
+def _delete(mindmap, operation):
+    """Delete the branch of a delete operation."""
+    return [branches.delete_leafs(mindmap, operation['path'])]
+
+
+def _move(mindmap, operation):
+    """Move the branch of a move operation."""
+    return [branches.move_leafs(
+        mindmap,
+        operation['source'],
+        operation['destination'],
+    )]
+
+
+BATCHED = {OP_ADD: _add, OP_EDIT: _edit}
+SINGLE = {OP_DELETE: _delete, OP_MOVE: _move}
+
+
+def _batches(operations):
+    """Yield the operations in runs of adds or edits, or one by one."""
+    batch = []
+    for operation in operations:
+        if batch and batch[0]['op'] != operation['op']:
+            yield batch
+            batch = []
+        batch.append(operation)
+        if operation['op'] not in BATCHED:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def apply_patch(mindmap, base_version, operations):
+    """Apply operations in order to a mindmap at base_version.
+
+    Operations hold normalized paths. Returns the number of leafs each
+    operation changed and the new version of the mindmap. Raises
+    PatchConflict if the mindmap is not at base_version, and BranchError
+    for invalid operations, in which case nothing is applied.
+    """
+    with transaction.atomic():
+        version = MindMap.objects.select_for_update().values_list(
+            'version', flat=True,
+        ).get(id=mindmap.id)
+        if version != base_version:
+            raise PatchConflict(version)
+
+        counts = []
+        for batch in _batches(operations):
+            op = batch[0]['op']
+            try:
+                if op in BATCHED:
+                    counts.extend(BATCHED[op](mindmap, batch))
+                else:
+                    counts.extend(SINGLE[op](mindmap, batch[0]))
+            except BranchError as exc:
+                raise BranchError(f'Operation {len(counts)}: {exc}')
+
+        version = snapshots.invalidate(mindmap.id)
+        events.publish(mindmap.id, version, events.MINDMAP_PATCHED,
+                       base_version=base_version, operations=operations)
+    return counts, version
@@ -0,0 +1,108 @@
+"""
+Rendering of MindMap trees.
+
+Trees are walked iteratively with an explicit stack, so rendering deep maps
+cannot hit the recursion limit, and text lines are produced lazily so they
+can be streamed to the client as they are rendered.
+
+Besides the pretty printed text, trees render as JSON either nested, or
+flat for very large maps: parallel arrays of parent index, segment and
+text, with nodes numbered in pretty print order.
+"""
+import json
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+FORMAT_TEXT = 'text'
+FORMAT_NESTED = 'json'
+FORMAT_FLAT = 'flat'
+
+
+def iter_lines(root):
+    """Yield the pretty printed lines of the tree under root."""
+    indents = ['']
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if depth == len(indents):
+            indents.append(indents[-1] + '\t')
+        if node.children:
+            yield indents[depth] + node.segment + '/'
+            children = node.sorted_children()
+            children.reverse()
+            depth += 1
+            stack.extend((child, depth) for child in children)
+        else:
+            yield indents[depth] + node.segment
+
+
+def iter_chunks(lines, chunk_size=STREAM_CHUNK_SIZE):
+    """Join newline separated lines into chunks of about chunk_size."""
+    buffer = []
+    size = 0
+    separator = ''
+    for line in lines:
+        buffer.append(separator + line)
+        size += len(line) + 1
+        separator = '\n'
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def pretty_print(root):
+    """Return the pretty printed tree under root."""
+    return '\n'.join(iter_lines(root))
+
+
+def iter_preorder(root):
+    """Yield each node with the index of its parent, in pretty print order.
+
+    Nodes are indexed in the order they are yielded, the root being 0.
+    """
+    stack = [(root, None)]
+    index = 0
+    while stack:
+        node, parent = stack.pop()
+        yield node, parent
+        children = node.sorted_children()
+        children.reverse()
+        stack.extend((child, index) for child in children)
+        index += 1
+
+
+def to_nested(root):
+    """Return the tree as nested {id, segment, text, children} dicts."""
+    nodes = []
+    for node, parent in iter_preorder(root):
+        data = {
+            'id': len(nodes),
+            'segment': node.segment,
+            'text': node.text,
+            'children': [],
+        }
+        if parent is not None:
+            nodes[parent]['children'].append(data)
+        nodes.append(data)
+    return nodes[0]
+
+
+def to_flat(root):
+    """Return the tree as parallel parent, segment and text arrays."""
+    parents = []
+    segments = []
+    texts = []
+    for node, parent in iter_preorder(root):
+        parents.append(parent)
+        segments.append(node.segment)
+        texts.append(node.text)
+    return {'parent': parents, 'segment': segments, 'text': texts}
+
+
+def to_json(root, fmt):
+    """Return the tree under root as compact JSON in a format."""
+    data = to_flat(root) if fmt == FORMAT_FLAT else to_nested(root)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
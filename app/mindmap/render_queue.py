@@ -0,0 +1,101 @@
+"""
+Queue of mindmaps to pre-render.
+
+Every new version of a mindmap queues a RenderJob, in the transaction of
+the write. The render_worker command claims due jobs, renders the JSON
+trees of the mindmap into its snapshot, and completes the job unless the
+mindmap changed again meanwhile. The queue lives in the database, so no
+broker is needed, and any number of workers can share it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    DateTimeField,
+    ExpressionWrapper,
+    F,
+    Min,
+    Value,
+)
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from core.models import RenderJob
+
+
+def enqueue(mindmap_id, version):
+    """Queue a render of a new version of a mindmap.
+
+    A job already queued is pushed back by the debounce delay, up to the
+    maximum delay after it was first requested. Must be called with the
+    MindMap row locked, as writers do.
+    """
+    now = timezone.now()
+    run_after = now + timedelta(seconds=settings.RENDER_DEBOUNCE_SECONDS)
+    max_delay = timedelta(seconds=settings.RENDER_MAX_DELAY_SECONDS)
+    updated = RenderJob.objects.filter(mindmap_id=mindmap_id).update(
+        version=version,
+        run_after=Least(
+            Value(run_after),
+            ExpressionWrapper(
+                F('requested_at') + max_delay,
+                output_field=DateTimeField(),
+            ),
+        ),
+    )
+    if not updated:
+        RenderJob.objects.create(
+            mindmap_id=mindmap_id,
+            version=version,
+            requested_at=now,
+            run_after=run_after,
+        )
+
+
+def claim():
+    """Claim the next due job for the lease time and return it, or None.
+
+    Jobs claimed by other workers are skipped without waiting.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = RenderJob.objects.select_for_update(skip_locked=True).filter(
+            run_after__lte=now,
+        ).order_by('run_after').first()
+        if job is None:
+            return None
+        job.run_after = now + timedelta(
+            seconds=settings.RENDER_LEASE_SECONDS,
+        )
+        job.save(update_fields=['run_after'])
+    return job
+
+
+def complete(job, version):
+    """Remove a job once version of its mindmap is rendered.
+
+    Jobs requeued for a later version are kept, and debounced again as if
+    first requested now, instead of from the request already rendered.
+    """
+    now = timezone.now()
+    jobs = RenderJob.objects.filter(mindmap_id=job.mindmap_id)
+    jobs.filter(version__gt=version).update(
+        requested_at=now,
+        run_after=now + timedelta(seconds=settings.RENDER_DEBOUNCE_SECONDS),
+    )
+    jobs.filter(version__lte=version).delete()
+
+
+def stats():
+    """Return the depth of the queue, the jobs due and the oldest request."""
+    now = timezone.now()
+    jobs = RenderJob.objects.all()
+    oldest = jobs.aggregate(oldest=Min('requested_at'))['oldest']
+    return {
+        'queued': jobs.count(),
+        'due': jobs.filter(run_after__lte=now).count(),
+        'oldest_seconds': (
+            (now - oldest).total_seconds() if oldest is not None else None
+        ),
+    }
@@ -0,0 +1,17 @@
+"""
+Renderers for MindMap APIs.
+"""
+from rest_framework.renderers import BaseRenderer
+
+
+class PlainTextRenderer(BaseRenderer):
+    """Render pretty printed trees as text."""
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors are raised as dicts of messages.
+        return str(data).encode(self.charset)
@@ -2,14 +2,68 @@
 Serializers for MindMap API
 """
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
 from core.models import (
     MindMap,
     Leaf,
+    normalize_path,
     )
+from mindmap import (
+    export,
+    patches,
+)
 
+NESTED_FULL = 'full'
+NESTED_COMPACT = 'compact'
 
-class LeafSerializer(serializers.ModelSerializer):
+
+def requested_fields(request):
+    """Return the fields listed in ?fields=, or None to keep them all."""
+    if request is None or not request.query_params.get('fields'):
+        return None
+    return {
+        name.strip()
+        for name in request.query_params['fields'].split(',')
+        if name.strip()
+    }
+
+
+class SparseFieldsMixin:
+    """Only serialize the fields requested with ?fields=.
+
+    Reads drop the other fields before anything is serialized. Writes keep
+    every field for validation and saving, and only trim the output.
+    """
+    sparse_fields = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = requested_fields(request)
+        if fields is None:
+            return
+
+        unknown = fields - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'
+            })
+        if request.method not in SAFE_METHODS:
+            self.sparse_fields = fields
+            return
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.sparse_fields is not None:
+            for name in set(data) - self.sparse_fields:
+                del data[name]
+        return data
+
+
+class LeafSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for leafs."""
 
     class Meta:
@@ -18,8 +72,27 @@ class LeafSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def to_representation(self, instance):
-        self.fields['mindmap'] = MindMapSerializer(read_only=True)
-        return super(LeafSerializer, self).to_representation(instance)
+        data = super(LeafSerializer, self).to_representation(instance)
+        if 'mindmap' in data:
+            data['mindmap'] = self.mindmap_representation(instance)
+        return data
+
+    def mindmap_representation(self, instance):
+        """Return the nested mindmap of a leaf.
+
+        Representations are cached in the serializer context, so each
+        mindmap is only serialized once when listing many leafs.
+        """
+        if instance.mindmap_id is None:
+            return None
+
+        nested = self.context.get('nested', NESTED_FULL)
+        cache = self.context.setdefault('mindmap_representations', {})
+        key = (nested, instance.mindmap_id)
+        if key not in cache:
+            serializer_class = NESTED_SERIALIZERS[nested]
+            cache[key] = serializer_class(instance.mindmap).data
+        return cache[key]
 
 
 class LeafRetrieveSerializer(serializers.ModelSerializer):
@@ -30,10 +103,117 @@ class LeafRetrieveSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class MindMapSerializer(serializers.ModelSerializer):
+class LeafSearchSerializer(serializers.ModelSerializer):
+    """Serializer for leafs found by a search."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Leaf
+        fields = ['id', 'mindmap', 'path', 'text', 'rank']
+        read_only_fields = fields
+
+
+class MindMapSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for MindMaps"""
     leafs = serializers.StringRelatedField(read_only=True, many=True)
 
     class Meta:
         model = MindMap
-        fields = ['id', 'title', 'leafs', ]
+        fields = ['id', 'title', 'version', 'leafs', ]
+        read_only_fields = ['version']
+
+
+class SubtreeQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of a subtree."""
+    path = serializers.CharField(required=False, default='')
+    depth = serializers.IntegerField(required=False, min_value=0)
+
+
+class MoveBranchSerializer(serializers.Serializer):
+    """Serializer for moving a branch of a mindmap."""
+    source = serializers.CharField(max_length=255)
+    destination = serializers.CharField(max_length=255)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of a leaf search."""
+    q = serializers.CharField(max_length=255)
+    mindmap = serializers.IntegerField(required=False, min_value=1)
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of an export."""
+    output = serializers.ChoiceField(
+        choices=export.FORMATS,
+        default=export.FORMAT_NDJSON,
+    )
+    compression = serializers.ChoiceField(
+        choices=export.COMPRESSIONS,
+        required=False,
+    )
+
+
+class BranchQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of a branch."""
+    path = serializers.CharField(max_length=255)
+
+
+class PatchOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a mindmap patch."""
+    op = serializers.ChoiceField(choices=patches.OPERATIONS)
+    path = serializers.CharField(max_length=255, required=False)
+    text = serializers.CharField(max_length=255, required=False)
+    source = serializers.CharField(max_length=255, required=False)
+    destination = serializers.CharField(max_length=255, required=False)
+
+    FIELDS = {
+        patches.OP_ADD: ('path', 'text'),
+        patches.OP_EDIT: ('path', 'text'),
+        patches.OP_DELETE: ('path',),
+        patches.OP_MOVE: ('source', 'destination'),
+    }
+    PATH_FIELDS = ('path', 'source', 'destination')
+
+    def validate(self, attrs):
+        """Keep the fields of the operation, with normalized paths."""
+        operation = {'op': attrs['op']}
+        errors = {}
+        for name in self.FIELDS[attrs['op']]:
+            value = attrs.get(name)
+            if name in self.PATH_FIELDS and value is not None:
+                value = normalize_path(value)
+            if not value:
+                errors[name] = ['This field is required.']
+            operation[name] = value
+        if errors:
+            raise serializers.ValidationError(errors)
+        return operation
+
+
+class PatchSerializer(serializers.Serializer):
+    """Serializer for a patch of a mindmap."""
+    base_version = serializers.IntegerField(min_value=1)
+    operations = PatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        """Limit the number of operations of a patch."""
+        if len(value) > patches.MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f'Ensure there are no more than {patches.MAX_OPERATIONS} '
+                f'operations.'
+            )
+        return value
+
+
+class MindMapCompactSerializer(serializers.ModelSerializer):
+    """Serializer for MindMaps nested without their leafs."""
+
+    class Meta:
+        model = MindMap
+        fields = ['id', 'title']
+
+
+NESTED_SERIALIZERS = {
+    NESTED_FULL: MindMapSerializer,
+    NESTED_COMPACT: MindMapCompactSerializer,
+}
@@ -0,0 +1,88 @@
+"""
+Versions and change events of leafs and mindmaps saved one at a time.
+
+Saving or deleting a leaf, or renaming a mindmap, through its model, from
+the API, the admin or a shell, increments the version of the mindmaps it
+changes, which marks their snapshots stale, and publishes its events.
+Set-based writes, such as bulk inserts, patches and branch operations,
+send no signals and do so themselves.
+"""
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    Leaf,
+    MindMap,
+    leaf_deleted,
+)
+from mindmap import (
+    events,
+    snapshots,
+)
+
+
+@receiver(post_save, sender=Leaf)
+def leaf_saved(sender, instance, created, raw, **kwargs):
+    """Publish a saved leaf to its mindmaps."""
+    if raw:
+        return
+    leaf = instance
+    with transaction.atomic(savepoint=False):
+        if created:
+            version = snapshots.invalidate(leaf.mindmap_id)
+            events.publish(leaf.mindmap_id, version, events.LEAF_ADDED,
+                           id=leaf.id, path=leaf.path, text=leaf.text)
+            return
+
+        if leaf.saved_location is None:
+            # Where the leaf was is unknown, so its mindmaps are reloaded.
+            version = snapshots.invalidate(leaf.mindmap_id)
+            events.publish(leaf.mindmap_id, version, events.MINDMAP_RESET)
+            return
+
+        old_mindmap_id, old_path = leaf.saved_location
+        if old_mindmap_id == leaf.mindmap_id:
+            version = snapshots.invalidate(leaf.mindmap_id)
+            events.publish(leaf.mindmap_id, version, events.LEAF_UPDATED,
+                           id=leaf.id, old_path=old_path,
+                           path=leaf.path, text=leaf.text)
+            return
+
+        version = snapshots.invalidate(old_mindmap_id)
+        events.publish(old_mindmap_id, version, events.LEAF_REMOVED,
+                       id=leaf.id, path=old_path)
+        version = snapshots.invalidate(leaf.mindmap_id)
+        events.publish(leaf.mindmap_id, version, events.LEAF_ADDED,
+                       id=leaf.id, path=leaf.path, text=leaf.text)
+
+
+@receiver(leaf_deleted, sender=Leaf)
+def leaf_removed(sender, instance, leaf_id, **kwargs):
+    """Publish a deleted leaf to its mindmap."""
+    with transaction.atomic(savepoint=False):
+        version = snapshots.invalidate(instance.mindmap_id)
+        events.publish(instance.mindmap_id, version, events.LEAF_REMOVED,
+                       id=leaf_id, path=instance.path)
+
+
+@receiver(post_save, sender=MindMap)
+def mindmap_saved(sender, instance, created, raw, update_fields, **kwargs):
+    """Publish the title of a saved mindmap, the root of its tree."""
+    if created or raw:
+        return
+    if update_fields is not None and 'title' not in update_fields:
+        return
+    with transaction.atomic(savepoint=False):
+        instance.version = snapshots.invalidate(instance.id)
+        events.publish(instance.id, instance.version,
+                       events.MINDMAP_RENAMED, title=instance.title)
+
+
+@receiver(post_delete, sender=MindMap)
+def mindmap_deleted(sender, instance, **kwargs):
+    """Tell the subscribers of a deleted mindmap."""
+    events.publish(instance.id, None, events.MINDMAP_DELETED)
@@ -0,0 +1,124 @@
+"""
+Pre-rendered trees of MindMaps.
+
+Each MindMap keeps its tree, pretty printed and as nested and flat JSON, in
+a MindMapSnapshot row, along with the version of the mindmap it was
+rendered from. Writes never read or rewrite the snapshot: they increment
+the version of the MindMap, which marks the snapshot stale and identifies
+the new tree in caches and ETags, and queue a render of the new version by
+the render worker. A write thus costs the same whatever the size of the
+mindmap, and a burst of writes is rendered once.
+
+Reads serve the snapshot while it is of the current version. Until the
+worker has caught up, the tree is built from the leafs and rendered during
+the request instead.
+"""
+from django.db.models import F
+
+from core.models import (
+    Leaf,
+    MindMap,
+    MindMapSnapshot,
+)
+from mindmap import render_queue
+from mindmap.compact import CompactTree
+from mindmap.render import (
+    FORMAT_FLAT,
+    FORMAT_NESTED,
+    FORMAT_TEXT,
+)
+
+# Snapshot fields holding the renderings of the tree in each format.
+RENDERED_FIELDS = {
+    FORMAT_TEXT: 'text',
+    FORMAT_NESTED: 'nested',
+    FORMAT_FLAT: 'flat',
+}
+
+
+def invalidate(mindmap_id):
+    """Mark the snapshot of a mindmap stale after a change to its tree.
+
+    Increments the version of the mindmap, locking its row until the end of
+    the transaction, and queues a render of the new version. Returns the
+    new version.
+    """
+    if mindmap_id is None:
+        return None
+
+    MindMap.objects.filter(id=mindmap_id).update(version=F('version') + 1)
+    version = MindMap.objects.values_list('version', flat=True).get(
+        id=mindmap_id
+    )
+    render_queue.enqueue(mindmap_id, version)
+    return version
+
+
+def build_tree(mindmap_id):
+    """Return the current version of a mindmap and its tree.
+
+    The version is read before the leafs, so the tree is never older than
+    the version. A tree built from newer leafs is never served for its
+    version, as the mindmap is already at a later one.
+    """
+    title, version = MindMap.objects.values_list('title', 'version').get(
+        id=mindmap_id,
+    )
+    tree = CompactTree.from_leafs(
+        title,
+        Leaf.objects.filter(mindmap_id=mindmap_id).values_list('path', 'text'),
+    )
+    return version, tree
+
+
+def render_tree(tree, fmt):
+    """Return a tree rendered in a format."""
+    if fmt == FORMAT_TEXT:
+        return tree.pretty_print()
+    return tree.to_json(fmt)
+
+
+def get_body(mindmap, fmt):
+    """Return the tree of a mindmap rendered in a format.
+
+    The rendering stored in the snapshot is used when it is of the current
+    version. Otherwise the tree is built and rendered now. Sets
+    mindmap.version to the version rendered.
+    """
+    version, rendered_version, body = MindMap.objects.filter(
+        id=mindmap.id,
+    ).values_list(
+        'version',
+        'snapshot__rendered_version',
+        f'snapshot__{RENDERED_FIELDS[fmt]}',
+    ).get()
+    mindmap.version = version
+    if rendered_version == version:
+        return body
+
+    mindmap.version, tree = build_tree(mindmap.id)
+    return render_tree(tree, fmt)
+
+
+def render(mindmap_id):
+    """Store the renderings of the current tree of a mindmap.
+
+    Returns the version rendered. Renderings of an older version than the
+    stored ones are dropped.
+    """
+    version, tree = build_tree(mindmap_id)
+    fields = {
+        field: render_tree(tree, fmt)
+        for fmt, field in RENDERED_FIELDS.items()
+    }
+    fields['rendered_version'] = version
+    updated = MindMapSnapshot.objects.filter(
+        mindmap_id=mindmap_id,
+        rendered_version__lt=version,
+    ).update(**fields)
+    if not updated:
+        MindMapSnapshot.objects.get_or_create(
+            mindmap_id=mindmap_id,
+            defaults=fields,
+        )
+    return version
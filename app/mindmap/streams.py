@@ -0,0 +1,202 @@
+"""
+Server-Sent Events streams of mindmap changes.
+
+    GET /api/mindmap/mindmaps/<id>/events/
+
+streams the change events of a mindmap as they are published, so clients
+can patch their copy of the tree instead of polling and reloading it. The
+stream opens with a ready event holding the current version, and is kept
+alive with comments while the mindmap is idle. Browsers' EventSource cannot
+set headers, so instead of the token in the Authorization header, a ticket
+from POST /api/mindmap/mindmaps/<id>/events/ticket/ may be passed as
+?ticket=. API tokens are never accepted in the URL, which ends up in access
+logs.
+
+Streams are long lived and only served under ASGI, where they hold no
+thread: EventStreamRouter sends their requests here and everything else to
+Django.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from django.contrib.auth import get_user_model
+
+from core.models import MindMap
+from mindmap import (
+    events,
+    tickets,
+)
+from mindmap.async_views import database_sync_to_async
+from mindmap.broker import get_broker
+from user.authentication import CachedTokenAuthentication
+
+EVENTS_PATH = re.compile(r'^/api/mindmap/mindmaps/(?P<pk>\d+)/events/$')
+HEARTBEAT_INTERVAL = 15
+
+
+def format_event(event, name, event_id=None):
+    """Return an event encoded for an event stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append(f'data: {json.dumps(event, separators=(",", ":"))}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def request_token(scope):
+    """Return the API token of a request, or None."""
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            keyword, _, key = value.decode('latin1').partition(' ')
+            if keyword == 'Token' and key:
+                return key.strip()
+    return None
+
+
+def request_ticket(scope):
+    """Return the stream ticket of a request, or None."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+    return query.get('ticket', [None])[0]
+
+
+def get_ticket_user(ticket, mindmap_id):
+    """Return the active user of a stream ticket for a mindmap."""
+    try:
+        user_id = tickets.check(ticket, mindmap_id)
+    except tickets.TicketError as exc:
+        raise AuthenticationFailed(str(exc))
+    user = get_user_model().objects.filter(id=user_id).first()
+    if user is None:
+        raise AuthenticationFailed('Invalid ticket.')
+    return user
+
+
+def get_version(mindmap_id, key=None, ticket=None):
+    """Return the version of a mindmap of the user of a token or ticket.
+
+    Returns None when the mindmap does not exist or belongs to someone
+    else, and raises AuthenticationFailed for invalid credentials.
+    """
+    if key is not None:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+    else:
+        user = get_ticket_user(ticket, mindmap_id)
+    if not user.is_active:
+        raise AuthenticationFailed('User inactive or deleted.')
+    return MindMap.objects.filter(
+        id=mindmap_id,
+        user=user,
+    ).values_list('version', flat=True).first()
+
+
+async def send_error(send, status, detail):
+    """Send a JSON error response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}).encode(),
+    })
+
+
+async def wait_for_disconnect(receive):
+    """Return once the client has disconnected."""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def mindmap_events(scope, receive, send, mindmap_id):
+    """Stream the change events of a mindmap to a client."""
+    key = request_token(scope)
+    ticket = request_ticket(scope)
+    if key is None and ticket is None:
+        await send_error(send, 401,
+                         'Authentication credentials were not provided.')
+        return
+
+    # Subscribe before reading the version, so that no event committed in
+    # between is missed. Clients skip events older than the ready event.
+    subscription = await get_broker().subscribe(events.channel(mindmap_id))
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        try:
+            version = await database_sync_to_async(get_version)(
+                mindmap_id, key=key, ticket=ticket,
+            )
+        except AuthenticationFailed as exc:
+            await send_error(send, 401, str(exc.detail))
+            return
+        if version is None:
+            await send_error(send, 404, 'Not found.')
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': format_event({'version': version}, 'ready', version),
+            'more_body': True,
+        })
+        while True:
+            get = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if get not in done:
+                get.cancel()
+                if disconnect in done:
+                    return
+                body = b': keep-alive\n\n'
+            else:
+                event = get.result()
+                body = format_event(event, event['event'], event['version'])
+                if event['event'] == events.MINDMAP_DELETED:
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+    finally:
+        subscription.close()
+        disconnect.cancel()
+
+
+class EventStreamRouter:
+    """ASGI application sending event stream requests to mindmap_events.
+
+    Every other request is passed on to application.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                await mindmap_events(
+                    scope, receive, send, int(match.group('pk')),
+                )
+                return
+        await self.application(scope, receive, send)
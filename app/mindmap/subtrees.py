@@ -0,0 +1,85 @@
+"""
+Reading the leafs of a subtree, down to a depth.
+
+A subtree cut at a depth needs the leafs down to that depth, and only the
+distinct paths of deeper leafs, cut to the depth. Those are found with a
+skip scan of the (mindmap, path) pattern index: each step reads the first
+deeper leaf after the previous cut path, then jumps past every path under
+it. The number of index probes grows with the number of cut paths, not
+with the number of leafs below them.
+"""
+from django.db import connection
+
+from core.models import (
+    Leaf,
+    PATH_SEPARATOR,
+    path_depth,
+)
+
+# Strings starting with path + '/' sort before path + '0' byte-wise.
+AFTER_SEPARATOR = chr(ord(PATH_SEPARATOR) + 1)
+
+CUT_PATHS_SQL = """
+WITH RECURSIVE cut (path) AS (
+    SELECT ({first})
+    UNION ALL
+    SELECT ({next}) FROM cut WHERE cut.path IS NOT NULL
+)
+SELECT path FROM cut WHERE path IS NOT NULL
+"""
+
+FIRST_DEEPER_SQL = """
+SELECT array_to_string((string_to_array(path, '{separator}'))[1:%s],
+                       '{separator}')
+FROM {table}
+WHERE mindmap_id = %s AND depth > %s{bounds}
+ORDER BY path USING ~<~
+LIMIT 1
+"""
+
+
+def cut_paths(mindmap, prefix, stop):
+    """Return the distinct paths of leafs under prefix cut to stop segments.
+
+    Only leafs deeper than stop segments are cut.
+    """
+    if not stop:
+        # Every leaf is cut to the root, which a skip scan cannot skip past.
+        deeper = mindmap.leafs.filter(depth__gt=0).exists()
+        return [''] if deeper else []
+
+    bounds = ''
+    params = [stop, mindmap.id, stop]
+    if prefix:
+        bounds = ' AND path ~>=~ %s AND path ~<~ %s'
+        params += [prefix + PATH_SEPARATOR, prefix + AFTER_SEPARATOR]
+    first = FIRST_DEEPER_SQL.format(
+        separator=PATH_SEPARATOR,
+        table=Leaf._meta.db_table,
+        bounds=bounds,
+    )
+    following = FIRST_DEEPER_SQL.format(
+        separator=PATH_SEPARATOR,
+        table=Leaf._meta.db_table,
+        bounds=bounds + ' AND path ~>=~ (cut.path || %s)',
+    )
+    sql = CUT_PATHS_SQL.format(first=first, next=following)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + params + [AFTER_SEPARATOR])
+        return [path for path, in cursor.fetchall()]
+
+
+def subtree_leafs(mindmap, prefix, depth=None):
+    """Return the (path, text) pairs of the subtree under prefix.
+
+    With a depth, leafs more than depth levels below prefix are replaced by
+    their distinct paths cut at that depth, without text.
+    """
+    leafs = mindmap.leafs.subtree(prefix)
+    if depth is None:
+        return leafs.values_list('path', 'text').iterator()
+
+    stop = path_depth(prefix) + depth
+    pairs = list(leafs.filter(depth__lte=stop).values_list('path', 'text'))
+    pairs.extend((path, None) for path in cut_paths(mindmap, prefix, stop))
+    return pairs
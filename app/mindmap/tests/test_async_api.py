@@ -0,0 +1,87 @@
+"""
+Tests for the async mindmap read endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
+
+def tree_url(mindmap_id):
+    """Create and return an async mindmap tree URL."""
+    return reverse('mindmap:async-mindmap-detail', args=[mindmap_id])
+
+
+LEAFS_URL = reverse('mindmap:async-leaf-list')
+
+
+class AsyncReadApiTests(TransactionTestCase):
+    """Test the async endpoints, whose queries run in other threads."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        for path in ['i/like/turtles', 'you']:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=path,
+                text='text',
+            )
+        caches['mindmaps'].clear()
+
+    async def get(self, url, **headers):
+        """Return the response of an authenticated async request.
+
+        The async client of Django 3.2 takes raw header names, and query
+        strings in the URL.
+        """
+        return await self.async_client.get(
+            url,
+            authorization=f'Token {self.token.key}',
+            **headers,
+        )
+
+    async def test_retrieve_tree(self):
+        """Test that the tree is rendered like the sync endpoint."""
+        res = await self.get(tree_url(self.mindmap.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content.decode(),
+                         'Map/\n\ti/\n\t\tlike/\n\t\t\tturtles\n\tyou')
+        self.assertEqual(res['ETag'], f'"{self.mindmap.id}-3-text"')
+
+    async def test_retrieve_not_modified(self):
+        """Test that a matching ETag is answered with a 304."""
+        etag = (await self.get(tree_url(self.mindmap.id)))['ETag']
+
+        res = await self.get(tree_url(self.mindmap.id),
+                             **{'if-none-match': etag})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_list_leafs(self):
+        """Test that leafs are listed and paginated."""
+        res = await self.get(LEAFS_URL + '?fields=path')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'],
+                         [{'path': 'you'}, {'path': 'i/like/turtles'}])
+
+    async def test_auth_required(self):
+        """Test that the async endpoints require authentication."""
+        res = await self.async_client.get(tree_url(self.mindmap.id))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
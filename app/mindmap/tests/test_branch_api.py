@@ -0,0 +1,237 @@
+"""
+Tests for moving branches of mindmaps.
+"""
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
+
+def move_url(mindmap_id):
+    """Create and return the branch move URL of a mindmap."""
+    return reverse('mindmap:mindmap-move', args=[mindmap_id])
+
+
+def detail_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
+class MoveBranchApiTests(TestCase):
+    """Test moving and renaming branches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        for path in ['i/like', 'i/like/turtles', 'i/likes', 'you/eat']:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=path,
+                text=path,
+            )
+        caches['mindmaps'].clear()
+
+    def move(self, source, destination):
+        """Return the response for a branch move."""
+        return self.client.post(move_url(self.mindmap.id), {
+            'source': source,
+            'destination': destination,
+        })
+
+    def paths(self):
+        """Return the sorted paths and depths of the mindmap leafs."""
+        return sorted(
+            self.mindmap.leafs.values_list('path', 'depth', 'text')
+        )
+
+    def test_move_branch(self):
+        """Test that a branch and only its descendants are moved."""
+        res = self.move('i/like', 'you/love')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['moved'], 2)
+        self.assertEqual(self.paths(), [
+            ('i/likes', 2, 'i/likes'),
+            ('you/eat', 2, 'you/eat'),
+            ('you/love', 2, 'i/like'),
+            ('you/love/turtles', 3, 'i/like/turtles'),
+        ])
+
+    def test_move_changes_depth(self):
+        """Test that moving a branch to another level updates depths."""
+        self.move('i/like', 'like')
+
+        self.assertIn(('like/turtles', 2, 'i/like/turtles'), self.paths())
+
+    def test_move_updates_rendering_once(self):
+        """Test that the tree and version change in one step."""
+        self.client.get(detail_url(self.mindmap.id))
+        version = MindMap.objects.get(id=self.mindmap.id).version
+
+        res = self.move('i', 'they')
+
+        self.assertEqual(res.data['version'], version + 1)
+        tree = self.client.get(detail_url(self.mindmap.id))
+        self.assertEqual(
+            tree.content.decode(),
+            'Map/\n\tthey/\n\t\tlike/\n\t\t\tturtles\n\t\tlikes\n'
+            '\tyou/\n\t\teat',
+        )
+
+    def test_move_locks_mindmap_first(self):
+        """Test that the mindmap is locked before its leafs are moved."""
+        with CaptureQueriesContext(connection) as queries:
+            self.move('i', 'they')
+
+        statements = [query['sql'] for query in queries]
+        lock = next(index for index, sql in enumerate(statements)
+                    if sql.endswith('FOR UPDATE'))
+        update = next(index for index, sql in enumerate(statements)
+                      if sql.startswith('UPDATE "core_leaf"'))
+        self.assertIn('FROM "core_mindmap"', statements[lock])
+        self.assertLess(lock, update)
+
+    def test_move_into_itself_rejected(self):
+        """Test that a branch cannot be moved below itself."""
+        res = self.move('i', 'i/like/more')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.paths()), 4)
+
+    def test_move_too_long_rejected(self):
+        """Test that moves creating paths over the limit are rejected."""
+        res = self.move('i', 'x' * 250)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_move_unknown_branch(self):
+        """Test that moving a path without leafs is not found."""
+        res = self.move('they', 'them')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_move_other_users_mindmap(self):
+        """Test that branches of other users' mindmaps are not moved."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.move('i', 'they')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn(('i/likes', 2, 'i/likes'), self.paths())
+
+
+def branch_url(mindmap_id, path):
+    """Create and return the URL of a branch of a mindmap."""
+    url = reverse('mindmap:mindmap-branch', args=[mindmap_id])
+    return f'{url}?{urlencode({"path": path})}'
+
+
+class DeleteBranchApiTests(TestCase):
+    """Test deleting branches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        for path in ['i/like', 'i/like/turtles', 'i/likes', 'you/eat']:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=path,
+                text=path,
+            )
+        caches['mindmaps'].clear()
+
+    def paths(self):
+        """Return the sorted paths of the mindmap leafs."""
+        return sorted(self.mindmap.leafs.values_list('path', flat=True))
+
+    def test_delete_branch(self):
+        """Test that a branch and only its descendants are deleted."""
+        self.client.get(detail_url(self.mindmap.id))
+        version = MindMap.objects.get(id=self.mindmap.id).version
+
+        res = self.client.delete(branch_url(self.mindmap.id, 'i/like/'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'deleted': 2, 'version': version + 1})
+        self.assertEqual(self.paths(), ['i/likes', 'you/eat'])
+        tree = self.client.get(detail_url(self.mindmap.id))
+        self.assertEqual(tree.content.decode(),
+                         'Map/\n\ti/\n\t\tlikes\n\tyou/\n\t\teat')
+
+    def test_delete_is_one_statement(self):
+        """Test that leafs are deleted without being loaded."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(branch_url(self.mindmap.id, 'i'))
+
+        statements = [query['sql'] for query in queries]
+        deletes = [sql for sql in statements if sql.startswith('DELETE')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(any('FROM "core_leaf"' in sql and
+                             sql.startswith('SELECT') for sql in statements))
+
+    def test_delete_locks_mindmap_first(self):
+        """Test that the mindmap is locked before its leafs are deleted."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(branch_url(self.mindmap.id, 'i'))
+
+        statements = [query['sql'] for query in queries]
+        lock = next(index for index, sql in enumerate(statements)
+                    if sql.endswith('FOR UPDATE'))
+        delete = next(index for index, sql in enumerate(statements)
+                      if sql.startswith('DELETE'))
+        self.assertIn('FROM "core_mindmap"', statements[lock])
+        self.assertLess(lock, delete)
+
+    def test_delete_unknown_branch(self):
+        """Test that deleting a path without leafs is not found."""
+        res = self.client.delete(branch_url(self.mindmap.id, 'they'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_root_rejected(self):
+        """Test that the whole mindmap cannot be deleted as a branch."""
+        res = self.client.delete(branch_url(self.mindmap.id, '/'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.paths()), 4)
+
+    def test_delete_other_users_branch(self):
+        """Test that branches of other users' mindmaps are not deleted."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.delete(branch_url(self.mindmap.id, 'i'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(self.paths()), 4)
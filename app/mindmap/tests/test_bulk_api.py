@@ -0,0 +1,150 @@
+"""
+Tests for the bulk leaf API.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import snapshots
+
+
+def bulk_url(mindmap_id):
+    """Create and return a bulk leafs URL."""
+    return reverse('mindmap:mindmap-bulk-leafs', args=[mindmap_id])
+
+
+def detail_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
+class BulkLeafApiTests(TestCase):
+    """Test creating many leafs in one request."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+
+    def test_bulk_create_json(self):
+        """Test creating leafs from a JSON array."""
+        payload = [
+            {'path': f'i/like/item{i}', 'text': f'text {i}'}
+            for i in range(25)
+        ]
+
+        res = self.client.post(bulk_url(self.mindmap.id), payload,
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 25})
+        leafs = Leaf.objects.filter(mindmap=self.mindmap, user=self.user)
+        self.assertEqual(leafs.count(), 25)
+        self.assertTrue(leafs.filter(path='i/like/item7',
+                                     text='text 7').exists())
+
+    def test_bulk_create_ndjson(self):
+        """Test creating leafs from newline delimited JSON."""
+        lines = [
+            json.dumps({'path': 'i/like/turtles', 'text': 'because'}),
+            '',
+            json.dumps({'path': 'i/eat/tomato', 'text': 'fruit'}),
+        ]
+
+        res = self.client.post(
+            bulk_url(self.mindmap.id),
+            '\n'.join(lines),
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 2})
+        self.assertEqual(Leaf.objects.filter(mindmap=self.mindmap).count(), 2)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test that invalid items are reported and nothing is created."""
+        lines = [
+            json.dumps({'path': 'i/like/turtles', 'text': 'because'}),
+            json.dumps({'path': '', 'text': 'blank'}),
+            '{not json',
+            json.dumps({'path': 'x' * 256, 'text': 'long'}),
+            json.dumps({'path': '///', 'text': 'no segments'}),
+        ]
+
+        res = self.client.post(
+            bulk_url(self.mindmap.id),
+            '\n'.join(lines),
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['errors']
+        self.assertEqual([error['index'] for error in errors], [1, 2, 3, 4])
+        self.assertIn('path', errors[0]['errors'])
+        self.assertIn('non_field_errors', errors[1]['errors'])
+        self.assertIn('path', errors[2]['errors'])
+        self.assertIn('path', errors[3]['errors'])
+        self.assertFalse(Leaf.objects.exists())
+
+    def test_bulk_create_requires_list(self):
+        """Test that a single object is rejected."""
+        res = self.client.post(
+            bulk_url(self.mindmap.id),
+            {'path': 'i/like/turtles', 'text': 'because'},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_in_chunks(self):
+        """Test that more leafs than one chunk are all created."""
+        payload = [{'path': f'leaf{i}', 'text': 'text'} for i in range(2500)]
+
+        res = self.client.post(bulk_url(self.mindmap.id), payload,
+                               format='json')
+
+        self.assertEqual(res.data, {'created': 2500})
+        self.assertEqual(Leaf.objects.count(), 2500)
+
+    def test_bulk_create_refreshes_snapshot(self):
+        """Test that the rendered tree includes the new leafs."""
+        snapshots.render(self.mindmap.id)
+        self.client.get(detail_url(self.mindmap.id))
+
+        self.client.post(bulk_url(self.mindmap.id), [
+            {'path': 'i/like/turtles', 'text': 'because'},
+        ], format='json')
+        res = self.client.get(detail_url(self.mindmap.id))
+
+        self.assertEqual(res.content.decode(),
+                         'Map/\n\ti/\n\t\tlike/\n\t\t\tturtles')
+
+    def test_bulk_create_other_users_mindmap(self):
+        """Test that leafs cannot be added to another user's mindmap."""
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        mindmap = MindMap.objects.create(user=other_user, title='Other')
+
+        res = self.client.post(bulk_url(mindmap.id), [
+            {'path': 'i/like/turtles', 'text': 'because'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Leaf.objects.exists())
@@ -0,0 +1,162 @@
+"""
+Test mindmap management commands.
+"""
+import gzip
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
+
+class ImportMindMapCommandTests(TestCase):
+    """Test the import_mindmap command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def write_outline(self, text):
+        """Write text to a temporary outline file and return its name."""
+        outline = tempfile.NamedTemporaryFile(
+            'w', suffix='.txt', delete=False, encoding='utf-8',
+        )
+        with outline:
+            outline.write(text)
+        self.addCleanup(os.remove, outline.name)
+        return outline.name
+
+    def test_import_mindmap(self):
+        """Test importing an outline file for a user."""
+        name = self.write_outline('Map/\n\ti/\n\t\tlike\n\tyou\n')
+
+        out = StringIO()
+        call_command('import_mindmap', name, email=self.user.email,
+                     stdout=out)
+
+        mindmap = MindMap.objects.get(user=self.user)
+        self.assertIn('Imported 2 leafs', out.getvalue())
+        self.assertEqual(mindmap.title, 'Map')
+        self.assertEqual(
+            sorted(mindmap.leafs.values_list('path', flat=True)),
+            ['i/like', 'you'],
+        )
+
+    def test_import_exported_mindmaps(self):
+        """Test importing an export of several mindmaps."""
+        name = self.write_outline('Map/\n\ti/\n\t\tlike\n\nOther/\n\tyou\n')
+
+        out = StringIO()
+        call_command('import_mindmap', name, email=self.user.email,
+                     stdout=out)
+
+        self.assertIn('Imported 2 leafs into 2 mindmaps', out.getvalue())
+        self.assertEqual(
+            sorted(Leaf.objects.values_list('mindmap__title', 'path')),
+            [('Map', 'i/like'), ('Other', 'you')],
+        )
+
+    def test_import_exported_mindmaps_invalid(self):
+        """Test that nothing is imported if any outline is invalid."""
+        name = self.write_outline('Map/\n\ti\n\nOther/\n\t\tdeep\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_mindmap', name, email=self.user.email,
+                         stderr=StringIO())
+        self.assertFalse(MindMap.objects.exists())
+
+    def test_import_mindmap_unknown_user(self):
+        """Test that importing for an unknown user fails."""
+        name = self.write_outline('Map/\n\tyou\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_mindmap', name, email='who@example.com')
+
+    def test_import_mindmap_invalid_outline(self):
+        """Test that an invalid outline is not imported."""
+        name = self.write_outline('Map/\n\t\ttoo deep\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_mindmap', name, email=self.user.email,
+                         stderr=StringIO())
+        self.assertFalse(MindMap.objects.exists())
+
+
+class ExportMindMapsCommandTests(TestCase):
+    """Test the export_mindmaps command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        self.other_mindmap = MindMap.objects.create(
+            user=self.user,
+            title='Other',
+        )
+        for mindmap in [self.mindmap, self.other_mindmap]:
+            Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                path='i/like', text='turtles')
+
+    def output_file(self):
+        """Return the name of a temporary output file."""
+        fd, name = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, name)
+        return name
+
+    def test_export_outlines(self):
+        """Test exporting the outlines of a user's mindmaps to a file."""
+        name = self.output_file()
+
+        out = StringIO()
+        call_command('export_mindmaps', name, email=self.user.email,
+                     format='outline', stdout=out)
+
+        with open(name, encoding='utf-8') as output:
+            self.assertEqual(
+                output.read(),
+                'Map/\n\ti/\n\t\tlike\n\nOther/\n\ti/\n\t\tlike\n',
+            )
+        self.assertIn('Exported', out.getvalue())
+
+    def test_export_outlines_in_workers(self):
+        """Test rendering exported outlines in worker processes."""
+        name = self.output_file()
+
+        call_command('export_mindmaps', name, email=self.user.email,
+                     format='outline', workers=2, stdout=StringIO())
+
+        with open(name, encoding='utf-8') as output:
+            self.assertEqual(
+                output.read(),
+                'Map/\n\ti/\n\t\tlike\n\nOther/\n\ti/\n\t\tlike\n',
+            )
+
+    def test_export_compressed_mindmap(self):
+        """Test exporting a single mindmap compressed with gzip."""
+        name = self.output_file()
+
+        call_command('export_mindmaps', name, email=self.user.email,
+                     mindmaps=[self.mindmap.id], compress='gzip',
+                     stdout=StringIO())
+
+        with gzip.open(name) as output:
+            self.assertEqual(len(output.read().splitlines()), 2)
+
+    def test_export_unknown_user(self):
+        """Test that exporting for an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('export_mindmaps', self.output_file(),
+                         email='who@example.com')
@@ -0,0 +1,95 @@
+"""
+Tests for the compact array backed trees.
+"""
+import random
+
+from django.test import SimpleTestCase
+
+from mindmap.compact import (
+    NO_NODE,
+    CompactTree,
+)
+from mindmap.render import (
+    FORMAT_FLAT,
+    FORMAT_NESTED,
+    pretty_print,
+    to_json,
+)
+from mindmap.tree import Tree
+
+
+class CompactTreeTests(SimpleTestCase):
+    """Test building and rendering compact trees."""
+
+    def test_links(self):
+        """Test that nodes link to their parent, children and siblings."""
+        tree = CompactTree.from_paths('Map', ['i/like', 'you', 'i/eat'])
+
+        self.assertEqual(len(tree), 5)
+        self.assertEqual(list(tree.parent), [NO_NODE, 0, 1, 1, 0])
+        self.assertEqual(list(tree.first_child), [1, 2, -1, -1, -1])
+        self.assertEqual(list(tree.next_sibling), [-1, 4, 3, -1, -1])
+        self.assertEqual(
+            [tree.segment_of(node) for node in tree.children(1)],
+            ['eat', 'like'],
+        )
+
+    def test_segments_interned(self):
+        """Test that repeated segments are stored once."""
+        tree = CompactTree.from_paths('Map', ['a/x', 'b/x', 'c/x'])
+
+        self.assertEqual(len(tree), 7)
+        self.assertEqual(tree.segments, ['Map', 'a', 'x', 'b', 'c'])
+
+    def test_find(self):
+        """Test finding the nodes of paths."""
+        tree = CompactTree.from_leafs('Map', [
+            ('i/like', 'turtles'),
+            ('i/like', 'tortoises'),
+            ('i/eat', 'tomatoes'),
+        ])
+
+        node = tree.find('i/like/')
+        self.assertEqual(tree.count[node], 2)
+        self.assertEqual(tree.texts[node], 'tortoises')
+        self.assertEqual(tree.find(''), 0)
+        self.assertIsNone(tree.find('i/like/turtles'))
+
+    def test_empty_tree(self):
+        """Test that a tree without leafs renders its title."""
+        tree = CompactTree.from_paths('Map', [])
+
+        self.assertEqual(tree.pretty_print(), 'Map')
+        self.assertEqual(tree.to_flat(), {
+            'parent': [None],
+            'segment': ['Map'],
+            'text': [None],
+        })
+
+    def test_renders_like_trie(self):
+        """Test that compact trees render exactly like tries."""
+        rng = random.Random(0)
+        leafs = [
+            (
+                '/'.join(rng.choice('abcd') for _ in range(rng.randint(1, 5))),
+                f'text {index}' if index % 3 else None,
+            )
+            for index in range(2000)
+        ]
+        leafs.append(('i//like/', 'turtles'))
+        trie = Tree.from_leafs('Map', leafs)
+        tree = CompactTree.from_leafs('Map', leafs)
+
+        self.assertEqual(tree.pretty_print(), pretty_print(trie.root))
+        for fmt in [FORMAT_NESTED, FORMAT_FLAT]:
+            self.assertEqual(tree.to_json(fmt), to_json(trie.root, fmt))
+
+    def test_deep_tree(self):
+        """Test that deep trees render without recursion."""
+        path = '/'.join(['a'] * 5000)
+        tree = CompactTree.from_paths('Map', [path])
+
+        lines = list(tree.iter_lines())
+
+        self.assertEqual(len(lines), 5001)
+        self.assertEqual(lines[-1], '\t' * 5000 + 'a')
@@ -0,0 +1,434 @@
+"""
+Tests for mindmap change events and their streams.
+"""
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+)
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import events
+from mindmap.broker import (
+    InMemoryBroker,
+    PostgresBroker,
+)
+from mindmap.streams import EventStreamRouter
+
+
+class BrokerTests(SimpleTestCase):
+    """Test the in memory broker."""
+
+    async def test_publish_from_thread(self):
+        """Test that events published by other threads are delivered."""
+        broker = InMemoryBroker()
+        subscription = await broker.subscribe('channel')
+
+        thread = threading.Thread(
+            target=broker.publish,
+            args=('channel', {'event': 'leaf.added', 'version': 2}),
+        )
+        thread.start()
+        thread.join()
+
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event, {'event': 'leaf.added', 'version': 2})
+
+    async def test_unsubscribed_channels_not_delivered(self):
+        """Test that closed subscriptions receive nothing."""
+        broker = InMemoryBroker()
+        subscription = await broker.subscribe('channel')
+        subscription.close()
+
+        self.assertEqual(broker.publish('channel', {'event': 'x'}), 0)
+        self.assertEqual(broker.publish('other', {'event': 'x'}), 0)
+
+    async def test_overflow_resets_subscriber(self):
+        """Test that a full queue is replaced by a reset event."""
+        broker = InMemoryBroker(queue_size=2)
+        subscription = await broker.subscribe('channel')
+
+        for version in range(2, 6):
+            broker.publish('channel', {'event': 'x', 'version': version})
+        await asyncio.sleep(0)
+
+        event = await subscription.get()
+        self.assertEqual(event, {'event': 'mindmap.reset', 'version': 4})
+        self.assertEqual((await subscription.get())['version'], 5)
+
+
+class PostgresBrokerTests(TransactionTestCase):
+    """Test relaying events between processes through Postgres."""
+
+    def create_broker(self):
+        """Return a broker, stopped after the test."""
+        broker = PostgresBroker(poll_interval=0.1)
+        self.addCleanup(broker.close)
+        return broker
+
+    async def test_publish_to_other_broker(self):
+        """Test that events reach the subscribers of other brokers."""
+        subscriber = self.create_broker()
+        publisher = self.create_broker()
+        subscription = await subscriber.subscribe('channel')
+        other = await subscriber.subscribe('other')
+
+        await sync_to_async(publisher.publish)(
+            'channel', {'event': 'leaf.added', 'version': 2},
+        )
+
+        event = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual(event, {'event': 'leaf.added', 'version': 2})
+        self.assertTrue(other.queue.empty())
+
+    async def test_subscribe_waits_off_event_loop(self):
+        """Test that the loop keeps running while the listener connects."""
+        broker = self.create_broker()
+        connect = broker._connect
+        connected = threading.Event()
+
+        def slow_connect():
+            connected.wait(5)
+            return connect()
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                if ticks == 3:
+                    connected.set()
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        with patch.object(broker, '_connect', slow_connect):
+            await broker.subscribe('channel')
+        ticker.cancel()
+
+        self.assertGreaterEqual(ticks, 3)
+        self.assertTrue(broker._listening.is_set())
+
+    async def test_large_event_resets_subscribers(self):
+        """Test that events too large to notify are sent as resets."""
+        broker = self.create_broker()
+        subscription = await broker.subscribe('channel')
+
+        await sync_to_async(broker.publish)('channel', {
+            'event': 'leaf.added',
+            'mindmap': 1,
+            'version': 2,
+            'text': 'x' * 10000,
+        })
+
+        event = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual(event, {
+            'event': 'mindmap.reset',
+            'mindmap': 1,
+            'version': 2,
+        })
+
+
+@patch('mindmap.events.get_broker')
+class PublishEventsTests(TestCase):
+    """Test that mindmap changes publish events once committed."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+
+    def published(self, patched_broker):
+        """Return the events published to the mindmap channel."""
+        calls = patched_broker.return_value.publish.call_args_list
+        for call in calls:
+            self.assertEqual(call.args[0], events.channel(self.mindmap.id))
+        return [call.args[1] for call in calls]
+
+    def test_leaf_added(self, patched_broker):
+        """Test that creating a leaf publishes it with the new version."""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse('mindmap:leaf-list'), {
+                'mindmap': self.mindmap.id,
+                'path': 'i/like',
+                'text': 'turtles',
+            })
+
+        self.assertEqual(self.published(patched_broker), [{
+            'event': 'leaf.added',
+            'mindmap': self.mindmap.id,
+            'version': 2,
+            'id': res.data['id'],
+            'path': 'i/like',
+            'text': 'turtles',
+        }])
+
+    def test_leaf_updated_and_removed(self, patched_broker):
+        """Test that updating and deleting a leaf publish deltas."""
+        leaf = Leaf.objects.create(user=self.user, mindmap=self.mindmap,
+                                   path='i/like', text='turtles')
+        url = reverse('mindmap:leaf-detail', args=[leaf.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'path': 'i/love'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+
+        updated, removed = self.published(patched_broker)
+        self.assertEqual(updated['event'], 'leaf.updated')
+        self.assertEqual(updated['old_path'], 'i/like')
+        self.assertEqual(updated['path'], 'i/love')
+        self.assertEqual(removed['event'], 'leaf.removed')
+        self.assertEqual(removed['path'], 'i/love')
+        self.assertEqual(removed['version'], updated['version'] + 1)
+
+    def test_leaf_saved_outside_api(self, patched_broker):
+        """Test that leafs saved through the model publish deltas."""
+        leaf = Leaf.objects.create(user=self.user, mindmap=self.mindmap,
+                                   path='i/like', text='turtles')
+        leaf = Leaf.objects.get(id=leaf.id)
+        leaf.path = 'i/love'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leaf.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            leaf.delete()
+
+        updated, removed = self.published(patched_broker)
+        self.assertEqual(
+            (updated['event'], updated['old_path'], updated['version']),
+            ('leaf.updated', 'i/like', 3),
+        )
+        self.assertEqual(
+            (removed['event'], removed['id'], removed['version']),
+            ('leaf.removed', updated['id'], 4),
+        )
+
+    def test_mindmap_renamed_outside_api(self, patched_broker):
+        """Test that mindmaps renamed through the model publish events."""
+        self.mindmap.title = 'Renamed'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mindmap.save()
+
+        self.assertEqual(self.mindmap.version, 2)
+        self.assertEqual(self.published(patched_broker), [{
+            'event': 'mindmap.renamed',
+            'mindmap': self.mindmap.id,
+            'version': 2,
+            'title': 'Renamed',
+        }])
+
+    def test_branch_moved(self, patched_broker):
+        """Test that moving a branch publishes a single event."""
+        for path in ['i/like', 'i/like/turtles']:
+            Leaf.objects.create(user=self.user, mindmap=self.mindmap,
+                                path=path, text='text')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('mindmap:mindmap-move', args=[self.mindmap.id]),
+                {'source': 'i', 'destination': 'you'},
+            )
+
+        [event] = self.published(patched_broker)
+        self.assertEqual(event['event'], 'branch.moved')
+        self.assertEqual((event['source'], event['destination']),
+                         ('i', 'you'))
+
+    def test_nothing_published_on_rollback(self, patched_broker):
+        """Test that changes rolled back publish nothing."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('mindmap:mindmap-bulk-leafs', args=[self.mindmap.id]),
+                [{'path': 'i', 'text': 'text'}, {'path': ''}],
+                format='json',
+            )
+
+        self.assertEqual(self.published(patched_broker), [])
+
+    def test_broker_failure_logged(self, patched_broker):
+        """Test that writes succeed when their events cannot be sent."""
+        patched_broker.return_value.publish.side_effect = OperationalError()
+
+        with self.assertLogs('mindmap.events', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(reverse('mindmap:leaf-list'), {
+                    'mindmap': self.mindmap.id,
+                    'path': 'i',
+                    'text': 'text',
+                })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertTrue(Leaf.objects.filter(path='i').exists())
+
+
+class EventStreamTests(TransactionTestCase):
+    """Test streaming the events of a mindmap over ASGI."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        self.app = EventStreamRouter(None)
+
+    def scope(self, mindmap_id=None, query_string=b'', token=None):
+        """Return the ASGI scope of an event stream request."""
+        mindmap_id = mindmap_id or self.mindmap.id
+        headers = []
+        if token is not None:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': f'/api/mindmap/mindmaps/{mindmap_id}/events/',
+            'query_string': query_string,
+            'headers': headers,
+        }
+
+    async def get_ticket(self, mindmap_id=None):
+        """Request a stream ticket with the API token."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = await sync_to_async(client.post)(reverse(
+            'mindmap:mindmap-events-ticket',
+            args=[mindmap_id or self.mindmap.id],
+        ))
+        return res
+
+    async def open_stream(self, scope):
+        """Start a stream and return its task, messages and disconnect."""
+        messages = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        task = asyncio.ensure_future(self.app(scope, receive, messages.put))
+        return task, messages, disconnected
+
+    async def test_stream_events(self):
+        """Test that published events are streamed after a ready event."""
+        task, messages, disconnected = await self.open_stream(
+            self.scope(token=self.token.key)
+        )
+
+        start = await asyncio.wait_for(messages.get(), 5)
+        self.assertEqual(start['status'], 200)
+        ready = await asyncio.wait_for(messages.get(), 5)
+        self.assertIn(b'event: ready', ready['body'])
+        await sync_to_async(events.publish)(
+            self.mindmap.id, 2, events.LEAF_ADDED, path='i', text='text',
+        )
+        message = await asyncio.wait_for(messages.get(), 5)
+        disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+        lines = message['body'].decode().split('\n')
+        self.assertEqual(lines[:2], ['id: 2', 'event: leaf.added'])
+        self.assertEqual(json.loads(lines[2][len('data: '):])['path'], 'i')
+
+    async def test_deleted_mindmap_ends_stream(self):
+        """Test that the stream ends when its mindmap is deleted."""
+        task, messages, _ = await self.open_stream(
+            self.scope(token=self.token.key)
+        )
+        await asyncio.wait_for(messages.get(), 5)
+        await asyncio.wait_for(messages.get(), 5)
+
+        await sync_to_async(events.publish)(
+            self.mindmap.id, None, events.MINDMAP_DELETED,
+        )
+        await asyncio.wait_for(task, 5)
+
+        last = await messages.get()
+        self.assertIn(b'event: mindmap.deleted', last['body'])
+        self.assertFalse(last.get('more_body', False))
+
+    async def test_stream_requires_token(self):
+        """Test that streams without a valid token are unauthorized."""
+        for scope in [
+            self.scope(),
+            self.scope(token='invalid'),
+            self.scope(query_string=f'token={self.token.key}'.encode()),
+        ]:
+            task, messages, _ = await self.open_stream(scope)
+            await asyncio.wait_for(task, 5)
+
+            self.assertEqual((await messages.get())['status'], 401)
+
+    async def test_stream_with_ticket(self):
+        """Test that a ticket from the API opens the stream."""
+        res = await self.get_ticket()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['expires_in'], 60)
+        query = f'ticket={res.data["ticket"]}'.encode()
+
+        task, messages, disconnected = await self.open_stream(
+            self.scope(query_string=query)
+        )
+        start = await asyncio.wait_for(messages.get(), 5)
+        disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+        self.assertEqual(start['status'], 200)
+        self.assertNotIn(self.token.key, res.data['ticket'])
+
+    async def test_invalid_tickets_unauthorized(self):
+        """Test that tickets for other mindmaps or expired are refused."""
+        other = await sync_to_async(MindMap.objects.create)(
+            user=self.user, title='Other',
+        )
+        ticket = (await self.get_ticket(other.id)).data['ticket']
+        cases = [
+            (self.mindmap.id, ticket, 60),
+            (other.id, ticket + 'x', 60),
+            (other.id, ticket, -1),
+        ]
+        for mindmap_id, ticket, max_age in cases:
+            with self.settings(STREAM_TICKET_MAX_AGE=max_age):
+                task, messages, _ = await self.open_stream(self.scope(
+                    mindmap_id=mindmap_id,
+                    query_string=f'ticket={ticket}'.encode(),
+                ))
+                await asyncio.wait_for(task, 5)
+
+            self.assertEqual((await messages.get())['status'], 401)
+
+    async def test_ticket_of_other_users_mindmap(self):
+        """Test that tickets are not issued for others' mindmaps."""
+        res = await self.get_ticket(self.mindmap.id + 1)
+
+        self.assertEqual(res.status_code, 404)
+
+    async def test_stream_of_other_users_mindmap(self):
+        """Test that streams of other users' mindmaps are not found."""
+        task, messages, _ = await self.open_stream(
+            self.scope(mindmap_id=self.mindmap.id + 1, token=self.token.key)
+        )
+        await asyncio.wait_for(task, 5)
+
+        self.assertEqual((await messages.get())['status'], 404)
@@ -0,0 +1,222 @@
+"""
+Tests for exporting mindmaps.
+"""
+import gzip
+import json
+from unittest import (
+    mock,
+    skipIf,
+)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import export
+from mindmap.outline import (
+    read_outline,
+    read_outlines,
+)
+
+EXPORT_URL = reverse('mindmap:mindmap-export')
+
+
+def export_url(mindmap_id):
+    """Create and return the export URL of a mindmap."""
+    return reverse('mindmap:mindmap-export-mindmap', args=[mindmap_id])
+
+
+class ExportApiTests(TestCase):
+    """Test the mindmap export API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        self.other_mindmap = MindMap.objects.create(
+            user=self.user,
+            title='Other',
+        )
+        for mindmap, path in [
+            (self.mindmap, 'i/like'),
+            (self.mindmap, 'i/eat'),
+            (self.other_mindmap, 'you'),
+        ]:
+            Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                path=path, text=f'text of {path}')
+
+    def content(self, res):
+        """Return the streamed content of a response."""
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b''.join(res.streaming_content)
+
+    def test_export_account_ndjson(self):
+        """Test that every mindmap is exported with its leafs."""
+        res = self.client.get(EXPORT_URL)
+
+        records = [
+            json.loads(line) for line in self.content(res).splitlines()
+        ]
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertIn('filename="mindmaps.ndjson"',
+                      res['Content-Disposition'])
+        self.assertEqual(records, [
+            {'type': 'mindmap', 'id': self.mindmap.id, 'title': 'Map',
+             'version': 3},
+            {'type': 'leaf', 'mindmap': self.mindmap.id, 'path': 'i/eat',
+             'text': 'text of i/eat'},
+            {'type': 'leaf', 'mindmap': self.mindmap.id, 'path': 'i/like',
+             'text': 'text of i/like'},
+            {'type': 'mindmap', 'id': self.other_mindmap.id,
+             'title': 'Other', 'version': 2},
+            {'type': 'leaf', 'mindmap': self.other_mindmap.id,
+             'path': 'you', 'text': 'text of you'},
+        ])
+
+    def test_export_outlines(self):
+        """Test that outlines are separated by blank lines."""
+        # Stored snapshots are exported as they are.
+        self.client.get(reverse('mindmap:mindmap-detail',
+                                args=[self.mindmap.id]))
+
+        res = self.client.get(EXPORT_URL, {'output': 'outline'})
+
+        self.assertEqual(
+            self.content(res).decode(),
+            'Map/\n\ti/\n\t\teat\n\t\tlike\n\nOther/\n\tyou\n',
+        )
+
+    def test_exported_outline_imports(self):
+        """Test that an exported outline reads back as the same leafs."""
+        res = self.client.get(export_url(self.mindmap.id),
+                              {'output': 'outline'})
+
+        title, items = read_outline(self.content(res).decode().split('\n'))
+        self.assertEqual(title, 'Map')
+        self.assertEqual(sorted(item['path'] for item in items),
+                         ['i/eat', 'i/like'])
+
+    def test_exported_outlines_import(self):
+        """Test that an export of several outlines reads back per mindmap."""
+        res = self.client.get(EXPORT_URL, {'output': 'outline'})
+
+        outlines = read_outlines(self.content(res).decode().split('\n'))
+        self.assertEqual(
+            [(title, [item['path'] for item in items])
+             for title, items in outlines],
+            [('Map', ['i/eat', 'i/like']), ('Other', ['you'])],
+        )
+
+    def test_export_gzip(self):
+        """Test that exports can be compressed with gzip."""
+        res = self.client.get(export_url(self.mindmap.id),
+                              {'compression': 'gzip'})
+
+        lines = gzip.decompress(self.content(res)).splitlines()
+        self.assertEqual(res['Content-Type'], 'application/gzip')
+        self.assertIn(
+            f'filename="mindmap-{self.mindmap.id}.ndjson.gz"',
+            res['Content-Disposition'],
+        )
+        self.assertEqual(len(lines), 3)
+
+    @skipIf(export.zstandard is None, 'Requires zstandard.')
+    def test_export_zstd(self):
+        """Test that exports can be compressed with zstd."""
+        res = self.client.get(EXPORT_URL, {'compression': 'zstd'})
+
+        data = export.zstandard.ZstdDecompressor().decompressobj().decompress(
+            self.content(res)
+        )
+        self.assertEqual(len(data.splitlines()), 5)
+
+    def test_export_zstd_unavailable(self):
+        """Test that zstd exports fail without the zstandard package."""
+        with mock.patch('mindmap.export.zstandard', None):
+            res = self.client.get(EXPORT_URL, {'compression': 'zstd'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_only_own_mindmaps(self):
+        """Test that other users' mindmaps are not exported."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        account = self.client.get(EXPORT_URL)
+        mindmap = self.client.get(export_url(self.mindmap.id))
+
+        self.assertEqual(self.content(account), b'')
+        self.assertEqual(mindmap.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsgiExportTests(TransactionTestCase):
+    """Test exporting mindmaps when served over ASGI."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=user)
+        caches['mindmaps'].clear()
+        mindmap = MindMap.objects.create(user=user, title='Map')
+        Leaf.objects.create(user=user, mindmap=mindmap,
+                            path='i/like', text='turtles')
+
+    async def get(self, query_string):
+        """Request an export of the account and return the messages sent."""
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        await ASGIHandler()({
+            'type': 'http',
+            'method': 'GET',
+            'path': EXPORT_URL,
+            'query_string': query_string,
+            'server': ('testserver', 80),
+            'headers': [
+                (b'authorization', f'Token {self.token.key}'.encode()),
+            ],
+        }, receive, send)
+        return messages
+
+    async def test_export_over_asgi(self):
+        """Test that exports are written out before being sent."""
+        start, *body = await self.get(b'output=outline&compression=gzip')
+
+        headers = dict(start['headers'])
+        content = b''.join(message.get('body', b'') for message in body)
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertEqual(headers[b'Content-Type'], b'application/gzip')
+        self.assertEqual(
+            headers[b'Content-Disposition'],
+            b'attachment; filename="mindmaps.txt.gz"',
+        )
+        self.assertEqual(int(headers[b'Content-Length']), len(content))
+        self.assertEqual(gzip.decompress(content), b'Map/\n\ti/\n\t\tlike\n')
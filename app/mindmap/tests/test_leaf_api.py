@@ -2,13 +2,19 @@
 Tests for leafs APIs
 """
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Leaf
+from core.models import (
+    Leaf,
+    MindMap,
+)
 
 from mindmap.serializers import LeafSerializer
 
@@ -20,6 +26,11 @@ def detail_url(leaf_id):
     return reverse('mindmap:leaf-detail', args=[leaf_id])
 
 
+def mindmap_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
 def create_user(email='test@example.com', password='testpass123'):
     """Create and return a user"""
     return get_user_model().objects.create_user(email=email, password=password)
@@ -45,6 +56,7 @@ class PrivateLeafsApiTests(TestCase):
         self.user = create_user()
         self.client = APIClient()
         self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
 
     def test_retrieve_leafs(self):
         """Test retrieving a list of leafs."""
@@ -64,7 +76,7 @@ class PrivateLeafsApiTests(TestCase):
         leafs = Leaf.objects.all().order_by('-path')
         serializer = LeafSerializer(leafs, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_leafs_limited_to_user(self):
         """Test that list of leafs is limit to authenticated user."""
@@ -82,9 +94,9 @@ class PrivateLeafsApiTests(TestCase):
 
         res = self.client.get(LEAFS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['path'], leaf.path)
-        self.assertEqual(res.data[0]['id'], leaf.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['path'], leaf.path)
+        self.assertEqual(res.data['results'][0]['id'], leaf.id)
 
     def test_update_leaf(self):
         """Test to update a leaf"""
@@ -102,6 +114,27 @@ class PrivateLeafsApiTests(TestCase):
         leaf.refresh_from_db()
         self.assertEqual(leaf.path, payload['path'])
 
+    def test_path_without_segments_rejected(self):
+        """Test that paths of separators only are rejected."""
+        mindmap = MindMap.objects.create(user=self.user, title='Map')
+        leaf = Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                   path='i/like', text='turtles')
+
+        created = self.client.post(LEAFS_URL, {
+            'mindmap': mindmap.id,
+            'path': '///',
+            'text': 'nothing',
+        })
+        updated = self.client.patch(detail_url(leaf.id), {'path': ' / '})
+
+        self.assertEqual(created.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('path', created.data)
+        self.assertEqual(updated.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            list(Leaf.objects.values_list('path', flat=True)),
+            ['i/like'],
+        )
+
     def test_delete_leaf(self):
         """Test to delete a leaf"""
         leaf = Leaf.objects.create(
@@ -116,3 +149,233 @@ class PrivateLeafsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         leafs = Leaf.objects.filter(user=self.user)
         self.assertFalse(leafs.exists())
+
+
+class LeafSnapshotApiTests(TestCase):
+    """Test that leaf writes keep the mindmap snapshot up to date."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=self.mindmap,
+            path='i/like/turtles',
+            text='because',
+        )
+        # Build the snapshot before the writes under test.
+        self.client.get(mindmap_url(self.mindmap.id))
+
+    def get_tree(self, mindmap=None):
+        """Return the rendered tree of a mindmap."""
+        mindmap = mindmap or self.mindmap
+        res = self.client.get(mindmap_url(mindmap.id))
+        return res.content.decode()
+
+    def test_create_leaf_updates_snapshot(self):
+        """Test that creating a leaf adds it to the snapshot."""
+        payload = {
+            'mindmap': self.mindmap.id,
+            'path': 'i/eat/tomato',
+            'text': 'fruit',
+        }
+        res = self.client.post(LEAFS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.get_tree(),
+            'Map/\n\ti/\n\t\teat/\n\t\t\ttomato\n\t\tlike/\n\t\t\tturtles',
+        )
+
+    def test_update_leaf_updates_snapshot(self):
+        """Test that changing the path of a leaf moves it in the snapshot."""
+        leaf = Leaf.objects.get(mindmap=self.mindmap)
+
+        self.client.patch(detail_url(leaf.id), {'path': 'you/like/turtles'})
+
+        self.assertEqual(
+            self.get_tree(),
+            'Map/\n\tyou/\n\t\tlike/\n\t\t\tturtles',
+        )
+
+    def test_move_leaf_to_other_mindmap(self):
+        """Test that moving a leaf updates both snapshots."""
+        other = MindMap.objects.create(user=self.user, title='Other')
+        self.get_tree(other)
+        leaf = Leaf.objects.get(mindmap=self.mindmap)
+
+        self.client.patch(detail_url(leaf.id), {'mindmap': other.id})
+
+        self.assertEqual(self.get_tree(), 'Map')
+        self.assertEqual(
+            self.get_tree(other),
+            'Other/\n\ti/\n\t\tlike/\n\t\t\tturtles',
+        )
+
+    def test_delete_leaf_updates_snapshot(self):
+        """Test that deleting a leaf prunes it from the snapshot."""
+        leaf = Leaf.objects.get(mindmap=self.mindmap)
+
+        self.client.delete(detail_url(leaf.id))
+
+        self.assertEqual(self.get_tree(), 'Map')
+
+
+class LeafQueryCountTests(TestCase):
+    """Test the number of queries used to list leafs."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+
+    def create_leafs(self, mindmap_count, leafs_per_mindmap=3):
+        """Create mindmaps holding a few leafs each."""
+        for i in range(mindmap_count):
+            mindmap = MindMap.objects.create(user=self.user, title=f'Map {i}')
+            Leaf.objects.bulk_create(
+                Leaf(
+                    user=self.user,
+                    mindmap=mindmap,
+                    path=f'map{i}/leaf{j}',
+                    text='text',
+                )
+                for j in range(leafs_per_mindmap)
+            )
+
+    def test_list_query_count_is_constant(self):
+        """Test listing leafs does not query once per leaf or mindmap."""
+        self.create_leafs(mindmap_count=2)
+        with self.assertNumQueries(2):
+            self.client.get(LEAFS_URL)
+
+        self.create_leafs(mindmap_count=10)
+        with self.assertNumQueries(2):
+            res = self.client.get(LEAFS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 36)
+        self.assertEqual(len(res.data['results'][0]['mindmap']['leafs']), 3)
+
+    def test_list_compact_mindmaps(self):
+        """Test that compact nesting returns only the mindmap id and title."""
+        self.create_leafs(mindmap_count=5)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(LEAFS_URL, {'nested': 'compact'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mindmap = MindMap.objects.get(title='Map 4')
+        self.assertEqual(res.data['results'][0]['mindmap'],
+                         {'id': mindmap.id, 'title': mindmap.title})
+
+    def test_list_invalid_nested_mode(self):
+        """Test that an unknown nesting mode is rejected."""
+        res = self.client.get(LEAFS_URL, {'nested': 'deep'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LeafPaginationApiTests(TestCase):
+    """Test paginating and trimming the list of leafs."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        Leaf.objects.bulk_create(
+            Leaf(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=f'leaf{i % 3}',
+                text=f'text{i}',
+            )
+            for i in range(7)
+        )
+
+    def test_cursor_pagination_walks_all_leafs(self):
+        """Test following next links returns every leaf once in order."""
+        ids = []
+        url = LEAFS_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            ids.extend(leaf['id'] for leaf in res.data['results'])
+            url = res.data['next']
+
+        expected = Leaf.objects.order_by('-path', '-id')
+        self.assertEqual(ids, [leaf.id for leaf in expected])
+
+    def test_cursor_pagination_seeks_without_offset(self):
+        """Test that pages of leafs sharing a path are read by position."""
+        # The fourth page starts within the three leafs sharing leaf0.
+        url = LEAFS_URL + '?page_size=2'
+        for _ in range(3):
+            url = self.client.get(url).data['next']
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+
+    def test_cursor_pagination_walks_back(self):
+        """Test following previous links returns the same pages."""
+        pages = []
+        url = LEAFS_URL + '?page_size=3'
+        while url:
+            res = self.client.get(url)
+            pages.append([leaf['id'] for leaf in res.data['results']])
+            url = res.data['next']
+
+        previous = []
+        url = res.data['previous']
+        while url:
+            res = self.client.get(url)
+            previous.insert(0, [leaf['id'] for leaf in res.data['results']])
+            url = res.data['previous']
+
+        self.assertEqual(previous, pages[:-1])
+
+    def test_invalid_cursor(self):
+        """Test that cursors not naming a position are not found."""
+        res = self.client.get(LEAFS_URL, {'cursor': 'cD1sZWFmMQ=='})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields(self):
+        """Test that ?fields= skips the nested mindmap entirely."""
+        with self.assertNumQueries(1):
+            res = self.client.get(LEAFS_URL, {'fields': 'id,path'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for leaf in res.data['results']:
+            self.assertEqual(set(leaf), {'id', 'path'})
+
+    def test_sparse_fields_on_create(self):
+        """Test that ?fields= only trims the output of writes."""
+        res = self.client.post(LEAFS_URL + '?fields=id', {
+            'mindmap': self.mindmap.id,
+            'path': 'i/like',
+            'text': 'turtles',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(res.data), {'id'})
+        leaf = Leaf.objects.get(id=res.data['id'])
+        self.assertEqual(leaf.mindmap, self.mindmap)
+        self.assertEqual(leaf.path, 'i/like')
+        self.assertEqual(leaf.text, 'turtles')
+
+    def test_sparse_fields_unknown_field(self):
+        """Test that requesting an unknown field is rejected."""
+        res = self.client.get(LEAFS_URL, {'fields': 'id,colour'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
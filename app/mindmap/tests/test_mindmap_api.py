@@ -3,6 +3,7 @@ Tests for MindMap API.
 """
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import TestCase
 from django.urls import reverse
 
@@ -11,8 +12,11 @@ from rest_framework.test import APIClient
 
 from core.models import (
     MindMap,
+    MindMapSnapshot,
+    Leaf,
 )
 
+from mindmap import subtrees
 from mindmap.serializers import (
     MindMapSerializer,
 )
@@ -29,6 +33,11 @@ def detail_url(mindmap_id):
     return reverse('mindmap:mindmap-detail', args=[mindmap_id])
 
 
+def subtree_url(mindmap_id):
+    """Create and return a mindmap subtree URL."""
+    return reverse('mindmap:mindmap-subtree', args=[mindmap_id])
+
+
 def create_mindmap(user, **params):
     """Create and return a sample mindmap."""
     defaults = {
@@ -64,6 +73,7 @@ class PrivateMindMapAPITests(TestCase):
             password='testpass123',
         )
         self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
 
     def test_retrieve_mindmaps(self):
         """Test that retrieves a list of mindmaps."""
@@ -75,7 +85,7 @@ class PrivateMindMapAPITests(TestCase):
         mindmaps = MindMap.objects.all().order_by('-id')
         serializer = MindMapSerializer(mindmaps, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_mindmap_list_limited_to_user(self):
         """Test the list of mindmaps is limited to authenticated user."""
@@ -92,7 +102,7 @@ class PrivateMindMapAPITests(TestCase):
         mindmaps = MindMap.objects.filter(user=self.user)
         serializer = MindMapSerializer(mindmaps, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_mindmap(self):
         """Test Creating a mindmap through API call"""
@@ -168,3 +178,376 @@ class PrivateMindMapAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(MindMap.objects.filter(id=mindmap.id).exists())
+
+    def test_retrieve_mindmap_tree(self):
+        """Test that retrieving a mindmap pretty prints its leafs."""
+        mindmap = create_mindmap(user=self.user, title='Sample Mindmap')
+        for path in ['i/like/potatoes', 'i/eat/tomatoes', 'i/like/turtles']:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=mindmap,
+                path=path,
+                text='because',
+            )
+
+        url = detail_url(mindmap.id)
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/plain')
+        self.assertEqual(
+            res.content.decode(),
+            'Sample Mindmap/\n'
+            '\ti/\n'
+            '\t\teat/\n'
+            '\t\t\ttomatoes\n'
+            '\t\tlike/\n'
+            '\t\t\tpotatoes\n'
+            '\t\t\tturtles',
+        )
+
+    def test_retrieve_without_snapshot(self):
+        """Test that trees not rendered yet are rendered on retrieve."""
+        mindmap = create_mindmap(user=self.user, title='Map')
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=mindmap,
+            path='i/like/turtles',
+            text='because',
+        )
+
+        res = self.client.get(detail_url(mindmap.id))
+
+        self.assertEqual(res.content.decode(),
+                         'Map/\n\ti/\n\t\tlike/\n\t\t\tturtles')
+        # Snapshots are only stored by the render worker.
+        self.assertFalse(MindMapSnapshot.objects.exists())
+
+    def test_rename_updates_snapshot(self):
+        """Test that renaming a mindmap renames the root of its tree."""
+        mindmap = create_mindmap(user=self.user, title='First Title')
+        self.client.get(detail_url(mindmap.id))
+
+        self.client.patch(detail_url(mindmap.id), {'title': 'Second Title'})
+        res = self.client.get(detail_url(mindmap.id))
+
+        self.assertEqual(res.content.decode(), 'Second Title')
+
+    def test_list_prefetches_leafs(self):
+        """Test that listing mindmaps loads all leafs in one query."""
+        for i in range(5):
+            mindmap = create_mindmap(user=self.user)
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=mindmap,
+                path=f'leaf{i}',
+                text='text',
+            )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(MINDMAPS_URL)
+
+        self.assertEqual(res.data['results'][0]['leafs'], ['leaf4'])
+
+    def test_list_sparse_fields(self):
+        """Test listing mindmaps without their leafs."""
+        mindmap = create_mindmap(user=self.user)
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=mindmap,
+            path='leaf',
+            text='text',
+        )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(MINDMAPS_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.data['results'], [
+            {'id': mindmap.id, 'title': mindmap.title},
+        ])
+
+    def test_create_sparse_fields(self):
+        """Test that ?fields= does not drop the fields of a new mindmap."""
+        res = self.client.post(MINDMAPS_URL + '?fields=id',
+                               {'title': 'Sample'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(res.data), {'id'})
+        self.assertEqual(MindMap.objects.get(id=res.data['id']).title,
+                         'Sample')
+
+
+class SubtreeAPITests(TestCase):
+    """Tests for rendering part of a mindmap."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+        self.mindmap = create_mindmap(user=self.user, title='Map')
+        for path in [
+            'i/like/turtles',
+            'i/like/potatoes/mashed',
+            'i/eat/tomato',
+            'i/likes',
+            'you/like',
+        ]:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=path,
+                text='text',
+            )
+
+    def get_subtree(self, **params):
+        """Return the response for a subtree of the mindmap."""
+        return self.client.get(subtree_url(self.mindmap.id), params)
+
+    def test_subtree(self):
+        """Test rendering the branch under a path."""
+        res = self.get_subtree(path='i/like')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Vary'], 'Accept')
+        self.assertEqual(
+            b''.join(res.streaming_content).decode(),
+            'like/\n\tpotatoes/\n\t\tmashed\n\tturtles',
+        )
+
+    def test_subtree_depth(self):
+        """Test that the subtree is pruned to the requested depth."""
+        res = self.get_subtree(path='/i/', depth=1)
+
+        self.assertEqual(
+            b''.join(res.streaming_content).decode(),
+            'i/\n\teat\n\tlike\n\tlikes',
+        )
+
+    def test_subtree_depth_reads_cut_paths(self):
+        """Test that leafs below the depth are read as distinct cut paths."""
+        for path in ['i/like/turtles/green', 'i-/like/x', 'ix/like/x']:
+            Leaf.objects.create(user=self.user, mindmap=self.mindmap,
+                                path=path, text='text')
+
+        self.assertEqual(subtrees.cut_paths(self.mindmap, 'i', 2),
+                         ['i/eat', 'i/like'])
+        self.assertCountEqual(subtrees.cut_paths(self.mindmap, '', 1),
+                              ['i', 'i-', 'ix', 'you'])
+        self.assertEqual(subtrees.cut_paths(self.mindmap, 'i/like', 3),
+                         ['i/like/potatoes', 'i/like/turtles'])
+        self.assertEqual(subtrees.cut_paths(self.mindmap, 'you', 2), [])
+        self.assertEqual(subtrees.cut_paths(self.mindmap, '', 0), [''])
+
+    def test_subtree_root_depth_zero(self):
+        """Test that a depth of zero at the root renders the title."""
+        res = self.get_subtree(depth=0)
+
+        self.assertEqual(b''.join(res.streaming_content).decode(), 'Map')
+
+    def test_subtree_without_path(self):
+        """Test that an empty path renders the top of the mindmap."""
+        res = self.get_subtree(depth=1)
+
+        self.assertEqual(
+            b''.join(res.streaming_content).decode(),
+            'Map/\n\ti\n\tyou',
+        )
+
+    def test_subtree_unknown_path(self):
+        """Test that a path without leafs is not found."""
+        res = self.get_subtree(path='they')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_subtree_invalid_depth(self):
+        """Test that a negative depth is rejected."""
+        res = self.get_subtree(path='i', depth=-1)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_subtree_of_other_users_mindmap(self):
+        """Test that the subtree of another user's mindmap is not found."""
+        other_user = create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.get_subtree(path='i')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalRetrieveAPITests(TestCase):
+    """Tests for ETags and cached renderings of mindmaps."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = create_mindmap(user=self.user, title='Map')
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=self.mindmap,
+            path='i/like/turtles',
+            text='because',
+        )
+        caches['mindmaps'].clear()
+
+    def test_retrieve_returns_etag(self):
+        """Test that the rendered tree is tagged with its version."""
+        res = self.client.get(detail_url(self.mindmap.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['ETag'], f'"{self.mindmap.id}-2-text"')
+
+    def test_if_none_match_not_modified(self):
+        """Test that a matching ETag is answered without reading leafs."""
+        etag = self.client.get(detail_url(self.mindmap.id))['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.mindmap.id),
+                                  HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res['Vary'], 'Accept')
+        self.assertEqual(res.content, b'')
+
+    def test_cached_rendering(self):
+        """Test that a rendered version is served from the cache."""
+        first = self.client.get(detail_url(self.mindmap.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.mindmap.id))
+
+        self.assertEqual(res.content, first.content)
+
+    def test_leaf_change_updates_version(self):
+        """Test that changing a leaf changes the ETag and rendering."""
+        etag = self.client.get(detail_url(self.mindmap.id))['ETag']
+
+        self.client.post(reverse('mindmap:leaf-list'), {
+            'mindmap': self.mindmap.id,
+            'path': 'you',
+            'text': 'text',
+        })
+        res = self.client.get(detail_url(self.mindmap.id),
+                              HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.content.decode(),
+                         'Map/\n\ti/\n\t\tlike/\n\t\t\tturtles\n\tyou')
+        self.mindmap.refresh_from_db()
+        self.assertEqual(self.mindmap.version, 3)
+
+    def test_rename_keeps_version_increasing(self):
+        """Test that saving a mindmap does not overwrite its version."""
+        stale = MindMap.objects.get(id=self.mindmap.id)
+        self.client.post(reverse('mindmap:leaf-list'), {
+            'mindmap': self.mindmap.id,
+            'path': 'you',
+            'text': 'text',
+        })
+
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.assertEqual(stale.version, 4)
+        self.mindmap.refresh_from_db()
+        self.assertEqual(self.mindmap.title, 'Renamed')
+        self.assertEqual(self.mindmap.version, 4)
+
+    def test_subtree_not_modified(self):
+        """Test that subtrees answer If-None-Match as well."""
+        url = reverse('mindmap:mindmap-subtree', args=[self.mindmap.id])
+        etag = self.client.get(url, {'path': 'i'})['ETag']
+
+        res = self.client.get(url, {'path': 'i'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class JSONTreeAPITests(TestCase):
+    """Tests for mindmap trees rendered as JSON."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = create_mindmap(user=self.user, title='Map')
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=self.mindmap,
+            path='i/like',
+            text='turtles',
+        )
+        caches['mindmaps'].clear()
+
+    def test_retrieve_nested_json(self):
+        """Test that the tree is nested when JSON is accepted."""
+        res = self.client.get(detail_url(self.mindmap.id),
+                              HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res['ETag'], f'"{self.mindmap.id}-2-json"')
+        self.assertEqual(res['Vary'], 'Accept')
+        self.assertEqual(res.json(), {
+            'id': 0, 'segment': 'Map', 'text': None, 'children': [
+                {'id': 1, 'segment': 'i', 'text': None, 'children': [
+                    {'id': 2, 'segment': 'like', 'text': 'turtles',
+                     'children': []},
+                ]},
+            ],
+        })
+
+    def test_retrieve_flat_json(self):
+        """Test that ?layout=flat returns parallel arrays."""
+        res = self.client.get(detail_url(self.mindmap.id),
+                              {'layout': 'flat'},
+                              HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.json(), {
+            'parent': [None, 0, 1],
+            'segment': ['Map', 'i', 'like'],
+            'text': [None, None, 'turtles'],
+        })
+
+    def test_retrieve_invalid_layout(self):
+        """Test that an unknown layout is rejected."""
+        res = self.client.get(detail_url(self.mindmap.id),
+                              {'layout': 'sideways'},
+                              HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_formats_are_cached_separately(self):
+        """Test that text and JSON renderings do not share cache entries."""
+        self.client.get(detail_url(self.mindmap.id))
+        res = self.client.get(detail_url(self.mindmap.id),
+                              HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.json()['segment'], 'Map')
+        text = self.client.get(detail_url(self.mindmap.id))
+        self.assertEqual(text.content.decode(), 'Map/\n\ti/\n\t\tlike')
+
+    def test_subtree_json(self):
+        """Test rendering a subtree as JSON."""
+        res = self.client.get(subtree_url(self.mindmap.id), {'path': 'i'},
+                              HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['segment'], 'i')
+        self.assertEqual(res.json()['children'][0]['text'], 'turtles')
@@ -0,0 +1,172 @@
+"""
+Tests for importing mindmap outlines.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap.outline import (
+    OutlineError,
+    read_outline,
+    read_outlines,
+)
+from mindmap.parsers import InvalidLine
+
+IMPORT_URL = reverse('mindmap:mindmap-import')
+
+OUTLINE = (
+    'Sample Mindmap/\n'
+    '\ti/\n'
+    '\t\teat/\n'
+    '\t\t\ttomatoes\n'
+    '\t\tlike/\n'
+    '\t\t\tpotatoes\n'
+    '\t\t\tturtles\n'
+    '\tyou'
+)
+
+
+def detail_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
+class ReadOutlineTests(SimpleTestCase):
+    """Test parsing outlines."""
+
+    def test_read_outline(self):
+        """Test that each leaf line becomes a leaf path."""
+        title, items = read_outline(OUTLINE.splitlines(keepends=True))
+
+        self.assertEqual(title, 'Sample Mindmap')
+        self.assertEqual([item['path'] for item in items], [
+            'i/eat/tomatoes',
+            'i/like/potatoes',
+            'i/like/turtles',
+            'you',
+        ])
+
+    def test_read_outline_bad_indentation(self):
+        """Test that skipping a level of indentation is invalid."""
+        title, items = read_outline(['Map/', '\ti/', '\t\t\ttoo/deep', 'x'])
+
+        items = list(items)
+        self.assertIsInstance(items[0], InvalidLine)
+        self.assertIn('Line 3', items[0].error)
+        self.assertIsInstance(items[1], InvalidLine)
+        self.assertIn('Line 4', items[1].error)
+
+    def test_read_outlines(self):
+        """Test that outlines separated by blank lines are split."""
+        lines = 'Map/\n\ti/\n\t\tlike\n\nEmpty\n\nOther/\n\tyou\nx\n'
+
+        outlines = [
+            (title, list(items))
+            for title, items in read_outlines(lines.splitlines())
+        ]
+
+        self.assertEqual([title for title, _ in outlines],
+                         ['Map', 'Empty', 'Other'])
+        self.assertEqual(outlines[0][1], [{'path': 'i/like', 'text': 'like'}])
+        self.assertEqual(outlines[1][1], [])
+        self.assertEqual(outlines[2][1][0], {'path': 'you', 'text': 'you'})
+        self.assertIsInstance(outlines[2][1][1], InvalidLine)
+        self.assertIn('Line 9', outlines[2][1][1].error)
+
+    def test_read_outlines_skips_unread_items(self):
+        """Test that the next outline starts after unread items."""
+        outlines = read_outlines(['Map/', '\ti', '', 'Other/', '\tyou'])
+
+        next(outlines)
+        title, items = next(outlines)
+
+        self.assertEqual(title, 'Other')
+        self.assertEqual([item['path'] for item in items], ['you'])
+
+    def test_read_outline_without_title(self):
+        """Test that an empty outline is rejected."""
+        with self.assertRaises(OutlineError):
+            read_outline(['', '\n'])
+
+
+class ImportOutlineApiTests(TestCase):
+    """Test importing outlines through the API."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caches['mindmaps'].clear()
+
+    def test_import_outline(self):
+        """Test that importing an outline creates a mindmap with leafs."""
+        res = self.client.post(IMPORT_URL, OUTLINE, content_type='text/plain')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['title'], 'Sample Mindmap')
+        self.assertEqual(res.data['created'], 4)
+        mindmap = MindMap.objects.get(id=res.data['id'])
+        self.assertEqual(mindmap.user, self.user)
+        self.assertTrue(Leaf.objects.filter(
+            mindmap=mindmap,
+            user=self.user,
+            path='i/like/turtles',
+            text='turtles',
+        ).exists())
+
+    def test_export_import_round_trip(self):
+        """Test that an exported mindmap imports as the same mindmap."""
+        mindmap = MindMap.objects.create(user=self.user, title='Map')
+        for path in ['a/b/c', 'a/d', 'e', 'a/b/f/g']:
+            Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                path=path, text='text')
+        exported = self.client.get(detail_url(mindmap.id)).content
+
+        res = self.client.post(IMPORT_URL, exported,
+                               content_type='text/plain')
+        imported = self.client.get(detail_url(res.data['id'])).content
+
+        self.assertEqual(imported, exported)
+
+    def test_import_title_override(self):
+        """Test giving the imported mindmap another title."""
+        res = self.client.post(IMPORT_URL + '?title=Other', OUTLINE,
+                               content_type='text/plain')
+
+        self.assertEqual(res.data['title'], 'Other')
+
+    def test_import_invalid_outline(self):
+        """Test that nothing is created from an invalid outline."""
+        res = self.client.post(IMPORT_URL, 'Map/\n\t\tdeep',
+                               content_type='text/plain')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MindMap.objects.exists())
+
+    def test_import_several_outlines(self):
+        """Test that outlines of several mindmaps are rejected."""
+        res = self.client.post(IMPORT_URL, 'Map/\n\ti\n\nOther/\n\tyou',
+                               content_type='text/plain')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MindMap.objects.exists())
+
+    def test_import_empty_outline(self):
+        """Test that an outline without a title is rejected."""
+        res = self.client.post(IMPORT_URL, '', content_type='text/plain')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,100 @@
+"""
+Tests for rendering many mindmaps over a pool of processes.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import parallel
+from mindmap.render import (
+    FORMAT_FLAT,
+    pretty_print,
+)
+from mindmap.tree import Tree
+
+
+class RenderPacksTests(SimpleTestCase):
+    """Test rendering packed mindmaps."""
+
+    def test_pack_round_trip(self):
+        """Test that packed leafs unpack to the same pairs."""
+        leafs = [('i/like', 'turtles'), ('you', ''), ('i/eat', 'a\nb')]
+
+        title, unpacked = parallel.unpack(parallel.pack('Map', leafs))
+
+        self.assertEqual(title, 'Map')
+        self.assertEqual(list(unpacked), leafs)
+
+    def test_pack_empty_mindmap(self):
+        """Test that mindmaps without leafs render their title."""
+        packed = parallel.pack('Map', [])
+
+        self.assertEqual(parallel.render_packed(packed), 'Map')
+
+    def test_render_in_order(self):
+        """Test that renderings from the pool are in order of the packs."""
+        packs = [
+            parallel.pack(f'Map {index}', [(f'node{index}/leaf', 'text')])
+            for index in range(20)
+        ]
+
+        bodies = list(parallel.render_packs(packs, workers=2,
+                                            batch_leafs=3))
+
+        self.assertEqual(bodies, [
+            f'Map {index}/\n\tnode{index}/\n\t\tleaf' for index in range(20)
+        ])
+
+    def test_render_json(self):
+        """Test that packs render in the JSON formats."""
+        packed = parallel.pack('Map', [('i/like', 'turtles')])
+
+        body = list(parallel.render_packs([packed], FORMAT_FLAT, workers=2))
+
+        self.assertEqual(json.loads(body[0]), {
+            'parent': [None, 0, 1],
+            'segment': ['Map', 'i', 'like'],
+            'text': [None, None, 'turtles'],
+        })
+
+
+class RenderMindMapsTests(TestCase):
+    """Test rendering mindmaps from their leafs."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def test_render_mindmaps(self):
+        """Test that mindmaps render like their trees, in id order."""
+        mindmaps = [
+            MindMap.objects.create(user=self.user, title=f'Map {index}')
+            for index in range(5)
+        ]
+        for index, mindmap in enumerate(mindmaps):
+            if index % 2:
+                continue
+            for path in ['i/like', f'i/eat/{index}', 'you']:
+                Leaf.objects.create(user=self.user, mindmap=mindmap,
+                                    path=path, text='text')
+
+        rendered = list(parallel.render_mindmaps(
+            MindMap.objects.filter(user=self.user), workers=2,
+        ))
+
+        self.assertEqual(rendered, [
+            (mindmap.id, pretty_print(Tree.from_leafs(
+                mindmap.title, mindmap.leafs.values_list('path', 'text'),
+            ).root))
+            for mindmap in mindmaps
+        ])
@@ -0,0 +1,177 @@
+"""
+Tests for patching mindmaps with batches of operations.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+from mindmap import snapshots
+
+
+def patch_url(mindmap_id):
+    """Create and return the patch URL of a mindmap."""
+    return reverse('mindmap:mindmap-patch', args=[mindmap_id])
+
+
+def detail_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
+class PatchApiTests(TestCase):
+    """Test applying patches to mindmaps."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        for path in ['i/like', 'i/like/turtles', 'you/eat']:
+            Leaf.objects.create(
+                user=self.user,
+                mindmap=self.mindmap,
+                path=path,
+                text=path,
+            )
+        caches['mindmaps'].clear()
+        # Start from a stored snapshot, as a mindmap that has been read.
+        self.client.get(detail_url(self.mindmap.id))
+
+    def version(self):
+        """Return the current version of the mindmap."""
+        return MindMap.objects.get(id=self.mindmap.id).version
+
+    def patch(self, operations, base_version=None):
+        """Return the response for a patch of the mindmap."""
+        return self.client.post(patch_url(self.mindmap.id), {
+            'base_version': base_version or self.version(),
+            'operations': operations,
+        }, format='json')
+
+    def paths(self):
+        """Return the sorted paths and texts of the mindmap leafs."""
+        return sorted(self.mindmap.leafs.values_list('path', 'text'))
+
+    def test_apply_operations_in_order(self):
+        """Test that every operation is applied, in order."""
+        version = self.version()
+
+        res = self.patch([
+            {'op': 'add', 'path': 'i/like/tea/', 'text': 'green'},
+            {'op': 'add', 'path': 'they/run', 'text': 'fast'},
+            {'op': 'edit', 'path': 'i/like/tea', 'text': 'black'},
+            {'op': 'edit', 'path': 'you/eat', 'text': 'apples'},
+            {'op': 'move', 'source': 'i/like', 'destination': 'we/love'},
+            {'op': 'delete', 'path': 'they'},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'changed': [1, 1, 1, 1, 3, 1],
+            'version': version + 1,
+        })
+        self.assertEqual(self.paths(), [
+            ('we/love', 'i/like'),
+            ('we/love/tea', 'black'),
+            ('we/love/turtles', 'i/like/turtles'),
+            ('you/eat', 'apples'),
+        ])
+
+    def test_snapshot_matches_leafs(self):
+        """Test that the patched tree matches a render of the leafs."""
+        self.patch([
+            {'op': 'add', 'path': 'i/like/tea', 'text': 'green'},
+            {'op': 'delete', 'path': 'i/like/turtles'},
+            {'op': 'move', 'source': 'you', 'destination': 'i/you'},
+        ])
+        patched = self.client.get(detail_url(self.mindmap.id)).content
+
+        snapshots.render(self.mindmap.id)
+        caches['mindmaps'].clear()
+        rebuilt = self.client.get(detail_url(self.mindmap.id)).content
+
+        self.assertEqual(patched, rebuilt)
+        self.assertEqual(
+            patched.decode(),
+            'Map/\n\ti/\n\t\tlike/\n\t\t\ttea\n\t\tyou/\n\t\t\teat',
+        )
+
+    def test_stale_base_version_conflicts(self):
+        """Test that patches of an older version are rejected."""
+        version = self.version()
+        self.patch([{'op': 'delete', 'path': 'you'}])
+
+        res = self.patch(
+            [{'op': 'add', 'path': 'they', 'text': 'text'}],
+            base_version=version,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['version'], version + 1)
+        self.assertNotIn(('they', 'text'), self.paths())
+
+    def test_invalid_operation_applies_nothing(self):
+        """Test that a failing operation rolls back the whole patch."""
+        version = self.version()
+
+        res = self.patch([
+            {'op': 'add', 'path': 'they', 'text': 'text'},
+            {'op': 'move', 'source': 'i', 'destination': 'i/like'},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Operation 1', res.data[0])
+        self.assertEqual(self.version(), version)
+        self.assertEqual(len(self.paths()), 3)
+
+    def test_missing_fields_rejected(self):
+        """Test that operations must hold the fields of their type."""
+        res = self.patch([
+            {'op': 'add', 'path': '//'},
+            {'op': 'rename', 'path': 'i'},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['operations']
+        self.assertEqual(set(errors[0]), {'path', 'text'})
+        self.assertIn('op', errors[1])
+
+    def test_patch_is_a_few_queries(self):
+        """Test that runs of operations do not query once per leaf."""
+        operations = [
+            {'op': 'add', 'path': f'they/{index}', 'text': 'text'}
+            for index in range(50)
+        ] + [
+            {'op': 'edit', 'path': f'they/{index}', 'text': 'edited'}
+            for index in range(50)
+        ]
+
+        version = self.version()
+
+        with self.assertNumQueries(10):
+            res = self.patch(operations, base_version=version)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_patch_other_users_mindmap(self):
+        """Test that other users' mindmaps cannot be patched."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.patch([{'op': 'delete', 'path': 'i'}], base_version=1)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
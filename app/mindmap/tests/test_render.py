@@ -0,0 +1,93 @@
+"""
+Tests for rendering mindmap trees.
+"""
+import sys
+
+from django.test import SimpleTestCase
+
+from mindmap.render import (
+    iter_chunks,
+    iter_lines,
+    pretty_print,
+    to_flat,
+    to_nested,
+)
+from mindmap.tree import Tree
+
+
+class RenderTests(SimpleTestCase):
+    """Test pretty printing trees."""
+
+    def test_pretty_print(self):
+        """Test branches are suffixed with a slash and indented by tabs."""
+        tree = Tree.from_paths('Map', ['i/like/turtles', 'i/eat', 'you'])
+
+        self.assertEqual(
+            pretty_print(tree.root),
+            'Map/\n\ti/\n\t\teat\n\t\tlike/\n\t\t\tturtles\n\tyou',
+        )
+
+    def test_empty_tree(self):
+        """Test that a tree without leafs renders its title only."""
+        self.assertEqual(pretty_print(Tree('Map').root), 'Map')
+
+    def test_deep_tree_does_not_recurse(self):
+        """Test rendering a tree deeper than the recursion limit."""
+        depth = sys.getrecursionlimit() + 100
+        tree = Tree.from_paths('Map', ['/'.join(['x'] * depth)])
+
+        lines = list(iter_lines(tree.root))
+
+        self.assertEqual(len(lines), depth + 1)
+        self.assertEqual(lines[-1], '\t' * depth + 'x')
+
+    def test_chunks_join_to_pretty_print(self):
+        """Test that streamed chunks add up to the full rendering."""
+        paths = [f'branch{i % 7}/leaf{i}' for i in range(500)]
+        tree = Tree.from_paths('Map', paths)
+
+        chunks = list(iter_chunks(iter_lines(tree.root), chunk_size=256))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), pretty_print(tree.root))
+
+
+class JSONRenderTests(SimpleTestCase):
+    """Test rendering trees as JSON data."""
+
+    def setUp(self):
+        self.tree = Tree('Map')
+        self.tree.insert('i/like', 'turtles')
+        self.tree.insert('i/eat')
+
+    def test_to_nested(self):
+        """Test that nodes are nested and numbered in pretty print order."""
+        data = to_nested(self.tree.root)
+
+        self.assertEqual(data, {
+            'id': 0, 'segment': 'Map', 'text': None, 'children': [
+                {'id': 1, 'segment': 'i', 'text': None, 'children': [
+                    {'id': 2, 'segment': 'eat', 'text': None, 'children': []},
+                    {'id': 3, 'segment': 'like', 'text': 'turtles',
+                     'children': []},
+                ]},
+            ],
+        })
+
+    def test_to_flat(self):
+        """Test that nodes are listed with the index of their parent."""
+        data = to_flat(self.tree.root)
+
+        self.assertEqual(data, {
+            'parent': [None, 0, 1, 1],
+            'segment': ['Map', 'i', 'eat', 'like'],
+            'text': [None, None, None, 'turtles'],
+        })
+
+    def test_deep_tree_to_nested(self):
+        """Test nesting a tree deeper than the recursion limit."""
+        depth = sys.getrecursionlimit() + 100
+        tree = Tree.from_paths('Map', ['/'.join(['x'] * depth)])
+
+        self.assertEqual(len(to_flat(tree.root)['parent']), depth + 1)
+        self.assertEqual(to_nested(tree.root)['children'][0]['id'], 1)
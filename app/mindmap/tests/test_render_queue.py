@@ -0,0 +1,217 @@
+"""
+Tests for pre-rendering mindmaps in the background.
+"""
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+    MindMapSnapshot,
+    RenderJob,
+)
+from mindmap import (
+    render_queue,
+    snapshots,
+)
+
+
+def detail_url(mindmap_id):
+    """Create and return a mindmap detail URL."""
+    return reverse('mindmap:mindmap-detail', args=[mindmap_id])
+
+
+@override_settings(RENDER_DEBOUNCE_SECONDS=0, RENDER_MAX_DELAY_SECONDS=0)
+class RenderQueueTests(TestCase):
+    """Test queueing and rendering mindmaps."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        caches['mindmaps'].clear()
+
+    def add_leaf(self, path):
+        """Create a leaf through the API."""
+        self.client.post(reverse('mindmap:leaf-list'), {
+            'mindmap': self.mindmap.id,
+            'path': path,
+            'text': 'text',
+        })
+
+    def test_writes_queue_a_render(self):
+        """Test that writes queue one job with the latest version."""
+        self.add_leaf('i/like')
+        self.add_leaf('i/eat')
+
+        job = RenderJob.objects.get()
+        self.assertEqual(job.mindmap_id, self.mindmap.id)
+        self.assertEqual(job.version, 3)
+
+    @override_settings(RENDER_DEBOUNCE_SECONDS=10,
+                       RENDER_MAX_DELAY_SECONDS=15)
+    def test_writes_are_debounced(self):
+        """Test that writes push the job back, up to the maximum delay."""
+        self.add_leaf('i/like')
+        job = RenderJob.objects.get()
+        self.assertEqual(job.run_after - job.requested_at,
+                         timedelta(seconds=10))
+
+        RenderJob.objects.update(
+            requested_at=timezone.now() - timedelta(seconds=10),
+        )
+        self.add_leaf('i/eat')
+
+        job = RenderJob.objects.get()
+        self.assertEqual(job.run_after - job.requested_at,
+                         timedelta(seconds=15))
+        self.assertIsNone(render_queue.claim())
+
+    def test_claim_leases_job(self):
+        """Test that claimed jobs are not claimed again until the lease."""
+        self.add_leaf('i/like')
+
+        job = render_queue.claim()
+
+        self.assertEqual(job.mindmap_id, self.mindmap.id)
+        self.assertIsNone(render_queue.claim())
+
+    def test_complete_keeps_newer_versions(self):
+        """Test that jobs requeued by a later write are kept."""
+        self.add_leaf('i/like')
+        job = render_queue.claim()
+        self.add_leaf('i/eat')
+
+        render_queue.complete(job, job.version)
+        self.assertEqual(RenderJob.objects.get().version, 3)
+
+        render_queue.complete(job, 3)
+        self.assertFalse(RenderJob.objects.exists())
+
+    def test_complete_debounces_newer_versions(self):
+        """Test that kept jobs are debounced from the completion."""
+        self.add_leaf('i/like')
+        job = render_queue.claim()
+        RenderJob.objects.update(
+            requested_at=timezone.now() - timedelta(hours=1),
+        )
+        self.add_leaf('i/eat')
+
+        with override_settings(
+            RENDER_DEBOUNCE_SECONDS=30,
+            RENDER_MAX_DELAY_SECONDS=60,
+        ):
+            before = timezone.now()
+            render_queue.complete(job, job.version)
+            self.add_leaf('i/sleep')
+
+        kept = RenderJob.objects.get()
+        self.assertGreaterEqual(kept.requested_at, before)
+        self.assertGreaterEqual(
+            kept.run_after,
+            before + timedelta(seconds=30),
+        )
+
+    def test_writes_leave_snapshot_alone(self):
+        """Test that writes do not read or rewrite the snapshot."""
+        self.add_leaf('i/like')
+        snapshots.render(self.mindmap.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.add_leaf('i/eat')
+
+        self.assertFalse([
+            query for query in queries
+            if MindMapSnapshot._meta.db_table in query['sql']
+        ])
+        self.assertEqual(MindMapSnapshot.objects.get().rendered_version, 2)
+        res = self.client.get(detail_url(self.mindmap.id))
+        self.assertEqual(res.content.decode(), 'Map/\n\ti/\n\t\teat\n\t\tlike')
+
+    def test_retrieve_serves_prerendered_tree(self):
+        """Test that rendered trees are served without rendering."""
+        self.add_leaf('i/like')
+        snapshots.render(self.mindmap.id)
+        caches['mindmaps'].clear()
+
+        with mock.patch('mindmap.snapshots.build_tree') as build_tree:
+            res = self.client.get(detail_url(self.mindmap.id),
+                                  HTTP_ACCEPT='application/json')
+
+        build_tree.assert_not_called()
+        self.assertEqual(json.loads(res.content)['segment'], 'Map')
+
+    def test_stale_rendering_not_served(self):
+        """Test that renderings of an older version are ignored."""
+        self.add_leaf('i/like')
+        snapshots.render(self.mindmap.id)
+        self.add_leaf('you/eat')
+
+        res = self.client.get(detail_url(self.mindmap.id),
+                              {'layout': 'flat'},
+                              HTTP_ACCEPT='application/json')
+
+        self.assertIn('you', json.loads(res.content)['segment'])
+
+    def test_render_builds_missing_snapshot(self):
+        """Test that renders build snapshots missing from mindmaps."""
+        Leaf.objects.create(
+            user=self.user,
+            mindmap=self.mindmap,
+            path='i/like',
+            text='turtles',
+        )
+
+        version = snapshots.render(self.mindmap.id)
+
+        snapshot = MindMapSnapshot.objects.get()
+        self.assertEqual(version, 2)
+        self.assertEqual(snapshot.rendered_version, 2)
+        self.assertEqual(json.loads(snapshot.flat), {
+            'parent': [None, 0, 1],
+            'segment': ['Map', 'i', 'like'],
+            'text': [None, None, 'turtles'],
+        })
+
+    def test_worker_renders_due_jobs(self):
+        """Test that the worker renders and completes due jobs."""
+        self.add_leaf('i/like')
+
+        out = StringIO()
+        # Closing connections would close the one of the test transaction.
+        with mock.patch('mindmap.management.commands.render_worker.'
+                        'close_old_connections'):
+            call_command('render_worker', once=True, stdout=out)
+
+        self.assertFalse(RenderJob.objects.exists())
+        self.assertEqual(MindMapSnapshot.objects.get().rendered_version, 2)
+        self.assertIn('Rendered 1 mindmaps', out.getvalue())
+
+    def test_worker_stats(self):
+        """Test that the worker reports the depth of the queue."""
+        self.add_leaf('i/like')
+
+        out = StringIO()
+        call_command('render_worker', stats=True, stdout=out)
+
+        self.assertIn('1 queued, 1 due', out.getvalue())
@@ -0,0 +1,139 @@
+"""
+Tests for searching leafs.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Leaf,
+    MindMap,
+)
+
+SEARCH_URL = reverse('mindmap:leaf-search')
+
+
+class SearchApiTests(TestCase):
+    """Test the leaf search API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.mindmap = MindMap.objects.create(user=self.user, title='Map')
+        self.other_mindmap = MindMap.objects.create(
+            user=self.user,
+            title='Other',
+        )
+
+    def create_leaf(self, path, text, mindmap=None, user=None):
+        """Create and return a leaf."""
+        return Leaf.objects.create(
+            user=user or self.user,
+            mindmap=mindmap or self.mindmap,
+            path=path,
+            text=text,
+        )
+
+    def search(self, **params):
+        """Return the response of a search."""
+        return self.client.get(SEARCH_URL, params)
+
+    def test_search_path_and_text(self):
+        """Test that words match path segments and text, by prefix."""
+        in_path = self.create_leaf('i/like/turtles', 'Because they are slow')
+        in_text = self.create_leaf('you/eat', 'Turtle soup')
+        self.create_leaf('you/like', 'Tomatoes')
+
+        res = self.search(q='turtle')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {leaf['id'] for leaf in res.data['results']},
+            {in_path.id, in_text.id},
+        )
+        result = res.data['results'][0]
+        self.assertEqual(set(result), {'id', 'mindmap', 'path', 'text',
+                                       'rank'})
+
+    def test_path_matches_rank_higher(self):
+        """Test that matches in the path rank above matches in the text."""
+        in_text = self.create_leaf('you/eat', 'Turtle soup')
+        in_path = self.create_leaf('i/like/turtles', 'Because')
+
+        res = self.search(q='turtle')
+
+        ids = [leaf['id'] for leaf in res.data['results']]
+        self.assertEqual(ids, [in_path.id, in_text.id])
+
+    def test_every_word_must_match(self):
+        """Test that results match all the words of the query."""
+        both = self.create_leaf('i/like/turtles', 'They are slow')
+        self.create_leaf('i/like/rabbits', 'They are fast')
+
+        res = self.search(q='Turtles, slow!')
+
+        self.assertEqual([leaf['id'] for leaf in res.data['results']],
+                         [both.id])
+
+    def test_search_scoped_to_user_and_mindmap(self):
+        """Test that only the user's leafs, of one mindmap, are found."""
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        other_map = MindMap.objects.create(user=other_user, title='Map')
+        self.create_leaf('turtles', 'text', other_map, other_user)
+        self.create_leaf('turtles', 'text', self.other_mindmap)
+        leaf = self.create_leaf('turtles', 'text')
+
+        everywhere = self.search(q='turtles')
+        in_mindmap = self.search(q='turtles', mindmap=self.mindmap.id)
+
+        self.assertEqual(len(everywhere.data['results']), 2)
+        self.assertEqual([item['id'] for item in in_mindmap.data['results']],
+                         [leaf.id])
+
+    def test_search_paginated(self):
+        """Test that results are split into linked pages."""
+        for index in range(5):
+            self.create_leaf(f'turtles/{index}', 'text')
+
+        first = self.search(q='turtles', page_size=2)
+        last = self.client.get(
+            self.search(q='turtles', page_size=2, page=2).data['next']
+        )
+
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertIsNone(first.data['previous'])
+        self.assertIsNotNone(first.data['next'])
+        self.assertEqual(len(last.data['results']), 1)
+        self.assertIsNone(last.data['next'])
+
+    def test_query_without_words(self):
+        """Test that queries without words find nothing."""
+        self.create_leaf('turtles', 'text')
+
+        missing = self.search()
+        empty = self.search(q='&|!')
+
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(empty.data['results'], [])
+
+    def test_leafs_moved_by_branch_are_found(self):
+        """Test that the index follows paths rewritten in bulk."""
+        self.create_leaf('i/like/turtles', 'text')
+        self.client.post(
+            reverse('mindmap:mindmap-move', args=[self.mindmap.id]),
+            {'source': 'i/like', 'destination': 'you/love'},
+        )
+
+        res = self.search(q='love turtles')
+
+        self.assertEqual(res.data['results'][0]['path'], 'you/love/turtles')
@@ -0,0 +1,128 @@
+"""
+Tests for the mindmap tree builder.
+"""
+from django.test import SimpleTestCase
+
+from mindmap.tree import (
+    Tree,
+    split_path,
+)
+
+
+class TreeTests(SimpleTestCase):
+    """Test building trees from leaf paths."""
+
+    def test_split_path_skips_empty_segments(self):
+        """Test that repeated and trailing slashes are ignored."""
+        self.assertEqual(split_path('/i//like/turtles/'),
+                         ['i', 'like', 'turtles'])
+
+    def test_shared_prefixes_are_merged(self):
+        """Test that paths with a common prefix share nodes."""
+        tree = Tree.from_paths('Map', [
+            'i/like/turtles',
+            'i/like/potatoes',
+            'i/eat/tomato',
+        ])
+
+        self.assertEqual(list(tree.root.children), ['i'])
+        i_node = tree.root.children['i']
+        self.assertEqual(len(i_node.children), 2)
+        self.assertEqual(len(i_node.children['like'].children), 2)
+
+    def test_sorted_children(self):
+        """Test that children are ordered by segment."""
+        tree = Tree.from_paths('Map', ['b', 'c', 'a'])
+
+        segments = [node.segment for node in tree.root.sorted_children()]
+        self.assertEqual(segments, ['a', 'b', 'c'])
+
+    def test_insert_stores_text(self):
+        """Test that inserting a leaf keeps its text on the node."""
+        tree = Tree('Map')
+        node = tree.insert('i/like/turtles', 'because/turtles')
+
+        self.assertIs(tree.find('i/like/turtles'), node)
+        self.assertEqual(node.text, 'because/turtles')
+        self.assertEqual(node.count, 1)
+
+    def test_remove_prunes_empty_branches(self):
+        """Test that removing the last leaf of a branch prunes it."""
+        tree = Tree.from_paths('Map', ['i/like/turtles', 'i/eat/tomato'])
+
+        self.assertTrue(tree.remove('i/like/turtles'))
+
+        self.assertIsNone(tree.find('i/like'))
+        self.assertIsNotNone(tree.find('i/eat/tomato'))
+
+    def test_remove_keeps_duplicates_and_prefixes(self):
+        """Test that nodes still used by other leafs are kept."""
+        tree = Tree.from_paths('Map', ['i/like', 'i/like', 'i/like/turtles'])
+
+        self.assertTrue(tree.remove('i/like/turtles'))
+        self.assertTrue(tree.remove('i/like'))
+
+        self.assertEqual(tree.find('i/like').count, 1)
+        self.assertFalse(tree.remove('i/like/turtles'))
+
+    def test_data_round_trip(self):
+        """Test that a tree survives conversion to nested lists."""
+        tree = Tree('Map')
+        tree.insert('i/like/turtles', 'because')
+        tree.insert('i/like')
+        tree.insert('you')
+
+        copy = Tree.from_data(tree.to_data())
+
+        self.assertEqual(copy.to_data(), tree.to_data())
+        self.assertEqual(copy.find('i/like/turtles').text, 'because')
+        self.assertEqual(copy.find('i/like').count, 1)
+
+    def test_move_renames_branch(self):
+        """Test that moving a branch keeps its children and texts."""
+        tree = Tree.from_paths('Map', ['i/like/turtles', 'i/eat'])
+        tree.find('i/like/turtles').text = 'because'
+
+        self.assertTrue(tree.move('i/like', 'you/love'))
+
+        self.assertIsNone(tree.find('i/like'))
+        self.assertEqual(tree.find('you/love/turtles').text, 'because')
+        self.assertIsNotNone(tree.find('i/eat'))
+
+    def test_move_merges_and_prunes(self):
+        """Test that a moved branch merges into an existing one."""
+        tree = Tree.from_paths('Map', ['i/like/turtles', 'you/like/tea'])
+
+        self.assertTrue(tree.move('i/like', 'you/like'))
+
+        self.assertIsNone(tree.find('i'))
+        self.assertEqual(
+            sorted(tree.find('you/like').children), ['tea', 'turtles']
+        )
+
+    def test_move_unknown_branch(self):
+        """Test that moving a missing branch changes nothing."""
+        tree = Tree.from_paths('Map', ['i/like'])
+
+        self.assertFalse(tree.move('you', 'they'))
+        self.assertEqual(list(tree.root.children), ['i'])
+
+    def test_remove_branch_prunes_parents(self):
+        """Test that removing a branch drops it and empty parents."""
+        tree = Tree.from_paths('Map', ['i/like/turtles', 'i/like', 'you'])
+
+        self.assertTrue(tree.remove_branch('i/like'))
+
+        self.assertIsNone(tree.find('i'))
+        self.assertEqual(list(tree.root.children), ['you'])
+        self.assertFalse(tree.remove_branch('they'))
+
+    def test_set_text(self):
+        """Test that only paths holding leafs get a text."""
+        tree = Tree.from_paths('Map', ['i/like'])
+
+        self.assertTrue(tree.set_text('i/like', 'turtles'))
+        self.assertFalse(tree.set_text('i', 'turtles'))
+
+        self.assertEqual(tree.find('i/like').text, 'turtles')
+        self.assertIsNone(tree.find('i').text)
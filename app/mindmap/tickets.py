@@ -0,0 +1,47 @@
+"""
+Signed tickets opening the event stream of a mindmap.
+
+Browsers' EventSource cannot set headers, so the API token would have to
+be passed in the URL of the stream, and written to access logs. Clients
+instead request a ticket with their token, and pass it as ?ticket=. A
+ticket names one mindmap and its user, and expires after
+STREAM_TICKET_MAX_AGE seconds.
+"""
+from django.conf import settings
+from django.core import signing
+
+SALT = 'mindmap.tickets'
+
+
+class TicketError(Exception):
+    """Raised for invalid or expired tickets."""
+
+
+def issue(user, mindmap_id):
+    """Return a ticket for the event stream of a mindmap of a user."""
+    return signing.dumps(
+        {'user': user.id, 'mindmap': mindmap_id},
+        salt=SALT,
+        compress=False,
+    )
+
+
+def check(ticket, mindmap_id):
+    """Return the id of the user of a ticket for a mindmap.
+
+    Raises TicketError when the ticket is invalid, expired, or for another
+    mindmap.
+    """
+    try:
+        data = signing.loads(
+            ticket,
+            salt=SALT,
+            max_age=settings.STREAM_TICKET_MAX_AGE,
+        )
+    except signing.SignatureExpired:
+        raise TicketError('Ticket expired.')
+    except signing.BadSignature:
+        raise TicketError('Invalid ticket.')
+    if data.get('mindmap') != mindmap_id:
+        raise TicketError('Invalid ticket.')
+    return data['user']
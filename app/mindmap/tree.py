@@ -0,0 +1,234 @@
+"""
+Tree building for MindMaps.
+
+Leaf paths are inserted into a trie keyed by path segment, so building a
+tree costs O(depth) per leaf regardless of how wide the map is.
+"""
+
+
+def split_path(path):
+    """Return the non-empty segments of a leaf path."""
+    return [segment for segment in path.split('/') if segment]
+
+
+class TreeNode:
+    """Node of a mind map tree."""
+    __slots__ = ('segment', 'children', 'count', 'text')
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.children = {}
+        # Number of leafs whose path ends at this node.
+        self.count = 0
+        self.text = None
+
+    def sorted_children(self):
+        """Return the children of the node ordered by segment."""
+        children = self.children
+        return [children[segment] for segment in sorted(children)]
+
+    def __repr__(self):
+        return f'<TreeNode {self.segment!r}>'
+
+
+class Tree:
+    """Trie of leaf paths under the title of a mindmap."""
+    __slots__ = ('root',)
+
+    def __init__(self, title):
+        self.root = TreeNode(title)
+
+    @classmethod
+    def from_paths(cls, title, paths):
+        """Create and return a tree holding every path."""
+        tree = cls(title)
+        for path in paths:
+            tree.insert(path)
+        return tree
+
+    @classmethod
+    def from_leafs(cls, title, leafs):
+        """Create and return a tree from (path, text) pairs."""
+        tree = cls(title)
+        for path, text in leafs:
+            tree.insert(path, text)
+        return tree
+
+    @classmethod
+    def from_subtree(cls, title, prefix, leafs, depth=None):
+        """Create and return the tree under prefix from (path, text) pairs.
+
+        The root of the tree is the last segment of prefix, or title when
+        prefix is empty, and paths outside of prefix are skipped. With a
+        depth, only that many levels below the root are kept, and the text
+        of truncated leafs is dropped.
+        """
+        prefix = split_path(prefix)
+        tree = cls(prefix[-1] if prefix else title)
+        start = len(prefix)
+        stop = None if depth is None else start + depth
+        for path, text in leafs:
+            segments = split_path(path)
+            if segments[:start] == prefix:
+                if stop is not None and len(segments) > stop:
+                    text = None
+                tree.insert_segments(segments[start:stop], text)
+        return tree
+
+    @classmethod
+    def from_data(cls, data):
+        """Create and return a tree from the output of to_data."""
+        segment, count, text, children = data
+        tree = cls(segment)
+        tree.root.count = count
+        tree.root.text = text
+        stack = [(tree.root, children)]
+        while stack:
+            node, children = stack.pop()
+            for segment, count, text, grandchildren in children:
+                child = node.children[segment] = TreeNode(segment)
+                child.count = count
+                child.text = text
+                if grandchildren:
+                    stack.append((child, grandchildren))
+        return tree
+
+    def to_data(self):
+        """Return the tree as nested JSON serializable lists.
+
+        Each node is stored as [segment, count, text, children] with its
+        children in segment order.
+        """
+        root = self.root
+        data = [root.segment, root.count, root.text, []]
+        stack = [(root, data[3])]
+        while stack:
+            node, children = stack.pop()
+            for child in node.sorted_children():
+                child_data = [child.segment, child.count, child.text, []]
+                children.append(child_data)
+                if child.children:
+                    stack.append((child, child_data[3]))
+        return data
+
+    def insert(self, path, text=None):
+        """Add a leaf path to the tree and return its node."""
+        return self.insert_segments(split_path(path), text)
+
+    def insert_segments(self, segments, text=None):
+        """Add a leaf path split into segments and return its node."""
+        node = self.root
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = TreeNode(segment)
+            node = child
+        node.count += 1
+        if text is not None:
+            node.text = text
+        return node
+
+    def find(self, path):
+        """Return the node at path, or None if it is not in the tree."""
+        node = self.root
+        for segment in split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def remove(self, path):
+        """Remove one leaf path, pruning branches left empty.
+
+        Returns False if no leaf ends at path.
+        """
+        node, visited = self._walk(path)
+        if node is None or node.count == 0:
+            return False
+
+        node.count -= 1
+        if node.count == 0:
+            node.text = None
+        self._prune(node, visited)
+        return True
+
+    def remove_branch(self, path):
+        """Remove the branch at path with every leaf below it.
+
+        Returns False if path is not in the tree.
+        """
+        node, visited = self._walk(path)
+        if node is None or not visited:
+            return False
+
+        parent = visited.pop()
+        del parent.children[node.segment]
+        self._prune(parent, visited)
+        return True
+
+    def set_text(self, path, text):
+        """Set the text of the leafs ending at path.
+
+        Returns False if no leaf ends at path.
+        """
+        node = self.find(path)
+        if node is None or node.count == 0:
+            return False
+        node.text = text
+        return True
+
+    def move(self, source, destination):
+        """Move the branch at source to destination.
+
+        The branch is merged into any branch already at destination.
+        Returns False if source is not in the tree.
+        """
+        segments = split_path(destination)
+        node, visited = self._walk(source)
+        if node is None or not visited or not segments:
+            return False
+
+        del visited[-1].children[node.segment]
+        self._prune(visited.pop(), visited)
+
+        parent = self.root
+        for segment in segments[:-1]:
+            child = parent.children.get(segment)
+            if child is None:
+                child = parent.children[segment] = TreeNode(segment)
+            parent = child
+        node.segment = segments[-1]
+
+        stack = [(parent, node)]
+        while stack:
+            parent, node = stack.pop()
+            existing = parent.children.get(node.segment)
+            if existing is None:
+                parent.children[node.segment] = node
+                continue
+            existing.count += node.count
+            if node.text is not None:
+                existing.text = node.text
+            stack.extend(
+                (existing, child) for child in node.children.values()
+            )
+        return True
+
+    def _walk(self, path):
+        """Return the node at path and the nodes above it, root first."""
+        node = self.root
+        visited = []
+        for segment in split_path(path):
+            child = node.children.get(segment)
+            if child is None:
+                return None, visited
+            visited.append(node)
+            node = child
+        return node, visited
+
+    def _prune(self, node, visited):
+        """Remove node and the nodes above it while they are unused."""
+        while visited and node.count == 0 and not node.children:
+            parent = visited.pop()
+            del parent.children[node.segment]
+            node = parent
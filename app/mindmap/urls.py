@@ -8,7 +8,10 @@ from django.urls import (
 
 from rest_framework.routers import DefaultRouter
 
-from mindmap import views
+from mindmap import (
+    async_views,
+    views,
+)
 
 router = DefaultRouter()
 router.register('mindmaps', views.MindMapViewSet)
@@ -17,5 +20,11 @@ router.register('leafs', views.LeafViewSet)
 app_name = 'mindmap'
 
 urlpatterns = [
+    path(
+        'async/mindmaps/<int:pk>/',
+        async_views.mindmap_tree,
+        name='async-mindmap-detail',
+    ),
+    path('async/leafs/', async_views.leaf_list, name='async-leaf-list'),
     path('', include(router.urls))
 ]
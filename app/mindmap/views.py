@@ -1,111 +1,453 @@
 """
 Views for MindMap APIs
 """
+import tempfile
+from collections.abc import Iterator
+
 from rest_framework import (
     viewsets,
     mixins,
+    status,
+)
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotFound,
+    ValidationError,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
-from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 # from anytree import AbstractStyle, Node, RenderTree
 
 from core.models import (
     MindMap,
     Leaf
 )
-from mindmap import serializers
+from mindmap import (
+    branches,
+    bulk,
+    cache,
+    export,
+    pagination,
+    patches,
+    render,
+    serializers,
+    snapshots,
+    subtrees,
+    tickets,
+)
+from mindmap.branches import BranchError
+from mindmap.export import ExportError
+from mindmap.outline import (
+    OutlineError,
+    import_outline,
+)
+from mindmap.parsers import (
+    NDJSONParser,
+    PlainTextParser,
+)
+from mindmap.renderers import PlainTextRenderer
+from mindmap.tree import (
+    Tree,
+    split_path,
+)
+from user.authentication import CachedTokenAuthentication
 
+# Leaf fields needed to render the leafs of a mindmap as strings.
+PREFETCHED_LEAF_FIELDS = ('id', 'mindmap', 'path')
 
-def pretty_print(node, tab_counter=0, result=None) -> str:
-    """Pretty print tree from node"""
-    if result is None:
-        result = ""
 
-    if node.children == []:
-        tabs = ""
-        for i in range(0, tab_counter):
-            tabs += "\t"
+def tree_response(body, fmt, etag):
+    """Return a response for a tree rendered in a format."""
+    if fmt == render.FORMAT_TEXT:
+        response = HttpResponse(body, content_type="text/plain")
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    return tag_tree_response(response, etag)
 
-        result += tabs + node.data + "\n"
-        return str(result)
 
-    else:
-        tabs = ""
-        for i in range(0, tab_counter):
-            tabs += "\t"
-        result += tabs + node.data + "/\n"
-        tab_counter += 1
-        for child_node in node.children:
-            result += pretty_print(child_node, tab_counter, result)
-        return result
+def tag_tree_response(response, etag):
+    """Set the ETag of a tree response, and return it.
 
+    Trees are served as text or JSON from the same URL depending on the
+    Accept header, so shared caches must key them on it.
+    """
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept'])
+    return response
 
-class Node(object):
-    def __init__(self, data):
-        self.data = data
-        self.children = []
 
-    def add_child(self, obj):
-        self.children.append(obj)
+def not_modified_response(etag):
+    """Return a 304 response for a representation tagged etag."""
+    return tag_tree_response(HttpResponseNotModified(), etag)
 
-    def __str__(self) -> str:
-        return pretty_print(self, tab_counter=0, result=None)
 
+def spooled_response(chunks, content_type, filename):
+    """Return an attachment response of chunks written to a temporary file.
 
-class MindMapViewSet(viewsets.ModelViewSet):
+    Under ASGI, Django iterates streaming responses in the event loop, where
+    the queries of an export cannot run. The export is written out here,
+    in the thread running the view, and the file is sent from the loop.
+    """
+    spool = tempfile.TemporaryFile()
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    response = FileResponse(
+        spool,
+        as_attachment=True,
+        filename=filename,
+        content_type=content_type,
+    )
+    response['Content-Length'] = size
+    return response
+
+
+class SparseFieldsViewMixin:
+    """Skip loading relations that are left out with ?fields=."""
+
+    def is_requested(self, field):
+        """Return whether field is part of the response."""
+        fields = serializers.requested_fields(self.request)
+        return fields is None or field in fields
+
+
+class MindMapViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """View for managing the mindmap APIs."""
     serializer_class = serializers.MindMapSerializer
     queryset = MindMap.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = pagination.MindMapCursorPagination
 
     def get_queryset(self):
         """Retrieve mindmaps for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list' and self.is_requested('leafs'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'leafs',
+                queryset=Leaf.objects.only(*PREFETCHED_LEAF_FIELDS),
+            ))
+        return queryset.order_by('-id')
 
     def perform_create(self, serializer):
         """Create a new mindmap."""
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        """Update a mindmap, with the version bump of its title."""
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Delete a mindmap, telling its subscribers on commit."""
+        with transaction.atomic():
+            instance.delete()
+
+    def get_renderers(self):
+        """Render trees as text, or as JSON when it is accepted."""
+        if self.action in ('retrieve', 'subtree'):
+            return [PlainTextRenderer(), JSONRenderer()]
+        return super().get_renderers()
+
+    def get_tree_format(self):
+        """Return the format to render the tree in.
+
+        JSON trees are nested unless ?layout=flat asks for parallel
+        arrays, which are smaller for very large maps.
+        """
+        if self.request.accepted_renderer.format != 'json':
+            return render.FORMAT_TEXT
+        layout = self.request.query_params.get('layout', 'nested')
+        if layout == 'nested':
+            return render.FORMAT_NESTED
+        if layout == 'flat':
+            return render.FORMAT_FLAT
+        raise ValidationError({'layout': 'Must be one of: nested, flat.'})
+
     def retrieve(self, request, *args, **kwargs):
+        """Return the tree of a mindmap, pretty printed or as JSON.
+
+        Responses carry an ETag naming the mindmap version, so polling
+        clients get a 304 without the tree being read or rendered. Trees
+        are served as pre-rendered by the render worker, and only rendered
+        during the request when the worker has not caught up.
+        """
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        root = Node(data=str(serializer.data['title']))
-
-        # Tree Creation
-        node = root
-        for path in serializer.data['leafs']:
-            subpaths = path.split(sep='/')
-            for index, value, in enumerate(subpaths):
-                # Navigate to end of known tree
-                for i in range(index):
-                    for j in node.children:
-                        if j.data == subpaths[i]:
-                            node = j
-
-                exists_flag = False
-                for child_node in node.children:
-                    if child_node.data == value:
-                        exists_flag = True
-                        break
-                if exists_flag:
-                    exists_flag = False
-                    if index == len(subpaths) - 1:
-                        node = root
-                else:
-
-                    node.add_child(Node(data=value))
-                    exists_flag = False
-                    node = root
-
-        return HttpResponse(
-            str(node)[str(node).rfind(serializer.data['title']):].rstrip(),
+        fmt = self.get_tree_format()
+        etag = cache.etag(instance, fmt)
+        if cache.not_modified(request, etag):
+            return not_modified_response(etag)
+
+        body = cache.get_body(instance.id, instance.version, fmt)
+        if body is None:
+            body = snapshots.get_body(instance, fmt)
+            etag = cache.etag(instance, fmt)
+            cache.set_body(instance.id, instance.version, fmt, body)
+
+        return tree_response(body, fmt, etag)
+
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """Return the tree under ?path=, ?depth= levels deep.
+
+        Only the leafs under path are read from the database, and below
+        depth only the distinct paths cut at that depth. Pretty
+        printed trees are streamed as they are rendered.
+        """
+        instance = self.get_object()
+        fmt = self.get_tree_format()
+        etag = cache.etag(instance, fmt)
+        if cache.not_modified(request, etag):
+            return not_modified_response(etag)
+
+        query = serializers.SubtreeQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        prefix = '/'.join(split_path(query.validated_data['path']))
+
+        depth = query.validated_data.get('depth')
+        tree = Tree.from_subtree(
+            instance.title,
+            prefix,
+            subtrees.subtree_leafs(instance, prefix, depth),
+            depth,
+        )
+        if prefix and not (tree.root.count or tree.root.children):
+            raise NotFound('No leafs under this path.')
+        if fmt != render.FORMAT_TEXT:
+            return tree_response(render.to_json(tree.root, fmt), fmt, etag)
+
+        response = StreamingHttpResponse(
+            render.iter_chunks(render.iter_lines(tree.root)),
             content_type="text/plain"
             )
+        return tag_tree_response(response, etag)
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='leafs/bulk',
+        url_name='bulk-leafs',
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk_leafs(self, request, pk=None):
+        """Create many leafs from a JSON array or newline delimited JSON.
 
+        Each item holds a path and text. Nothing is created if any item is
+        invalid, and the errors are reported by item index.
+        """
+        instance = self.get_object()
+        items = request.data
+        if not isinstance(items, (list, Iterator)):
+            raise ValidationError('Expected a list of leafs.')
+
+        created, errors = bulk.create_leafs(instance, items)
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Move or rename a branch of the mindmap in one transaction.
+
+        Every leaf at or below source is moved below destination, and the
+        new version of the mindmap is returned.
+        """
+        instance = self.get_object()
+        serializer = serializers.MoveBranchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            moved = branches.move_branch(
+                instance,
+                serializer.validated_data['source'],
+                serializer.validated_data['destination'],
+            )
+        except BranchError as exc:
+            raise ValidationError(str(exc))
+        if not moved:
+            raise NotFound('No leafs under this path.')
 
-class LeafViewSet(mixins.UpdateModelMixin,
+        instance.refresh_from_db(fields=['version'])
+        return Response({'moved': moved, 'version': instance.version})
+
+    @action(detail=True, methods=['delete'])
+    def branch(self, request, pk=None):
+        """Delete the branch at ?path= with every leaf below it.
+
+        The leafs are removed with a single DELETE, and the number of
+        leafs deleted and the new version of the mindmap are returned.
+        """
+        instance = self.get_object()
+        query = serializers.BranchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        try:
+            deleted = branches.delete_branch(
+                instance,
+                query.validated_data['path'],
+            )
+        except BranchError as exc:
+            raise ValidationError(str(exc))
+        if not deleted:
+            raise NotFound('No leafs under this path.')
+
+        instance.refresh_from_db(fields=['version'])
+        return Response({'deleted': deleted, 'version': instance.version})
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='patch',
+        url_name='patch',
+    )
+    def apply_patch(self, request, pk=None):
+        """Apply an ordered list of operations in one transaction.
+
+        The patch is rejected with a 409 and the current version if the
+        mindmap changed since base_version. Returns the number of leafs
+        each operation changed and the new version.
+        """
+        instance = self.get_object()
+        serializer = serializers.PatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            counts, version = patches.apply_patch(
+                instance,
+                serializer.validated_data['base_version'],
+                serializer.validated_data['operations'],
+            )
+        except patches.PatchConflict as exc:
+            return Response(
+                {'detail': str(exc), 'version': exc.version},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except BranchError as exc:
+            raise ValidationError(str(exc))
+        return Response({'changed': counts, 'version': version})
+
+    def export_response(self, mindmaps, name):
+        """Return a streamed export of mindmaps as an attachment.
+
+        The format is chosen with ?output=ndjson|outline, and the export
+        is compressed with ?compression=gzip|zstd.
+        """
+        query = serializers.ExportQuerySerializer(
+            data=self.request.query_params,
+        )
+        query.is_valid(raise_exception=True)
+        fmt = query.validated_data['output']
+        compression = query.validated_data.get('compression')
+        try:
+            chunks = export.export(mindmaps, fmt, compression)
+        except ExportError as exc:
+            raise ValidationError(str(exc))
+
+        content_type = export.content_type(fmt, compression)
+        filename = export.filename(name, fmt, compression)
+        if isinstance(self.request._request, ASGIRequest):
+            return spooled_response(chunks, content_type, filename)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        url_name='export',
+    )
+    def export_account(self, request):
+        """Stream an export of every mindmap of the user."""
+        return self.export_response(
+            MindMap.objects.filter(user=request.user),
+            'mindmaps',
+        )
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='export',
+        url_name='export-mindmap',
+    )
+    def export_mindmap(self, request, pk=None):
+        """Stream an export of the mindmap."""
+        instance = self.get_object()
+        return self.export_response(
+            MindMap.objects.filter(id=instance.id),
+            f'mindmap-{instance.id}',
+        )
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='events/ticket',
+        url_name='events-ticket',
+    )
+    def events_ticket(self, request, pk=None):
+        """Return a short lived ticket opening the event stream.
+
+        The ticket is passed to the stream as ?ticket=, so that the API
+        token is never sent in a URL.
+        """
+        instance = self.get_object()
+        return Response({
+            'ticket': tickets.issue(request.user, instance.id),
+            'expires_in': settings.STREAM_TICKET_MAX_AGE,
+        })
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        url_name='import',
+        parser_classes=[PlainTextParser],
+    )
+    def import_outline(self, request):
+        """Create a mindmap from a pretty printed text outline.
+
+        The outline is read line by line and its leafs are inserted in
+        batches. Nothing is created if any line is invalid.
+        """
+        try:
+            mindmap, created, errors = import_outline(
+                request.user,
+                request.data,
+                title=request.query_params.get('title'),
+            )
+        except OutlineError as exc:
+            raise ValidationError(str(exc))
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializers.MindMapCompactSerializer(mindmap).data
+        data['created'] = created
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class LeafViewSet(SparseFieldsViewMixin,
+                  mixins.UpdateModelMixin,
                   mixins.CreateModelMixin,
                   mixins.RetrieveModelMixin,
                   mixins.DestroyModelMixin,
@@ -114,16 +456,77 @@ class LeafViewSet(mixins.UpdateModelMixin,
     """Manage Leafs in the database."""
     serializer_class = serializers.LeafSerializer
     queryset = Leaf.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = pagination.LeafCursorPagination
 
     def get_queryset(self):
         """Filter queryset to an authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-path')
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list' and self.is_requested('mindmap'):
+            queryset = queryset.select_related('mindmap')
+            if self.get_nested() == serializers.NESTED_FULL:
+                queryset = queryset.prefetch_related(Prefetch(
+                    'mindmap__leafs',
+                    queryset=Leaf.objects.only(*PREFETCHED_LEAF_FIELDS),
+                ))
+        return queryset.order_by('-path')
+
+    def get_nested(self):
+        """Return how the mindmap of each leaf should be nested."""
+        nested = self.request.query_params.get(
+            'nested', serializers.NESTED_FULL
+        )
+        if nested not in serializers.NESTED_SERIALIZERS:
+            choices = ', '.join(serializers.NESTED_SERIALIZERS)
+            raise ValidationError({'nested': f'Must be one of: {choices}.'})
+        return nested
+
+    def get_serializer_context(self):
+        """Pass the nested mindmap representation to the serializer."""
+        context = super().get_serializer_context()
+        context['nested'] = self.get_nested()
+        return context
+
+    # The versions of the mindmaps of saved and deleted leafs are bumped,
+    # and their events published, by the receivers of mindmap.signals, in
+    # the transaction of the write.
 
     def perform_create(self, serializer):
         """Create a new Leaf."""
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        """Update a Leaf."""
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Delete a Leaf."""
+        with transaction.atomic():
+            instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Return the leafs matching ?q=, best first.
+
+        Every word of the query must start a path segment or a word of the
+        text. Results can be limited to one mindmap with ?mindmap=.
+        """
+        query = serializers.SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        leafs = Leaf.objects.filter(user=request.user)
+        if 'mindmap' in query.validated_data:
+            leafs = leafs.filter(mindmap_id=query.validated_data['mindmap'])
+        leafs = leafs.search(query.validated_data['q']).only(
+            'id', 'mindmap', 'path', 'text',
+        )
+
+        paginator = pagination.LeafSearchPagination()
+        page = paginator.paginate_queryset(leafs, request, view=self)
+        serializer = serializers.LeafSearchSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def get_serializer_class(self):
         """Return the serializer class depending on the request."""
@@ -0,0 +1,172 @@
+"""
+Cached token authentication for the APIs.
+
+DRF's TokenAuthentication loads the token and its user from the database
+on every request. CachedTokenAuthentication keeps authenticated tokens in a
+small per-process LRU, backed by a Django cache shared between processes,
+so most requests authenticate without a query.
+
+Entries expire after a TTL, and are dropped from the shared cache when a
+token is deleted or its user is saved, e.g. deactivated. Other processes
+only notice once their local entry expires, which is why the local TTL is
+kept short.
+
+Only the fields of the user listed in CACHED_USER_FIELDS are cached, never
+the token key or the password hash. Each request gets its own User built
+from them, with the other fields deferred, so a request changing its user
+neither leaks into other requests nor overwrites uncached fields on save.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+DEFAULT_TOKEN_CACHE = {
+    'ALIAS': 'default',
+    'TTL': 300,
+    'LOCAL_TTL': 10,
+    'LOCAL_MAXSIZE': 1024,
+}
+CACHED_USER_FIELDS = (
+    'id',
+    'email',
+    'name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+class TokenCache:
+    """Two level cache of the users of tokens, keyed by token key."""
+
+    def __init__(self, alias, ttl, local_ttl, local_maxsize):
+        self.alias = alias
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_maxsize = local_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """Create a cache configured by the TOKEN_CACHE setting."""
+        options = {
+            **DEFAULT_TOKEN_CACHE,
+            **getattr(settings, 'TOKEN_CACHE', {}),
+        }
+        return cls(
+            alias=options['ALIAS'],
+            ttl=options['TTL'],
+            local_ttl=options['LOCAL_TTL'],
+            local_maxsize=options['LOCAL_MAXSIZE'],
+        )
+
+    @property
+    def shared(self):
+        """Return the Django cache shared between processes."""
+        return caches[self.alias]
+
+    @staticmethod
+    def cache_key(key):
+        """Return the shared cache key of a token, without the token."""
+        return 'token-auth:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached entry for key, or None."""
+        now = time.monotonic()
+        with self._lock:
+            local = self._local.get(key)
+            if local is not None:
+                entry, expires = local
+                if expires > now:
+                    self._local.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self._local[key]
+
+        entry = self.shared.get(self.cache_key(key))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._set_local(key, entry, now)
+        return entry
+
+    def set(self, key, entry):
+        """Cache the entry of the token authenticated by key."""
+        self.shared.set(self.cache_key(key), entry, self.ttl)
+        with self._lock:
+            self._set_local(key, entry, time.monotonic())
+
+    def _set_local(self, key, entry, now):
+        self._local[key] = (entry, now + self.local_ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_maxsize:
+            self._local.popitem(last=False)
+
+    def delete(self, key):
+        """Drop the token for key from the cache."""
+        self.shared.delete(self.cache_key(key))
+        with self._lock:
+            self._local.pop(key, None)
+
+    def clear(self):
+        """Drop every local entry and reset the counters."""
+        with self._lock:
+            self._local.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit and miss counters and the local cache size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'local_size': len(self._local),
+            }
+
+
+token_cache = TokenCache.from_settings()
+
+
+def cached_user(values):
+    """Return a new User from the cached values of its fields."""
+    User = get_user_model()
+    # from_db() takes the loaded values in the order of the model fields.
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        router.db_for_read(User),
+        names,
+        [values[name] for name in names],
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the users of tokens."""
+
+    def authenticate_credentials(self, key):
+        values = token_cache.get(key)
+        if values is not None:
+            user = cached_user(values)
+            return (user, Token(key=key, user=user))
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, {
+            field: getattr(user, field) for field in CACHED_USER_FIELDS
+        })
+        return (user, token)
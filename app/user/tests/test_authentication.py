@@ -0,0 +1,149 @@
+"""
+Tests for cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    token_cache,
+)
+
+ME_URL = reverse('user:me')
+
+
+class TokenCacheTests(TestCase):
+    """Test the token cache."""
+
+    def setUp(self):
+        self.cache = TokenCache(
+            alias='default',
+            ttl=300,
+            local_ttl=10,
+            local_maxsize=2,
+        )
+        self.addCleanup(self.cache.shared.clear)
+
+    def test_get_counts_hits_and_misses(self):
+        """Test that lookups update the counters."""
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 'token a')
+
+        self.assertEqual(self.cache.get('a'), 'token a')
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'misses': 1, 'local_size': 1})
+
+    def test_local_cache_is_bounded(self):
+        """Test that the least recently used entries are evicted locally."""
+        for key in ['a', 'b', 'c']:
+            self.cache.set(key, f'token {key}')
+
+        self.assertEqual(list(self.cache._local), ['b', 'c'])
+        # Evicted entries are still found in the shared cache.
+        self.assertEqual(self.cache.get('a'), 'token a')
+
+    def test_local_entries_expire(self):
+        """Test that local entries are not used after their TTL."""
+        self.cache.local_ttl = -1
+        self.cache.set('a', 'token a')
+        self.cache.shared.clear()
+
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_shared_cache_key_hides_token(self):
+        """Test that token keys are not stored in the shared cache as is."""
+        self.assertNotIn('secret', TokenCache.cache_key('secret'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests with cached tokens."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        token_cache.clear()
+        token_cache.shared.clear()
+
+    def test_cached_token_skips_database(self):
+        """Test that a cached token authenticates without queries."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_shared_cache_holds_no_secrets(self):
+        """Test that neither the token key nor the password are cached."""
+        self.client.get(ME_URL)
+
+        entry = token_cache.shared.get(TokenCache.cache_key(self.token.key))
+        self.assertNotIn(self.token.key, entry.values())
+        self.assertNotIn(self.user.password, entry.values())
+
+    def test_cached_user_is_not_shared(self):
+        """Test that each request gets its own user from the cache."""
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+
+        first, _ = auth.authenticate_credentials(self.token.key)
+        first.name = 'Changed'
+        second, token = auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.name, 'Test Name')
+        self.assertEqual(token.user, second)
+
+    def test_update_with_cached_user_keeps_password(self):
+        """Test that saving a cached user does not drop uncached fields."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_revoked_token_is_rejected(self):
+        """Test that deleting a token stops it from authenticating."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user stops its token authenticating."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_is_rejected(self):
+        """Test that unknown tokens are not authenticated."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,14 @@
+#!/bin/sh
+
+set -e
+
+python manage.py wait_for_db
+python manage.py migrate
+
+if [ "$SERVER_INTERFACE" = "asgi" ]; then
+    APPLICATION=app.asgi:application
+else
+    APPLICATION=app.wsgi:application
+fi
+
+exec gunicorn -c gunicorn.conf.py "$APPLICATION"